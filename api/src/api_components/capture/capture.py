@@ -0,0 +1,320 @@
+"""Non-blocking capture of scored predictions for retraining and audit.
+
+The request path only appends a tuple to a bounded in-memory buffer. A
+daemon thread drains the buffer in batches, pivots the records into columns
+and hands them to a ``CaptureSink``. When the buffer is full new records are
+dropped and counted rather than blocking the request.
+"""
+
+import atexit
+import json
+import os
+import random
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from loguru import logger
+
+from api_components.capture.sinks import CaptureSink, LocalFileSink, S3Sink
+from config import (
+    CAPTURE_DIR,
+    CAPTURE_ENABLED,
+    CAPTURE_FLUSH_INTERVAL_SECONDS,
+    CAPTURE_FLUSH_BATCH_SIZE,
+    CAPTURE_MAX_FILE_BYTES,
+    CAPTURE_MAX_FILES,
+    CAPTURE_MAX_RECORDS,
+    CAPTURE_S3_BUCKET,
+    CAPTURE_S3_PREFIX,
+    CAPTURE_SAMPLE_RATE,
+    CAPTURE_SINK,
+    MODEL_VERSION,
+)
+
+_capture = None
+_previous_sigterm = None
+
+
+class PredictionCapture:
+    """Bounded ring buffer of predictions with a background flush thread.
+
+    Args:
+        sink: Destination for flushed batches.
+        model_version: Version label stored with every record.
+        feature_names: Names of the feature vector positions, used as
+            ``feature.<name>`` column names.
+        sample_rate: Fraction of predictions to keep, in ``[0, 1]``.
+        max_records: Hard cap on buffered records; extra records are dropped.
+        flush_batch_size: Buffer size that triggers an early flush.
+        flush_interval: Seconds between periodic flushes.
+    """
+
+    def __init__(
+        self,
+        sink: CaptureSink,
+        model_version: str,
+        feature_names: list[str],
+        sample_rate: float = 1.0,
+        max_records: int = 10000,
+        flush_batch_size: int = 1000,
+        flush_interval: float = 30.0,
+    ):
+        self._sink = sink
+        self._model_version = model_version
+        self._feature_names = feature_names
+        self._sample_rate = sample_rate
+        self._max_records = max_records
+        self._flush_batch_size = flush_batch_size
+        self._flush_interval = flush_interval
+
+        self._buffer: deque = deque()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+
+        self.captured = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def _admit(self) -> bool:
+        """Applies sampling and the memory cap, updating the drop counters."""
+        if self._sample_rate < 1.0 and random.random() >= self._sample_rate:
+            self.sampled_out += 1
+            return False
+        if len(self._buffer) >= self._max_records:
+            self.dropped += 1
+            return False
+        return True
+
+    def _append(self, entry: tuple) -> None:
+        self._buffer.append(entry)
+        self.captured += 1
+
+        # Threads do not survive fork, so each worker starts its own flusher
+        if self._pid != os.getpid():
+            self._start()
+        if len(self._buffer) >= self._flush_batch_size:
+            self._wakeup.set()
+
+    def record(self, payload: dict, features: list[float], probability: float, latency_ms: float) -> None:
+        """Adds one prediction to the buffer. Safe to call from any thread.
+
+        Args:
+            payload: Raw request fields for this row.
+            features: The 46-feature vector sent to the model.
+            probability: Churn probability returned by the model.
+            latency_ms: Request scoring latency in milliseconds.
+        """
+        if self._admit():
+            self._append((time.time(), payload, features, probability, latency_ms))
+
+    def record_batch(
+        self,
+        columns: dict[str, list],
+        features: list[list[float]],
+        probabilities: list[float],
+        latency_ms: float,
+    ) -> None:
+        """Adds a scored batch, building per-row payloads only for kept rows.
+
+        Args:
+            columns: Column-major raw request fields, one value per row.
+            features: Feature vectors sent to the model, one per row.
+            probabilities: Churn probabilities, one per row.
+            latency_ms: Latency of the whole batch in milliseconds.
+        """
+        now = time.time()
+        for i, (vector, probability) in enumerate(zip(features, probabilities)):
+            if self._admit():
+                self._append((now, {f: values[i] for f, values in columns.items()}, vector, probability, latency_ms))
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="prediction-capture", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _to_columns(self, records: list[tuple]) -> dict[str, list]:
+        """Pivots buffered records into the column-major sink layout."""
+        payload_fields = list(dict.fromkeys(k for _, payload, _, _, _ in records for k in payload))
+        columns = {
+            "timestamp": [r[0] for r in records],
+            "model_version": [self._model_version] * len(records),
+            "churn_probability": [r[3] for r in records],
+            "latency_ms": [r[4] for r in records],
+        }
+        for field in payload_fields:
+            columns[field] = [r[1].get(field) for r in records]
+        for i, name in enumerate(self._feature_names):
+            columns[f"feature.{name}"] = [r[2][i] for r in records]
+        return columns
+
+    def flush(self) -> int:
+        """Drains the buffer into the sink in batches.
+
+        Returns:
+            Number of records written.
+        """
+        written = 0
+        with self._flush_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self._flush_batch_size:
+                    batch.append(self._buffer.popleft())
+                try:
+                    self._sink.write(self._to_columns(batch))
+                    written += len(batch)
+                except Exception:
+                    self.flush_errors += 1
+                    logger.exception("Failed to flush {} captured predictions", len(batch))
+        self.flushed += written
+        return written
+
+    def flush_if_due(self) -> int:
+        """Flushes when a full batch is buffered or the oldest record has
+        waited ``flush_interval`` seconds, the same triggers as the flush thread.
+
+        Returns:
+            Number of records written.
+        """
+        try:
+            oldest = self._buffer[0][0]
+        except IndexError:
+            return 0
+        if len(self._buffer) < self._flush_batch_size and time.time() - oldest < self._flush_interval:
+            return 0
+        return self.flush()
+
+    def close(self) -> None:
+        """Stops the flush thread and writes out any buffered records."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=self._flush_interval)
+        self.flush()
+        self._sink.close()
+
+    def stats(self) -> dict:
+        """Returns capture counters for this worker."""
+        return {
+            "buffered": len(self._buffer),
+            "captured": self.captured,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+        }
+
+
+def _build_sink() -> CaptureSink:
+    """Creates the sink selected by ``CAPTURE_SINK``."""
+    if CAPTURE_SINK == "s3":
+        return S3Sink(CAPTURE_S3_BUCKET, CAPTURE_S3_PREFIX)
+    if CAPTURE_SINK == "local":
+        return LocalFileSink(CAPTURE_DIR, CAPTURE_MAX_FILE_BYTES, CAPTURE_MAX_FILES)
+    raise ValueError(f"Unknown CAPTURE_SINK: {CAPTURE_SINK!r} (expected 'local' or 's3')")
+
+
+def _on_sigterm(signum, frame) -> None:
+    """Flushes captured predictions when Lambda shuts the runtime down, then
+    hands the signal to the handler installed before ours."""
+    if _capture is not None:
+        _capture.close()
+    if callable(_previous_sigterm):
+        _previous_sigterm(signum, frame)
+    else:
+        sys.exit(0)
+
+
+def _register_extension(api: str) -> None:
+    """Registers an internal Lambda extension that subscribes to no events.
+
+    Lambda sends the runtime ``SIGTERM`` before reclaiming an environment only
+    when an extension is registered. Init completes once every extension asks
+    for its next event, which for this one simply blocks forever.
+    """
+    request = urllib.request.Request(
+        f"http://{api}/2020-01-01/extension/register",
+        data=json.dumps({"events": []}).encode(),
+        headers={"Lambda-Extension-Name": "prediction-capture"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        extension_id = response.headers["Lambda-Extension-Identifier"]
+
+    def wait() -> None:
+        request = urllib.request.Request(
+            f"http://{api}/2020-01-01/extension/event/next",
+            headers={"Lambda-Extension-Identifier": extension_id},
+        )
+        try:
+            urllib.request.urlopen(request).read()
+        except OSError:
+            pass
+
+    threading.Thread(target=wait, name="capture-extension", daemon=True).start()
+
+
+def install_shutdown_handler() -> None:
+    """Flushes the capture buffer on ``SIGTERM`` in Lambda.
+
+    Registers an internal extension so that Lambda delivers ``SIGTERM`` at
+    shutdown, then installs the handler. Must be called from the main thread
+    during init (``signal.signal`` fails anywhere else, and extensions can
+    only register during init), so ``main`` calls it at import time. uvicorn
+    installs its own handlers and relies on ``atexit`` instead.
+    """
+    global _previous_sigterm
+    if not CAPTURE_ENABLED or "AWS_LAMBDA_FUNCTION_NAME" not in os.environ:
+        return
+    try:
+        _register_extension(os.environ["AWS_LAMBDA_RUNTIME_API"])
+    except (KeyError, OSError) as e:
+        logger.warning("Could not register a Lambda extension; captures since the last flush "
+                       "are lost when the environment is reclaimed: {}", e)
+    _previous_sigterm = signal.signal(signal.SIGTERM, _on_sigterm)
+
+
+def flush_capture_if_due() -> None:
+    """Flushes the buffer if a batch or the flush interval is due. Lambda
+    freezes the flush thread between invocations, so the handler calls this
+    after each one; most calls only check the buffer."""
+    if _capture is not None:
+        _capture.flush_if_due()
+
+
+def get_capture(feature_names: list[str]) -> PredictionCapture | None:
+    """Returns the process-wide capture buffer, or ``None`` when disabled.
+
+    Args:
+        feature_names: Model feature order, used when the buffer is created.
+    """
+    global _capture
+    if _capture is None and CAPTURE_ENABLED:
+        _capture = PredictionCapture(
+            _build_sink(),
+            MODEL_VERSION,
+            feature_names,
+            sample_rate=CAPTURE_SAMPLE_RATE,
+            max_records=CAPTURE_MAX_RECORDS,
+            flush_batch_size=CAPTURE_FLUSH_BATCH_SIZE,
+            flush_interval=CAPTURE_FLUSH_INTERVAL_SECONDS,
+        )
+        atexit.register(_capture.close)
+        logger.info("Prediction capture enabled: sink={}, sample_rate={}", CAPTURE_SINK, CAPTURE_SAMPLE_RATE)
+    return _capture
@@ -0,0 +1,99 @@
+"""Storage backends for captured predictions.
+
+A sink receives one column-major batch at a time from the capture flush
+thread. Batches are written as gzip-compressed JSON objects of the form
+``{"columns": {name: [values, ...]}}``, one object per line, so files can be
+read back with ``pandas.DataFrame(json.loads(line)["columns"])``.
+"""
+
+import gzip
+import json
+import os
+import time
+
+import boto3
+
+from config import AWS_REGION
+
+
+def _encode_batch(columns: dict[str, list]) -> bytes:
+    """Serializes a column-major batch as one compact JSON line."""
+    return json.dumps({"columns": columns}, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class CaptureSink:
+    """Base class for capture sinks. Subclasses implement ``write``."""
+
+    def write(self, columns: dict[str, list]) -> None:
+        """Persists one column-major batch of captured predictions."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases any open resources. Called once on shutdown."""
+
+
+class LocalFileSink(CaptureSink):
+    """Appends batches to rotating ``.jsonl.gz`` files in a local directory.
+
+    Each batch is written as its own gzip member, so a file stays readable
+    even if the process dies mid-write. A new file is started once the
+    current one exceeds ``max_file_bytes`` or has been removed, and only the
+    newest ``max_files`` files of this process are kept, so ``serve.py``
+    workers sharing the directory never delete each other's files.
+    """
+
+    def __init__(self, directory: str, max_file_bytes: int, max_files: int):
+        self._directory = directory
+        self._max_file_bytes = max_file_bytes
+        self._max_files = max_files
+        self._path = None
+        self._seq = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self) -> None:
+        self._seq += 1
+        name = f"captures-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._seq:04d}.jsonl.gz"
+        self._path = os.path.join(self._directory, name)
+
+        # Names sort by time, then sequence number
+        suffix = f"-{os.getpid()}-"
+        files = sorted(f for f in os.listdir(self._directory) if f.startswith("captures-") and suffix in f)
+        for old in files[:max(0, len(files) - self._max_files + 1)]:
+            try:
+                os.remove(os.path.join(self._directory, old))
+            except FileNotFoundError:
+                pass
+
+    def write(self, columns: dict[str, list]) -> None:
+        try:
+            full = self._path is None or os.path.getsize(self._path) >= self._max_file_bytes
+        except FileNotFoundError:
+            full = True
+        if full:
+            self._rotate()
+        with open(self._path, "ab") as f:
+            f.write(gzip.compress(_encode_batch(columns)))
+
+
+class S3Sink(CaptureSink):
+    """Uploads each batch as its own gzip-compressed object under ``prefix``."""
+
+    def __init__(self, bucket: str, prefix: str):
+        self._bucket = bucket
+        self._prefix = prefix.rstrip("/")
+        self._client = boto3.client("s3", region_name=AWS_REGION)
+        self._seq = 0
+
+    def write(self, columns: dict[str, list]) -> None:
+        self._seq += 1
+        key = (
+            f"{self._prefix}/dt={time.strftime('%Y-%m-%d')}/"
+            f"captures-{time.strftime('%H%M%S')}-{os.getpid()}-{self._seq:06d}.jsonl.gz"
+        )
+        self._client.put_object(
+            Bucket=self._bucket,
+            Key=key,
+            Body=gzip.compress(_encode_batch(columns)),
+            ContentType="application/x-ndjson",
+            ContentEncoding="gzip",
+        )
@@ -0,0 +1,58 @@
+"""Offline converter from the trained XGBoost artifact to the JSON dump used for explanations.
+
+Accepts the SageMaker ``model.tar.gz``, or the ``xgboost-model`` file inside
+it (built-in algorithm or ``scripts/xgb_train.py``), and writes XGBoost's JSON
+model format, which the API parses without xgboost installed. Needs xgboost
+(``notebooks`` dependency group). Run from ``api/src``:
+
+    python -m api_components.explain.build model.tar.gz ../../data/processed/xgboost-model.json
+
+Rebuild whenever a new model is deployed to the endpoint, so explanations
+describe the model that produced the scores.
+"""
+
+import argparse
+import os
+import pickle
+import tarfile
+
+import xgboost as xgb
+
+MODEL_FILE = "xgboost-model"
+
+
+def load_booster(path: str) -> xgb.Booster:
+    """Loads a booster from a model file or a SageMaker ``model.tar.gz``."""
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path) as tar:
+            member = next(m for m in tar.getmembers() if os.path.basename(m.name) == MODEL_FILE)
+            raw = tar.extractfile(member).read()
+    else:
+        with open(path, "rb") as f:
+            raw = f.read()
+    booster = xgb.Booster()
+    try:
+        booster.load_model(bytearray(raw))
+    except xgb.core.XGBoostError:
+        # Older built-in algorithm containers pickle the booster
+        booster = pickle.loads(raw)
+    return booster
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="model.tar.gz or xgboost-model file")
+    parser.add_argument("output", help="JSON model path (EXPLAIN_MODEL_PATH)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    booster = load_booster(args.model)
+    booster.save_model(args.output)
+    print(f"Wrote {booster.num_boosted_rounds()} trees to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-request feature attributions for churn predictions.
+
+Explanations are computed in the API process from a JSON dump of the same
+XGBoost model the SageMaker endpoint serves (see ``api_components.explain.build``).
+numpy is only imported the first time an explanation is requested, so workers
+without the ``explain`` dependency group or the model dump score exactly as
+before and only ``?explain=true`` requests fail.
+"""
+
+import json
+import os
+
+from loguru import logger
+
+from config import EXPLAIN_BLOCK_ROWS, EXPLAIN_MODEL_PATH
+
+_explainer = None
+_unsupported: str | None = None
+
+
+class ExplanationUnavailableError(RuntimeError):
+    """Raised when an explanation is requested but cannot be computed.
+
+    Attributes:
+        status_code: 501 if numpy is not installed or the model cannot be
+            explained, 503 if the tree model dump is missing.
+    """
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def get_explainer(feature_fields: list[dict[str, float]], fields: list[str]):
+    """Returns the process-wide ``TreeExplainer``, loading it on first use.
+
+    Args:
+        feature_fields: Per model feature, the payload fields it is computed
+            from and their share of its contribution.
+        fields: Payload fields, in output order.
+
+    Raises:
+        ExplanationUnavailableError: If numpy or the model dump is missing, or
+            the model is not supported.
+    """
+    global _explainer, _unsupported
+    # Remembered so an unsupported dump is not re-parsed on every request
+    if _unsupported is not None:
+        raise ExplanationUnavailableError(501, _unsupported)
+    if _explainer is None:
+        try:
+            from api_components.explain.treeshap import TreeExplainer
+        except ImportError:
+            raise ExplanationUnavailableError(
+                501, "Explanations are not available: numpy is not installed."
+            )
+        if not os.path.exists(EXPLAIN_MODEL_PATH):
+            logger.warning("Tree model dump not found at {}; build it with api_components.explain.build", EXPLAIN_MODEL_PATH)
+            raise ExplanationUnavailableError(
+                503, "Explanations are not available: tree model has not been deployed."
+            )
+        with open(EXPLAIN_MODEL_PATH) as f:
+            model = json.load(f)
+        try:
+            _explainer = TreeExplainer(model, feature_fields, fields, block_rows=EXPLAIN_BLOCK_ROWS)
+        except ValueError as e:
+            logger.error("Cannot explain the model at {}: {}", EXPLAIN_MODEL_PATH, e)
+            _unsupported = f"Explanations are not available: {e}."
+            raise ExplanationUnavailableError(501, _unsupported)
+        logger.info(
+            "Explainer loaded: {} tree paths of width {}, {:.0f} MB pattern table",
+            _explainer.n_paths,
+            _explainer.width,
+            _explainer.table_bytes / 1e6,
+        )
+    return _explainer
@@ -0,0 +1,211 @@
+"""Batched exact TreeSHAP over a flattened XGBoost tree ensemble.
+
+Every root-to-leaf path of every tree is flattened into fixed-width arrays:
+for each distinct feature on the path, the interval of values that follows the
+path, and the zero fraction (share of training cover that follows it). Paths
+are padded to the same width with always-true elements, which are null players
+and leave the Shapley values unchanged.
+
+A path's contribution to a row depends only on which of its elements the row
+satisfies, so the per-element SHAP values of every satisfied/unsatisfied
+pattern (at most ``2 ** max_depth``) are precomputed once per path when the
+model is loaded. Paths with more than ``MAX_PATH_WIDTH`` distinct features
+are refused, which bounds that table. Explaining a batch is then array work over
+``rows x paths x width``: interval tests, a bit-packed pattern index, one
+gather from the table and one matrix product that sums path elements into
+payload fields. The result matches XGBoost's ``pred_contribs`` (path-dependent
+TreeSHAP, in log-odds units).
+"""
+
+import math
+
+import numpy as np
+
+# Distinct features per path; the pattern table holds 2 ** width entries per path.
+# Covers the max_depth range (3-10) searched by the training notebook.
+MAX_PATH_WIDTH = 10
+
+# Paths per _pattern_table step; bounds its (paths, 2 ** width, width) temporaries
+TABLE_BLOCK_PATHS = 256
+
+
+def _flatten_tree(tree: dict) -> list[tuple[list[tuple[int, float, float, float]], float]]:
+    """Returns ``(elements, leaf value)`` per leaf, with one element per distinct feature.
+
+    An element is ``(feature, lower, upper, zero fraction)``; rows with
+    ``lower <= x < upper`` follow the path at every split on that feature.
+    """
+    left = tree["left_children"]
+    right = tree["right_children"]
+    features = tree["split_indices"]
+    conditions = tree["split_conditions"]
+    cover = tree["sum_hessian"]
+    if any(tree["split_type"]):
+        raise ValueError("Categorical splits are not supported")
+
+    paths = []
+    stack = [(0, {})]
+    while stack:
+        node, elements = stack.pop()
+        if left[node] == -1:
+            paths.append((list(elements.values()), conditions[node]))
+            continue
+        feature, threshold = features[node], conditions[node]
+        for child, lower, upper in (
+            (left[node], -math.inf, threshold),
+            (right[node], threshold, math.inf),
+        ):
+            _, lo, hi, zero = elements.get(feature, (feature, -math.inf, math.inf, 1.0))
+            child_elements = dict(elements)
+            child_elements[feature] = (
+                feature,
+                max(lo, lower),
+                min(hi, upper),
+                zero * cover[child] / cover[node],
+            )
+            stack.append((child, child_elements))
+    return paths
+
+
+def _pattern_table(zero: np.ndarray, leaf: np.ndarray) -> np.ndarray:
+    """SHAP value of each path element for every satisfied/unsatisfied pattern.
+
+    For a path with elements ``j`` (zero fraction ``z_j``, one fraction
+    ``o_j`` in {0, 1}) and leaf value ``v``, element ``i`` gets
+    ``v * (o_i - z_i) * sum_k w(k) * e_k``, where ``e_k`` is the coefficient
+    of ``t ** k`` in ``prod_{j != i} (z_j + o_j * t)`` and ``w(k)`` is the
+    Shapley weight ``k! (m - 1 - k)! / m!``.
+
+    Args:
+        zero: Zero fractions, shape ``(paths, width)``.
+        leaf: Leaf values, shape ``(paths,)``.
+
+    Returns:
+        Array of shape ``(paths, 2 ** width, width)``; pattern bit ``j`` is
+        ``o_j``.
+    """
+    n_paths, width = zero.shape
+    patterns = np.arange(2**width)
+    one = ((patterns[:, None] >> np.arange(width)) & 1).astype(np.float64)  # (patterns, width)
+    weights = np.array([
+        math.factorial(k) * math.factorial(width - 1 - k) / math.factorial(width) for k in range(width)
+    ])
+
+    table = np.empty((n_paths, len(patterns), width))
+    for i in range(width):
+        coef = np.zeros((n_paths, len(patterns), width))
+        coef[:, :, 0] = 1.0
+        for j in range(width):
+            if j == i:
+                continue
+            z = zero[:, j, None, None]
+            o = one[None, :, j, None]
+            shifted = np.concatenate([np.zeros_like(coef[:, :, :1]), coef[:, :, :-1]], axis=2)
+            coef = coef * z + shifted * o
+        table[:, :, i] = (coef @ weights) * (one[None, :, i] - zero[:, i, None])
+    return table * leaf[:, None, None]
+
+
+class TreeExplainer:
+    """Exact per-field SHAP contributions for a binary-logistic XGBoost model.
+
+    Args:
+        model: XGBoost JSON model (``Booster.save_model("model.json")``).
+        feature_fields: Model feature weights per payload field: row ``f`` maps
+            feature ``f`` to ``{field: share}``; derived features split their
+            contribution between the fields they are computed from.
+        fields: Payload fields, in output order.
+        block_rows: Rows explained per vectorized block; bounds the
+            ``rows x paths x width`` temporaries.
+    """
+
+    def __init__(
+        self,
+        model: dict,
+        feature_fields: list[dict[str, float]],
+        fields: list[str],
+        block_rows: int = 64,
+    ):
+        learner = model["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in ("binary:logistic", "reg:logistic"):
+            raise ValueError(f"Unsupported objective for explanations: {objective}")
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        trees = learner["gradient_booster"]["model"]["trees"]
+
+        paths = [path for tree in trees for path in _flatten_tree(tree)]
+        width = max(len(elements) for elements, _ in paths)
+        if width > MAX_PATH_WIDTH:
+            raise ValueError(
+                f"Tree paths use up to {width} distinct features; at most {MAX_PATH_WIDTH} are supported "
+                f"(train with max_depth <= {MAX_PATH_WIDTH})"
+            )
+        n_paths = len(paths)
+        feature = np.zeros((n_paths, width), dtype=np.intp)
+        lower = np.full((n_paths, width), -np.inf, dtype=np.float32)
+        upper = np.full((n_paths, width), np.inf, dtype=np.float32)
+        zero = np.ones((n_paths, width))
+        leaf = np.empty(n_paths)
+        for p, (elements, value) in enumerate(paths):
+            leaf[p] = value
+            for j, (f, lo, hi, z) in enumerate(elements):
+                feature[p, j], lower[p, j], upper[p, j], zero[p, j] = f, lo, hi, z
+
+        # Elements share few distinct (feature, interval) tests: evaluate each once per row
+        tests = {}
+        test_id = np.empty((n_paths, width), dtype=np.intp)
+        for p in range(n_paths):
+            for j in range(width):
+                key = (feature[p, j], lower[p, j], upper[p, j])
+                test_id[p, j] = tests.setdefault(key, len(tests))
+        test_feature, test_lower, test_upper = (np.array(column) for column in zip(*tests))
+
+        self.fields = fields
+        self.block_rows = block_rows
+        self.n_paths = n_paths
+        self.width = width
+        # One bit per path element
+        self._pattern_dtype = np.uint8 if width <= 8 else np.uint16
+        self._test_feature = test_feature.astype(np.intp)
+        self._test_lower = test_lower.astype(np.float32)
+        self._test_upper = test_upper.astype(np.float32)
+        # Position-major, so each path position is one contiguous (paths,) slice
+        self._test_id = np.ascontiguousarray(test_id.T)
+        self._table = np.concatenate([
+            _pattern_table(zero[start:start + TABLE_BLOCK_PATHS], leaf[start:start + TABLE_BLOCK_PATHS]).astype(np.float32)
+            for start in range(0, n_paths, TABLE_BLOCK_PATHS)
+        ]).reshape(n_paths * 2**width, width)
+        self._table_offset = np.arange(n_paths) * 2**width
+        self.table_bytes = self._table.nbytes
+
+        # Element -> field weights: (paths * width, fields)
+        field_index = {field: k for k, field in enumerate(fields)}
+        feature_weights = np.zeros((len(feature_fields), len(fields)), dtype=np.float32)
+        for f, shares in enumerate(feature_fields):
+            for field, share in shares.items():
+                feature_weights[f, field_index[field]] = share
+        self._element_fields = feature_weights[feature.ravel()]
+
+        # Expected margin: logit(base_score) plus each path's value with no feature known
+        self.base_value = float(math.log(base_score / (1 - base_score)) + (leaf * zero.prod(axis=1)).sum())
+
+    def _explain_block(self, X: np.ndarray) -> np.ndarray:
+        values = X[:, self._test_feature]
+        passed = ((values >= self._test_lower) & (values < self._test_upper)).view(np.uint8)
+        pattern = np.zeros((len(X), self.n_paths), dtype=self._pattern_dtype)
+        for j in range(self.width):
+            pattern |= passed[:, self._test_id[j]].astype(self._pattern_dtype) << self._pattern_dtype(j)
+        contributions = np.take(self._table, pattern + self._table_offset, axis=0)  # (rows, paths, width)
+        return contributions.reshape(len(X), -1) @ self._element_fields
+
+    def explain(self, feature_vectors: list[list[float]]) -> np.ndarray:
+        """Returns per-field contributions in log-odds, shape ``(rows, fields)``.
+
+        Each row's contributions plus ``base_value`` equal the model's margin.
+        """
+        # The model compares float32 feature values against float32 thresholds
+        X = np.asarray(feature_vectors, dtype=np.float32)
+        return np.concatenate([
+            self._explain_block(X[start:start + self.block_rows])
+            for start in range(0, len(X), self.block_rows)
+        ])
@@ -0,0 +1,105 @@
+"""Readiness checks, kept separate from the ``/health`` liveness probe.
+
+Liveness only says the process is serving HTTP. Readiness additionally
+requires the SageMaker endpoint to answer a probe row and the server not to
+be draining, so a load balancer stops routing to a worker that cannot score.
+
+The draining flag and the last probe result live in an anonymous shared
+mapping created at import time. ``serve.py`` imports the app before forking,
+so the master and all workers see the same bytes: the master can flip every
+worker to not-ready with one write, and the endpoint is probed once per
+``READINESS_CACHE_SECONDS`` for the whole server rather than once per worker.
+Probes are serialized with a ``lockf`` lock on an inherited temp file, which
+the kernel releases if a worker dies while holding it.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from loguru import logger
+
+from api_components.lookup.index import KEYS_FILE
+from api_components.predict.predict import FEATURE_NAMES, _invoke_endpoint
+from config import FEATURE_INDEX_DIR, READINESS_CACHE_SECONDS
+
+# Byte 0 is the draining flag; the last probe starts at _PROBE_OFFSET:
+# monotonic time (system-wide, so comparable across workers), ok, error length
+_PROBE = struct.Struct("<dBH")
+_PROBE_OFFSET = 8
+_MAX_ERROR_BYTES = 1024
+_shared = mmap.mmap(-1, _PROBE_OFFSET + _PROBE.size + _MAX_ERROR_BYTES)
+
+# lockf locks are held per process, so threads also need their own lock
+_lock = threading.Lock()
+_probe_lock_file = tempfile.TemporaryFile()
+
+
+def mark_draining() -> None:
+    """Marks this server as draining; ``/ready`` returns 503 from now on."""
+    _shared[0] = 1
+
+
+def is_draining() -> bool:
+    return _shared[0] == 1
+
+
+def _probe_endpoint() -> str | None:
+    """Scores one all-zero feature row. Returns an error description, or ``None``."""
+    try:
+        _invoke_endpoint([[0.0] * len(FEATURE_NAMES)])
+        return None
+    except Exception as e:
+        logger.warning("Readiness probe failed: {}", e)
+        return f"{type(e).__name__}: {e}"
+
+
+def _read_probe() -> tuple[float, str | None]:
+    """Returns the time and error of the last shared probe (time 0 if none yet)."""
+    checked_at, ok, length = _PROBE.unpack_from(_shared, _PROBE_OFFSET)
+    if ok:
+        return checked_at, None
+    start = _PROBE_OFFSET + _PROBE.size
+    return checked_at, _shared[start:start + length].decode("utf-8", "replace")
+
+
+def _write_probe(checked_at: float, error: str | None) -> None:
+    data = (error or "").encode("utf-8")[:_MAX_ERROR_BYTES]
+    start = _PROBE_OFFSET + _PROBE.size
+    _shared[start:start + len(data)] = data
+    _PROBE.pack_into(_shared, _PROBE_OFFSET, checked_at, error is None, len(data))
+
+
+def check_readiness() -> dict:
+    """Returns this worker's readiness, probing the endpoint at most once per
+    cache period across all workers of the server.
+
+    Returns:
+        Dict with ``ready`` (bool), ``draining`` (bool) and per-check
+        ``checks``. The feature index is reported but not required, since
+        only the lookup routes depend on it.
+    """
+    if is_draining():
+        return {"ready": False, "draining": True, "checks": {}}
+
+    # Held while probing, so waiting workers reuse the result instead of probing again
+    with _lock:
+        fcntl.lockf(_probe_lock_file, fcntl.LOCK_EX)
+        try:
+            checked_at, endpoint_error = _read_probe()
+            now = time.monotonic()
+            if not checked_at or now - checked_at >= READINESS_CACHE_SECONDS:
+                endpoint_error = _probe_endpoint()
+                _write_probe(now, endpoint_error)
+        finally:
+            fcntl.lockf(_probe_lock_file, fcntl.LOCK_UN)
+
+    checks = {
+        "endpoint": {"ok": endpoint_error is None, "error": endpoint_error},
+        "feature_index": {"ok": os.path.exists(os.path.join(FEATURE_INDEX_DIR, KEYS_FILE))},
+    }
+    return {"ready": endpoint_error is None, "draining": False, "checks": checks}
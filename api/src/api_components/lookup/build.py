@@ -0,0 +1,92 @@
+"""Offline builder for the customer feature index.
+
+Reads customers in the raw dataset layout (``data/raw/teleco-customer-churn.csv``),
+runs them through the same preprocessing as ``/predict`` and writes a
+memory-mapped index. Run from ``api/src``:
+
+    ARTIFACTS_DIR=../../data/processed python -m api_components.lookup.build \\
+        ../../data/raw/teleco-customer-churn.csv ../../data/processed/feature_index
+
+Pass ``--update`` with a CSV of changed or new customers to patch an existing
+index in place instead of rebuilding it.
+"""
+
+import argparse
+import csv
+from collections.abc import Iterator
+
+from api_components.lookup.index import build_index, update_index
+from api_components.predict.predict import FEATURE_NAMES, _preprocess
+
+# PredictionRequest field -> raw dataset column
+RAW_COLUMNS: dict[str, str] = {
+    "gender": "gender",
+    "seniorCitizen": "SeniorCitizen",
+    "partner": "Partner",
+    "dependents": "Dependents",
+    "tenure": "tenure",
+    "monthlyCharges": "MonthlyCharges",
+    "totalCharges": "TotalCharges",
+    "contract": "Contract",
+    "internetService": "InternetService",
+    "paymentMethod": "PaymentMethod",
+    "phoneService": "PhoneService",
+    "multipleLines": "MultipleLines",
+    "onlineSecurity": "OnlineSecurity",
+    "onlineBackup": "OnlineBackup",
+    "deviceProtection": "DeviceProtection",
+    "techSupport": "TechSupport",
+    "streamingTV": "StreamingTV",
+    "streamingMovies": "StreamingMovies",
+    "paperlessBilling": "PaperlessBilling",
+}
+
+
+def raw_row_to_payload(row: dict) -> dict:
+    """Converts a raw dataset row into a ``PredictionRequest``-shaped payload.
+
+    Args:
+        row: CSV row keyed by raw dataset column names.
+
+    Returns:
+        Payload dict accepted by ``_preprocess``.
+    """
+    payload = {field: row[column] for field, column in RAW_COLUMNS.items()}
+    payload["seniorCitizen"] = "Yes" if row["SeniorCitizen"] in ("1", "Yes") else "No"
+    payload["tenure"] = int(payload["tenure"])
+    payload["monthlyCharges"] = float(payload["monthlyCharges"])
+    # Blank TotalCharges (new customers) are imputed with MonthlyCharges, as in training
+    total = payload["totalCharges"].strip()
+    payload["totalCharges"] = float(total) if total else payload["monthlyCharges"]
+    return payload
+
+
+def iter_records(csv_path: str) -> Iterator[tuple[str, list[float]]]:
+    """Yields ``(customerID, feature_vector)`` pairs from a raw dataset CSV."""
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["customerID"], _preprocess(raw_row_to_payload(row))
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path", help="CSV in the raw dataset layout")
+    parser.add_argument("index_dir", help="Feature index output directory")
+    parser.add_argument("--update", action="store_true",
+                        help="Patch changed/new customers into an existing index")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.update:
+        updated, added = update_index(args.index_dir, iter_records(args.csv_path))
+        print(f"Updated {updated} and added {added} customers in {args.index_dir}")
+    else:
+        n_rows = build_index(args.index_dir, iter_records(args.csv_path), len(FEATURE_NAMES))
+        print(f"Indexed {n_rows} customers into {args.index_dir}")
+
+
+if __name__ == "__main__":
+    main()
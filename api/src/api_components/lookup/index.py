@@ -0,0 +1,344 @@
+"""Memory-mapped feature index for scoring customers by ``customerID``.
+
+An index directory holds two files:
+
+- ``features.bin`` — header followed by fixed-width rows of preprocessed
+  float64 features, in the order of ``FEATURE_NAMES``.
+- ``keys.bin`` — header followed by an open-addressing hash table of
+  ``(customerID, row + 1)`` slots. A stored row of 0 marks an empty slot.
+
+Both files are mapped read-only by the API, so workers share the pages through
+the OS page cache and a lookup is one hash probe plus one row read.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Iterable
+
+FEATURES_FILE = "features.bin"
+KEYS_FILE = "keys.bin"
+
+KEY_SIZE = 16
+MAX_LOAD_FACTOR = 0.5
+
+# Re-maps a lookup attempts when its slot points past the mapped rows
+_MAX_REMAPS = 8
+
+_FEATURES_MAGIC = b"CHFEAT01"
+_KEYS_MAGIC = b"CHKEYS01"
+
+# magic, n_features, n_rows, generation
+_FEATURES_HEADER = struct.Struct("<8sIIQ")
+_N_ROWS_OFFSET = 12
+_GENERATION_OFFSET = 16
+# magic, n_slots, n_used
+_KEYS_HEADER = struct.Struct("<8sII")
+_N_USED_OFFSET = 12
+_SLOT = struct.Struct(f"<{KEY_SIZE}sI")
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+def _encode_key(customer_id: str) -> bytes:
+    """Encodes a customer ID as a fixed-width hash table key.
+
+    Raises:
+        ValueError: If the ID is empty or longer than ``KEY_SIZE`` bytes.
+    """
+    key = customer_id.encode("utf-8")
+    if not key or len(key) > KEY_SIZE:
+        raise ValueError(f"customerID must be 1-{KEY_SIZE} bytes, got {customer_id!r}")
+    return key.ljust(KEY_SIZE, b"\0")
+
+
+def _table_size(n_keys: int) -> int:
+    """Returns the power-of-two slot count that keeps the load factor in bounds."""
+    n_slots = 16
+    while n_keys > n_slots * MAX_LOAD_FACTOR:
+        n_slots *= 2
+    return n_slots
+
+
+def _probe(buf, key: bytes, n_slots: int) -> tuple[int, int]:
+    """Finds the slot for ``key`` using linear probing.
+
+    Returns:
+        ``(slot, row)`` where ``row`` is the stored row index, or ``-1`` when
+        ``slot`` is the empty slot where ``key`` would be inserted.
+    """
+    mask = n_slots - 1
+    slot = zlib.crc32(key) & mask
+    while True:
+        stored_key, stored_row = _SLOT.unpack_from(buf, _KEYS_HEADER.size + slot * _SLOT.size)
+        if stored_row == 0:
+            return slot, -1
+        if stored_key == key:
+            return slot, stored_row - 1
+        slot = (slot + 1) & mask
+
+
+def _write_keys(path: str, keys: Iterable[tuple[bytes, int]], n_keys: int) -> None:
+    """Writes a fresh hash table file atomically via a temp file and rename."""
+    n_slots = _table_size(n_keys)
+    table = bytearray(_KEYS_HEADER.size + n_slots * _SLOT.size)
+    _KEYS_HEADER.pack_into(table, 0, _KEYS_MAGIC, n_slots, n_keys)
+    for key, row in keys:
+        slot, _ = _probe(table, key, n_slots)
+        _SLOT.pack_into(table, _KEYS_HEADER.size + slot * _SLOT.size, key, row + 1)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(table)
+    os.replace(tmp_path, path)
+
+
+def _iter_keys(buf) -> Iterable[tuple[bytes, int]]:
+    """Yields every ``(key, row)`` pair stored in a hash table buffer."""
+    _, n_slots, _ = _KEYS_HEADER.unpack_from(buf, 0)
+    for slot in range(n_slots):
+        key, row = _SLOT.unpack_from(buf, _KEYS_HEADER.size + slot * _SLOT.size)
+        if row:
+            yield key, row - 1
+
+
+class _Mapping:
+    """Both files of an index mapped at one generation. Never mutated, so
+    readers holding it stay valid while a newer mapping is swapped in."""
+
+    __slots__ = ("features", "keys", "n_features", "n_rows", "generation", "n_slots", "row")
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, FEATURES_FILE), "rb") as f:
+            self.features = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(os.path.join(directory, KEYS_FILE), "rb") as f:
+            self.keys = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.n_features, n_rows, self.generation = _FEATURES_HEADER.unpack_from(self.features, 0)
+        if magic != _FEATURES_MAGIC:
+            raise ValueError(f"Not a feature index: {directory}")
+        magic, self.n_slots, _ = _KEYS_HEADER.unpack_from(self.keys, 0)
+        if magic != _KEYS_MAGIC:
+            raise ValueError(f"Not a feature index: {directory}")
+
+        self.row = struct.Struct(f"<{self.n_features}d")
+        # An update may publish rows appended after the file was mapped
+        self.n_rows = min(n_rows, (len(self.features) - _FEATURES_HEADER.size) // self.row.size)
+
+
+class FeatureIndex:
+    """Read-only, memory-mapped view of a feature index directory.
+
+    The view re-maps itself when ``update_index`` bumps the generation counter
+    in the ``features.bin`` header, so long-lived workers see incremental
+    updates without a restart. A new mapping is swapped in with one reference
+    assignment; threads still reading the old one keep it alive, and it is
+    unmapped once the last of them drops it. A full ``build_index`` replaces
+    the files and requires reopening the index.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._mapping = _Mapping(directory)
+        self._remap_lock = threading.Lock()
+
+    @property
+    def n_features(self) -> int:
+        return self._mapping.n_features
+
+    def close(self) -> None:
+        self._mapping.features.close()
+        self._mapping.keys.close()
+
+    def _remap(self, stale: _Mapping) -> _Mapping:
+        """Replaces ``stale`` with a fresh mapping, once across threads."""
+        with self._remap_lock:
+            if self._mapping is stale:
+                self._mapping = _Mapping(self._directory)
+            return self._mapping
+
+    def _current(self) -> _Mapping:
+        """Returns the mapping, re-mapped if an incremental update has been applied."""
+        mapping = self._mapping
+        generation, = _U64.unpack_from(mapping.features, _GENERATION_OFFSET)
+        if generation != mapping.generation:
+            mapping = self._remap(mapping)
+        return mapping
+
+    def __len__(self) -> int:
+        # Updates leave superseded rows behind, so count keys rather than rows
+        return _U32.unpack_from(self._current().keys, _N_USED_OFFSET)[0]
+
+    def __contains__(self, customer_id: str) -> bool:
+        return self.get(customer_id) is not None
+
+    def get(self, customer_id: str) -> list[float] | None:
+        """Returns the preprocessed feature vector for a customer.
+
+        Args:
+            customer_id: Customer identifier from the raw dataset.
+
+        Returns:
+            Ordered feature vector, or ``None`` if the customer is not indexed.
+        """
+        try:
+            key = _encode_key(customer_id)
+        except ValueError:
+            return None
+        mapping = self._current()
+        _, row = _probe(mapping.keys, key, mapping.n_slots)
+        remaps = 0
+        while row >= mapping.n_rows:
+            if remaps == _MAX_REMAPS:
+                # Updates are landing faster than this reader can re-map
+                return None
+            # Slot flipped by an update after this mapping was made; rows are
+            # written before any slot points at them, so re-mapping finds it
+            mapping = self._remap(mapping)
+            _, row = _probe(mapping.keys, key, mapping.n_slots)
+            remaps += 1
+        if row < 0:
+            return None
+        return list(mapping.row.unpack_from(mapping.features, _FEATURES_HEADER.size + row * mapping.row.size))
+
+    def get_many(self, customer_ids: Iterable[str]) -> dict[str, list[float] | None]:
+        """Looks up several customers at once.
+
+        Returns:
+            Dict mapping each requested ID to its feature vector, or ``None``.
+        """
+        return {customer_id: self.get(customer_id) for customer_id in customer_ids}
+
+
+def build_index(directory: str, records: Iterable[tuple[str, list[float]]], n_features: int) -> int:
+    """Builds a new feature index, replacing any existing one in ``directory``.
+
+    Args:
+        directory: Output directory for ``features.bin`` and ``keys.bin``.
+        records: ``(customerID, feature_vector)`` pairs. Later duplicates win.
+        n_features: Length of every feature vector.
+
+    Returns:
+        Number of indexed customers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    row_struct = struct.Struct(f"<{n_features}d")
+    rows: dict[bytes, int] = {}
+
+    features_path = os.path.join(directory, FEATURES_FILE)
+    tmp_path = f"{features_path}.tmp"
+    with open(tmp_path, "w+b") as f:
+        f.write(_FEATURES_HEADER.pack(_FEATURES_MAGIC, n_features, 0, 0))
+        n_rows = 0
+        for customer_id, vector in records:
+            key = _encode_key(customer_id)
+            packed = row_struct.pack(*vector)
+            if key in rows:
+                f.seek(_FEATURES_HEADER.size + rows[key] * row_struct.size)
+                f.write(packed)
+                f.seek(0, os.SEEK_END)
+                continue
+            f.write(packed)
+            rows[key] = n_rows
+            n_rows += 1
+        f.seek(_N_ROWS_OFFSET)
+        f.write(_U32.pack(n_rows))
+
+    _write_keys(os.path.join(directory, KEYS_FILE), rows.items(), len(rows))
+    os.replace(tmp_path, features_path)
+    return n_rows
+
+
+def _publish(features_file, n_rows: int, generation: int) -> None:
+    """Publishes the row count, then the generation readers watch."""
+    features_file.flush()
+    features_file.seek(_N_ROWS_OFFSET)
+    features_file.write(_U32.pack(n_rows))
+    features_file.seek(_GENERATION_OFFSET)
+    features_file.write(_U64.pack(generation))
+    features_file.flush()
+
+
+def update_index(directory: str, records: Iterable[tuple[str, list[float]]]) -> tuple[int, int]:
+    """Applies changed or new customers to an existing index.
+
+    Rows are never overwritten: every changed or new customer gets a row
+    appended to ``features.bin``, which is published before any hash slot
+    points at it. Existing slots are then flipped to the new rows and new keys
+    inserted, or the hash table is rebuilt and renamed into place when it would
+    exceed ``MAX_LOAD_FACTOR``. A reader therefore sees either the old or the
+    new vector, never a mix. The superseded rows stay in the file until the
+    next ``build_index``. Only one writer may update an index at a time.
+
+    Args:
+        directory: Directory of an index created by ``build_index``.
+        records: ``(customerID, feature_vector)`` pairs for changed customers.
+
+    Returns:
+        ``(updated, added)`` customer counts.
+    """
+    features_path = os.path.join(directory, FEATURES_FILE)
+    keys_path = os.path.join(directory, KEYS_FILE)
+
+    with open(features_path, "r+b") as features_file, open(keys_path, "r+b") as keys_file:
+        magic, n_features, n_rows, generation = _FEATURES_HEADER.unpack(
+            features_file.read(_FEATURES_HEADER.size)
+        )
+        if magic != _FEATURES_MAGIC:
+            raise ValueError(f"Not a feature index: {directory}")
+        row_struct = struct.Struct(f"<{n_features}d")
+
+        # New row of each changed customer; later duplicates win
+        appended: dict[bytes, int] = {}
+        features_file.seek(_FEATURES_HEADER.size + n_rows * row_struct.size)
+        for customer_id, vector in records:
+            key = _encode_key(customer_id)
+            packed = row_struct.pack(*vector)
+            row = appended.get(key)
+            if row is None:
+                appended[key] = n_rows
+                n_rows += 1
+                features_file.write(packed)
+            else:
+                # Not referenced by any slot yet, so overwriting is safe
+                features_file.seek(_FEATURES_HEADER.size + row * row_struct.size)
+                features_file.write(packed)
+                features_file.seek(0, os.SEEK_END)
+        if not appended:
+            return 0, 0
+
+        # Readers re-map and can reach the new rows before any slot points at them
+        generation += 1
+        _publish(features_file, n_rows, generation)
+
+        keys = mmap.mmap(keys_file.fileno(), 0)
+        _, n_slots, n_used = _KEYS_HEADER.unpack_from(keys, 0)
+        new_keys = {key for key in appended if _probe(keys, key, n_slots)[1] < 0}
+        added = len(new_keys)
+        updated = len(appended) - added
+
+        if n_used + added > n_slots * MAX_LOAD_FACTOR:
+            all_keys = dict(_iter_keys(keys))
+            keys.close()
+            all_keys.update(appended)
+            _write_keys(keys_path, all_keys.items(), len(all_keys))
+            # The table was replaced; readers must re-map it
+            generation += 1
+            _publish(features_file, n_rows, generation)
+            return updated, added
+
+        for key, row in appended.items():
+            slot, _ = _probe(keys, key, n_slots)
+            offset = _KEYS_HEADER.size + slot * _SLOT.size
+            if key in new_keys:
+                # A probe sees the slot as used once its row is set, so write the key first
+                keys[offset:offset + KEY_SIZE] = key
+            _U32.pack_into(keys, offset + KEY_SIZE, row + 1)
+        _U32.pack_into(keys, _N_USED_OFFSET, n_used + added)
+        keys.flush()
+        keys.close()
+
+    return updated, added
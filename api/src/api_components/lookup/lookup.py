@@ -0,0 +1,100 @@
+import time
+from collections.abc import Iterator
+
+from loguru import logger
+
+from api_components.capture.capture import get_capture
+from api_components.lookup.index import FeatureIndex
+from api_components.predict.predict import FEATURE_NAMES, predict_features
+from config import FEATURE_INDEX_DIR, SAGEMAKER_MAX_BATCH_ROWS
+
+_index = None
+
+
+def _get_feature_index() -> FeatureIndex:
+    """Returns the memory-mapped feature index, opened once per worker.
+
+    Raises:
+        FileNotFoundError: If no index has been built into ``FEATURE_INDEX_DIR``.
+    """
+    global _index
+    if _index is None:
+        _index = FeatureIndex(FEATURE_INDEX_DIR)
+        logger.info("Feature index loaded: {} customers", len(_index))
+    return _index
+
+
+def _resolve(customer_ids: list[str]) -> tuple[list[str], list[list[float]], list[str]]:
+    """Looks customer IDs up in the index.
+
+    Returns:
+        Found IDs (deduplicated, in request order), their feature vectors and
+        the IDs missing from the index.
+    """
+    vectors = _get_feature_index().get_many(customer_ids)
+    found = [cid for cid, vec in vectors.items() if vec is not None]
+    not_found = [cid for cid, vec in vectors.items() if vec is None]
+    logger.info("Lookup request: {} found, {} not found", len(found), len(not_found))
+    return found, [vectors[cid] for cid in found], not_found
+
+
+def _score(found: list[str], found_vectors: list[list[float]], explain: bool, start: float) -> list[dict]:
+    """Scores and captures resolved customers; returns their result dicts."""
+    results = predict_features(found_vectors, explain)
+
+    capture = get_capture(FEATURE_NAMES)
+    if capture is not None:
+        capture.record_batch(
+            {"customerID": found},
+            found_vectors,
+            [r["churn_probability"] for r in results],
+            (time.perf_counter() - start) * 1000,
+        )
+
+    return [{"customerID": cid, **result} for cid, result in zip(found, results)]
+
+
+def predict_customers(customer_ids: list[str], explain: bool = False) -> tuple[list[dict], list[str]]:
+    """Scores indexed customers by ID with a single batched inference pass.
+
+    Args:
+        customer_ids: Customer identifiers to score. Duplicates are scored once.
+        explain: Also return per-field ``contributions`` and ``base_value``.
+
+    Returns:
+        Tuple of result dicts (``customerID``, ``churn_probability``,
+        ``will_churn``) in request order, and the IDs missing from the index.
+    """
+    start = time.perf_counter()
+    found, found_vectors, not_found = _resolve(customer_ids)
+    return _score(found, found_vectors, explain, start), not_found
+
+
+def stream_customers(customer_ids: list[str], explain: bool = False) -> Iterator[dict]:
+    """Resolves customer IDs, then scores them one SageMaker batch at a time.
+
+    The index lookup runs before this function returns, so a missing index
+    fails before anything is streamed.
+
+    Args:
+        customer_ids: Customer identifiers to score. Duplicates are scored once.
+        explain: Also return per-field ``contributions`` and ``base_value``.
+
+    Returns:
+        Iterator of ``{"predictions": [...], "not_found": [...]}`` dicts, one
+        per batch of up to ``SAGEMAKER_MAX_BATCH_ROWS`` customers in request
+        order. ``not_found`` is only filled in the first one; an empty
+        ``predictions`` list is yielded if no customer was found.
+    """
+    found, found_vectors, not_found = _resolve(customer_ids)
+
+    def chunks() -> Iterator[dict]:
+        missing = not_found
+        for offset in range(0, max(len(found), 1), SAGEMAKER_MAX_BATCH_ROWS):
+            start = time.perf_counter()
+            end = offset + SAGEMAKER_MAX_BATCH_ROWS
+            yield {"predictions": _score(found[offset:end], found_vectors[offset:end], explain, start),
+                   "not_found": missing}
+            missing = []
+
+    return chunks()
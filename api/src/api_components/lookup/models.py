@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+
+class CustomerLookupRequest(BaseModel):
+    customerIDs: list[str] = Field(..., min_length=1, max_length=10000)
+
+
+class CustomerPrediction(BaseModel):
+    customerID: str
+    churn_probability: float
+    will_churn: bool
+    contributions: dict[str, float] | None = None
+    base_value: float | None = None
+
+
+class CustomerLookupResponse(BaseModel):
+    predictions: list[CustomerPrediction]
+    not_found: list[str]
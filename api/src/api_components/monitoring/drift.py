@@ -0,0 +1,446 @@
+"""Constant-memory online feature-drift monitoring.
+
+Every scored feature vector updates fixed-size statistics for the current
+time window: Welford mean/variance and fixed-bin histograms for the scaled
+numeric features, and category counters for each one-hot group. Bins and
+expected proportions come from the training reference built by
+``api_components.monitoring.reference``. Only the last ``n_windows`` windows
+are kept, so memory does not grow with traffic.
+
+Window ids are wall-clock aligned (``time // window_seconds``), so snapshots
+from different workers describe the same windows and can be merged exactly
+with ``merge_snapshots``. Each worker periodically writes its snapshot to its
+own file in a directory shared by the workers on the host, replacing it
+atomically, so any worker can score the whole host.
+"""
+
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+from loguru import logger
+
+from config import (
+    DRIFT_DIR,
+    DRIFT_ENABLED,
+    DRIFT_FLUSH_INTERVAL_SECONDS,
+    DRIFT_NUM_WINDOWS,
+    DRIFT_PSI_ALERT,
+    DRIFT_REFERENCE_PATH,
+    DRIFT_WINDOW_SECONDS,
+)
+
+# Smoothing for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+_monitor = None
+_monitor_loaded = False
+
+
+class DriftWindow:
+    """Feature statistics for one time window. Size depends only on the reference."""
+
+    __slots__ = ("n", "mean", "m2", "bins", "categories")
+
+    def __init__(self, n_bins: list[int], n_categories: list[int]):
+        self.n = 0
+        self.mean = [0.0] * len(n_bins)
+        self.m2 = [0.0] * len(n_bins)
+        self.bins = [[0] * b for b in n_bins]
+        # One extra counter per group for vectors with no category set
+        self.categories = [[0] * (c + 1) for c in n_categories]
+
+    def merge(self, other: "DriftWindow") -> None:
+        """Adds another window's statistics into this one (Chan et al. parallel update)."""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        for k in range(len(self.mean)):
+            delta = other.mean[k] - self.mean[k]
+            self.mean[k] += delta * other.n / n
+            self.m2[k] += other.m2[k] + delta * delta * self.n * other.n / n
+        for mine, theirs in zip(self.bins + self.categories, other.bins + other.categories):
+            for i, c in enumerate(theirs):
+                mine[i] += c
+        self.n = n
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "mean": list(self.mean),
+            "m2": list(self.m2),
+            "bins": [list(b) for b in self.bins],
+            "categories": [list(c) for c in self.categories],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DriftWindow":
+        window = cls([], [])
+        window.n = data["n"]
+        window.mean = list(data["mean"])
+        window.m2 = list(data["m2"])
+        window.bins = [list(b) for b in data["bins"]]
+        window.categories = [list(c) for c in data["categories"]]
+        return window
+
+
+def _psi(actual: list[int], expected: list[float]) -> float:
+    """Population stability index between observed counts and expected proportions."""
+    total = sum(actual)
+    psi = 0.0
+    for count, e in zip(actual, expected):
+        a = max(count / total, _EPSILON)
+        e = max(e, _EPSILON)
+        psi += (a - e) * math.log(a / e)
+    return psi
+
+
+def _ks(actual: list[int], expected: list[float]) -> float:
+    """Kolmogorov-Smirnov statistic evaluated at the bin edges."""
+    total = sum(actual)
+    cdf_a = cdf_e = ks = 0.0
+    for count, e in zip(actual, expected):
+        cdf_a += count / total
+        cdf_e += e
+        ks = max(ks, abs(cdf_a - cdf_e))
+    return ks
+
+
+class DriftMonitor:
+    """Sliding-window drift statistics for the model's feature vectors.
+
+    Args:
+        reference: Training reference produced by ``build_reference``.
+        feature_names: Model feature order of the vectors passed to ``update_many``.
+        window_seconds: Length of one window.
+        n_windows: Number of windows kept and scored together.
+        directory: Directory shared by the workers on the host, or ``None``
+            to keep the windows in this worker only.
+        flush_interval: Seconds between writes of this worker's file.
+    """
+
+    def __init__(
+        self,
+        reference: dict,
+        feature_names: list[str],
+        window_seconds: int,
+        n_windows: int,
+        directory: str | None = None,
+        flush_interval: float = 10.0,
+    ):
+        self.reference = reference
+        self.window_seconds = window_seconds
+        self.n_windows = n_windows
+        self.directory = directory
+        self._flush_interval = flush_interval
+
+        self._numeric_names = list(reference["numeric"])
+        self._numeric = [
+            (feature_names.index(name), reference["numeric"][name]["edges"]) for name in self._numeric_names
+        ]
+        self._group_names = list(reference["categorical"])
+        self._groups = []
+        for name in self._group_names:
+            columns = reference["categorical"][name]["columns"]
+            start = feature_names.index(columns[0])
+            if feature_names[start:start + len(columns)] != columns:
+                raise ValueError(f"One-hot group {name} is not contiguous in the feature vector")
+            self._groups.append((start, start + len(columns)))
+
+        # Bin edges and one-hot columns of every statistic; snapshots carry it
+        # so windows built from different references are never merged
+        self._layout = {
+            "numeric": {name: list(edges) for name, (_, edges) in zip(self._numeric_names, self._numeric)},
+            "categorical": {name: list(reference["categorical"][name]["columns"]) for name in self._group_names},
+        }
+        self._n_bins = [len(edges) + 1 for _, edges in self._numeric]
+        self._n_categories = [end - start for start, end in self._groups]
+        self._windows: dict[int, DriftWindow] = {}
+        self._lock = threading.Lock()
+
+        self._path = None
+        self._dirty = False
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+
+        self.flush_errors = 0
+
+    def _window(self, window_id: int) -> DriftWindow:
+        window = self._windows.get(window_id)
+        if window is None:
+            window = self._windows[window_id] = DriftWindow(self._n_bins, self._n_categories)
+            for old in [w for w in self._windows if w <= window_id - self.n_windows]:
+                del self._windows[old]
+        return window
+
+    def update_many(self, vectors: list[list[float]]) -> None:
+        """Adds scored feature vectors to the current window."""
+        window_id = int(time.time() // self.window_seconds)
+        bisect_right = bisect.bisect_right
+        with self._lock:
+            window = self._window(window_id)
+            mean, m2 = window.mean, window.m2
+            numeric = list(zip(range(len(mean)), self._numeric, window.bins))
+            groups = list(zip(self._groups, window.categories))
+            for vector in vectors:
+                window.n += 1
+                n = window.n
+                for k, (pos, edges), counts in numeric:
+                    x = vector[pos]
+                    delta = x - mean[k]
+                    mean[k] += delta / n
+                    m2[k] += delta * (x - mean[k])
+                    counts[bisect_right(edges, x)] += 1
+                for (start, end), counts in groups:
+                    try:
+                        counts[vector.index(1, start, end) - start] += 1
+                    except ValueError:
+                        counts[-1] += 1
+            self._dirty = True
+
+            # Threads do not survive fork, so each worker starts its own
+            # flusher; checked under the lock so concurrent requests start one
+            if self.directory is not None and self._pid != os.getpid():
+                self._start()
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        # The start time keeps a reused pid from replacing a dead worker's file
+        self._path = os.path.join(self.directory, f"drift-{self._pid}-{time.time_ns()}.json")
+        self._thread = threading.Thread(target=self._run, name="drift-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes this worker's windows to its file if they changed since the last write."""
+        with self._lock:
+            if not self._dirty or self._path is None:
+                return
+            self._dirty = False
+        snapshot = self.snapshot()
+        try:
+            tmp = f"{self._path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp, self._path)
+        except OSError:
+            self.flush_errors += 1
+            logger.exception("Failed to write drift windows to {}", self._path)
+            with self._lock:
+                self._dirty = True
+
+    def close(self) -> None:
+        """Stops the flush thread and writes out this worker's windows."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=self._flush_interval)
+        self.flush()
+
+    def snapshot(self) -> dict:
+        """Returns this worker's windows in a JSON-serializable, mergeable form."""
+        with self._lock:
+            return {
+                "window_seconds": self.window_seconds,
+                "layout": self._layout,
+                "windows": {str(w): window.to_dict() for w, window in self._windows.items()},
+            }
+
+    def host_snapshot(self) -> dict:
+        """Merges this worker's windows with the files of the other workers on the host.
+
+        Other workers' updates appear once they flush, at most
+        ``flush_interval`` seconds later. Files whose windows have all left
+        the sliding window, e.g. of stopped workers, are removed.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory is None:
+            return snapshots[0]
+        first = int(time.time() // self.window_seconds) - self.n_windows + 1
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not (name.startswith("drift-") and name.endswith(".json")) or path == self._path:
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable drift windows in {}: {}", path, e)
+                continue
+            if snapshot["window_seconds"] != self.window_seconds or snapshot["layout"] != self._layout:
+                logger.warning("Skipping drift windows in {} written with other settings", path)
+                continue
+            windows = {w: data for w, data in snapshot["windows"].items() if int(w) >= first}
+            if not windows:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            snapshots.append({**snapshot, "windows": windows})
+        return merge_snapshots(snapshots)
+
+    def scores(self, snapshot: dict | None = None) -> dict:
+        """Scores the sliding window against the training reference.
+
+        Args:
+            snapshot: Snapshot to score, e.g. from ``merge_snapshots``.
+                Defaults to the windows of every worker on the host.
+
+        Returns:
+            Dict with the window span, per-feature ``psi``/``ks``/mean shift
+            for numeric features, per-group ``psi`` for one-hot groups, and
+            the names whose PSI is at or above ``DRIFT_PSI_ALERT``.
+
+        Raises:
+            ValueError: If the snapshot was built from a different reference.
+        """
+        snapshot = snapshot or self.host_snapshot()
+        if snapshot["layout"] != self._layout:
+            raise ValueError("Drift snapshot features or bin edges do not match the drift reference")
+        current = int(time.time() // self.window_seconds)
+        first = current - self.n_windows + 1
+
+        merged = DriftWindow(self._n_bins, self._n_categories)
+        for window_id, data in snapshot["windows"].items():
+            if int(window_id) >= first:
+                merged.merge(DriftWindow.from_dict(data))
+
+        result = {
+            "window": {
+                "start": first * self.window_seconds,
+                "end": (current + 1) * self.window_seconds,
+                "rows": merged.n,
+            },
+            "numeric": {},
+            "categorical": {},
+            "drifted": [],
+        }
+        if merged.n == 0:
+            return result
+
+        for k, name in enumerate(self._numeric_names):
+            ref = self.reference["numeric"][name]
+            std = math.sqrt(merged.m2[k] / (merged.n - 1)) if merged.n > 1 else 0.0
+            psi = _psi(merged.bins[k], ref["proportions"])
+            result["numeric"][name] = {
+                "mean": merged.mean[k],
+                "std": std,
+                "mean_shift": (merged.mean[k] - ref["mean"]) / ref["std"],
+                "std_ratio": std / ref["std"],
+                "psi": psi,
+                "ks": _ks(merged.bins[k], ref["proportions"]),
+            }
+            if psi >= DRIFT_PSI_ALERT:
+                result["drifted"].append(name)
+
+        for g, name in enumerate(self._group_names):
+            ref = self.reference["categorical"][name]
+            counts = merged.categories[g]
+            psi = _psi(counts[:-1], ref["proportions"])
+            result["categorical"][name] = {
+                "psi": psi,
+                "proportions": dict(zip(ref["columns"], (c / merged.n for c in counts[:-1]))),
+                "unknown": counts[-1],
+            }
+            if psi >= DRIFT_PSI_ALERT:
+                result["drifted"].append(name)
+
+        return result
+
+
+def _check_window(data: dict, layout: dict) -> None:
+    """Raises ``ValueError`` unless a window's counters match the snapshot layout."""
+    n_bins = [len(edges) + 1 for edges in layout["numeric"].values()]
+    n_categories = [len(columns) + 1 for columns in layout["categorical"].values()]
+    if (
+        len(data["mean"]) != len(n_bins)
+        or len(data["m2"]) != len(n_bins)
+        or [len(b) for b in data["bins"]] != n_bins
+        or [len(c) for c in data["categories"]] != n_categories
+    ):
+        raise ValueError("Drift window counters do not match the snapshot's features and bin edges")
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    """Merges snapshots from several workers window by window.
+
+    Raises:
+        ValueError: If the snapshots use different window lengths, features
+            or bin edges.
+    """
+    if len({s["window_seconds"] for s in snapshots}) > 1:
+        raise ValueError("Cannot merge drift snapshots with different window_seconds")
+    if any(s["layout"] != snapshots[0]["layout"] for s in snapshots):
+        raise ValueError("Cannot merge drift snapshots with different features or bin edges")
+
+    merged: dict[str, DriftWindow] = {}
+    for snapshot in snapshots:
+        for window_id, data in snapshot["windows"].items():
+            _check_window(data, snapshot["layout"])
+            window = DriftWindow.from_dict(data)
+            if window_id in merged:
+                merged[window_id].merge(window)
+            else:
+                merged[window_id] = window
+    return {
+        "window_seconds": snapshots[0]["window_seconds"] if snapshots else DRIFT_WINDOW_SECONDS,
+        "layout": snapshots[0]["layout"] if snapshots else {"numeric": {}, "categorical": {}},
+        "windows": {w: window.to_dict() for w, window in merged.items()},
+    }
+
+
+def get_drift_monitor(feature_names: list[str]) -> DriftMonitor | None:
+    """Returns the process-wide drift monitor, or ``None`` when unavailable.
+
+    The monitor is disabled with a warning if ``DRIFT_REFERENCE_PATH`` does not
+    exist, so a missing reference never breaks scoring. If ``DRIFT_DIR``
+    cannot be created, each worker only sees its own windows.
+
+    Args:
+        feature_names: Model feature order, used when the monitor is created.
+    """
+    global _monitor, _monitor_loaded
+    if not _monitor_loaded and DRIFT_ENABLED:
+        _monitor_loaded = True
+        if not os.path.exists(DRIFT_REFERENCE_PATH):
+            logger.warning("Drift reference not found at {}; drift monitoring disabled", DRIFT_REFERENCE_PATH)
+            return None
+        with open(DRIFT_REFERENCE_PATH) as f:
+            reference = json.load(f)
+        directory = DRIFT_DIR
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            logger.warning("Cannot create drift directory ({}); drift windows are not shared between workers", e)
+            directory = None
+        _monitor = DriftMonitor(
+            reference,
+            feature_names,
+            DRIFT_WINDOW_SECONDS,
+            DRIFT_NUM_WINDOWS,
+            directory=directory,
+            flush_interval=DRIFT_FLUSH_INTERVAL_SECONDS,
+        )
+        atexit.register(_monitor.close)
+        logger.info("Drift monitoring enabled: {} x {}s windows", DRIFT_NUM_WINDOWS, DRIFT_WINDOW_SECONDS)
+    return _monitor
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class DriftSnapshotsRequest(BaseModel):
+    snapshots: list[dict] = Field(..., min_length=1)
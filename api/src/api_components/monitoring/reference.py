@@ -0,0 +1,116 @@
+"""Offline builder for the drift monitor's training reference.
+
+Summarizes the (pre-SMOTE) training split in model feature space: decile bin
+edges and bin proportions for each scaled numeric feature, and category
+frequencies for each one-hot group. Run from ``api/src``:
+
+    ARTIFACTS_DIR=../../data/processed python -m api_components.monitoring.reference \\
+        ../../data/processed/train_original.csv ../../data/processed/drift_reference.json
+"""
+
+import argparse
+import bisect
+import csv
+import json
+
+from api_components.predict.predict import (
+    FEATURE_NAMES,
+    ONE_HOT_FEATURES,
+    SCALED_FEATURES,
+    SCALER_MEANS,
+    SCALER_STDS,
+    TENURE_GROUPS,
+)
+
+N_QUANTILE_BINS = 10
+
+
+def one_hot_groups() -> dict[str, list[str]]:
+    """Returns each one-hot group prefix with its model column names."""
+    groups = {
+        prefix: [f"{prefix}_{cat}" for cat in categories]
+        for _, prefix, categories in ONE_HOT_FEATURES
+    }
+    groups["TenureGroup"] = [f"TenureGroup_{g}" for g in TENURE_GROUPS]
+    return groups
+
+
+def _quantile_edges(values: list[float], n_bins: int) -> list[float]:
+    """Returns interior bin edges at the quantiles of ``values``.
+
+    Each edge sits halfway between a quantile and the next distinct value
+    above it, so discrete features never have data points on a boundary.
+    """
+    ordered = sorted(values)
+    distinct = sorted(set(ordered))
+    edges = []
+    for q in range(1, n_bins):
+        v = ordered[min(len(ordered) - 1, q * len(ordered) // n_bins)]
+        i = bisect.bisect_right(distinct, v)
+        if i < len(distinct):
+            edge = (v + distinct[i]) / 2
+            if not edges or edge > edges[-1]:
+                edges.append(edge)
+    return edges
+
+
+def build_reference(train_csv: str) -> dict:
+    """Computes the drift reference from a training CSV in model feature layout.
+
+    Args:
+        train_csv: CSV with ``FEATURE_NAMES`` columns (plus ``Churn``), scaled.
+
+    Returns:
+        JSON-serializable reference with ``numeric`` and ``categorical`` sections.
+    """
+    with open(train_csv, newline="") as f:
+        rows = [{k: float(v) for k, v in row.items() if k in FEATURE_NAMES} for row in csv.DictReader(f)]
+    n = len(rows)
+
+    numeric = {}
+    for name, raw_mean, raw_std in zip(SCALED_FEATURES, SCALER_MEANS, SCALER_STDS):
+        values = [r[name] for r in rows]
+        mean = sum(values) / n
+        std = (sum((v - mean) ** 2 for v in values) / (n - 1)) ** 0.5
+        edges = _quantile_edges(values, N_QUANTILE_BINS)
+        counts = [0] * (len(edges) + 1)
+        for v in values:
+            counts[bisect.bisect_right(edges, v)] += 1
+        numeric[name] = {
+            "mean": mean,
+            "std": std,
+            "raw_mean": raw_mean,
+            "raw_std": raw_std,
+            "edges": edges,
+            "proportions": [c / n for c in counts],
+        }
+
+    categorical = {
+        prefix: {
+            "columns": columns,
+            "proportions": [sum(r[c] for r in rows) / n for c in columns],
+        }
+        for prefix, columns in one_hot_groups().items()
+    }
+
+    return {"n_rows": n, "numeric": numeric, "categorical": categorical}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("train_csv", help="Training split in model feature layout")
+    parser.add_argument("output", help="Path of the reference JSON to write")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    reference = build_reference(args.train_csv)
+    with open(args.output, "w") as f:
+        json.dump(reference, f, indent=2)
+    print(f"Drift reference from {reference['n_rows']} rows written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Vectorized validation of column-major bulk prediction payloads.
+
+Checks run over whole columns with C-level builtins (``set``, ``min``,
+``max``) and only fall back to a per-row scan to locate offending rows once a
+column is known to be invalid. Numeric bounds are read from the
+``PredictionRequest`` field constraints so both paths enforce the same limits.
+"""
+
+import math
+import time
+from collections.abc import Iterator
+
+from annotated_types import Ge, Le
+
+from loguru import logger
+
+from api_components.capture.capture import get_capture
+from api_components.predict.models import PredictionRequest
+from api_components.predict.predict import (
+    BINARY_FEATURES,
+    FEATURE_NAMES,
+    ONE_HOT_FEATURES,
+    _clean,
+    _preprocess_columns,
+    predict_features,
+)
+from config import BATCH_MAX_ROWS, SAGEMAKER_MAX_BATCH_ROWS, STREAM_MAX_ROWS
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _numeric_fields() -> dict[str, tuple[tuple[type, ...], float, float]]:
+    """Reads type and ``ge``/``le`` bounds of the numeric ``PredictionRequest`` fields."""
+    fields = {}
+    for name, field in PredictionRequest.model_fields.items():
+        if field.annotation in (int, float):
+            lower = next(m.ge for m in field.metadata if isinstance(m, Ge))
+            upper = next(m.le for m in field.metadata if isinstance(m, Le))
+            types = (int,) if field.annotation is int else (int, float)
+            fields[name] = (types, lower, upper)
+    return fields
+
+
+# Field -> (allowed Python types, lower bound, upper bound)
+NUMERIC_FIELDS: dict[str, tuple[tuple[type, ...], float, float]] = _numeric_fields()
+
+# Field -> accepted values, compared after ``_clean``
+CATEGORY_FIELDS: dict[str, frozenset[str]] = {
+    **{field: frozenset(["Yes", "No"]) for field, _ in BINARY_FEATURES.values()},
+    "gender": frozenset(["Male", "Female"]),
+    **{field: frozenset(categories) for field, _, categories in ONE_HOT_FEATURES},
+}
+
+
+class ColumnValidationError(ValueError):
+    """Raised when a column-major payload fails validation.
+
+    Attributes:
+        errors: Row-indexed error dicts with ``row``, ``field`` and ``msg``
+            keys. ``row`` is ``None`` for errors that apply to a whole column.
+    """
+
+    def __init__(self, errors: list[dict]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} validation error(s)")
+
+
+def _integral(v) -> bool:
+    """Whether ``v`` is an int or a float with no fractional part, like ``5.0``."""
+    return type(v) is int or (type(v) is float and v.is_integer())
+
+
+def _numeric_errors(field: str, values: list, types: tuple[type, ...], lower: float, upper: float) -> list[dict]:
+    """Returns row errors for a numeric column, scanning rows only on failure.
+
+    Int fields accept integral floats, as the lax ``PredictionRequest`` model does.
+    """
+    kinds = set(map(type, values))
+    if types == (int,) and float in kinds:
+        typed = kinds <= {int, float} and all(map(_integral, values))
+    else:
+        typed = kinds <= set(types)
+    if (
+        typed
+        and min(values) >= lower
+        and max(values) <= upper
+        and not math.isnan(math.fsum(values))
+    ):
+        return []
+
+    errors = []
+    for row, v in enumerate(values):
+        if type(v) not in types and not (types == (int,) and _integral(v)):
+            errors.append({"row": row, "field": field, "msg": f"Expected {types[-1].__name__}, got {v!r}"})
+        elif not lower <= v <= upper:  # also rejects NaN
+            errors.append({"row": row, "field": field, "msg": f"Value {v} outside [{lower}, {upper}]"})
+        if len(errors) >= MAX_REPORTED_ERRORS:
+            break
+    return errors
+
+
+def _category_errors(field: str, values: list, allowed: frozenset[str]) -> list[dict]:
+    """Returns row errors for a categorical column, scanning rows only on failure."""
+    if set(map(type, values)) == {str} and all(_clean(v) in allowed for v in set(values)):
+        return []
+
+    errors = []
+    for row, v in enumerate(values):
+        if not isinstance(v, str) or _clean(v) not in allowed:
+            errors.append({"row": row, "field": field, "msg": f"Unknown category {v!r}"})
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+    return errors
+
+
+def validate_columns(columns: dict[str, list], max_rows: int = BATCH_MAX_ROWS) -> int:
+    """Validates a column-major payload in place of per-row Pydantic models.
+
+    Integral floats in int columns are converted to int in place, as the
+    Pydantic model does for ``/predict``.
+
+    Args:
+        columns: Mapping of every ``PredictionRequest`` field to a list of values.
+        max_rows: Largest accepted number of rows.
+
+    Returns:
+        Number of rows in the payload.
+
+    Raises:
+        ColumnValidationError: With row-indexed errors if any check fails.
+    """
+    expected = set(PredictionRequest.model_fields)
+    errors = [
+        {"row": None, "field": f, "msg": "Missing column"} for f in sorted(expected - set(columns))
+    ] + [
+        {"row": None, "field": f, "msg": "Unknown column"} for f in sorted(set(columns) - expected)
+    ]
+    if errors:
+        raise ColumnValidationError(errors)
+
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise ColumnValidationError([{"row": None, "field": None, "msg": "Columns have different lengths"}])
+    n_rows = lengths.pop()
+    if not 0 < n_rows <= max_rows:
+        raise ColumnValidationError(
+            [{"row": None, "field": None, "msg": f"Payload must have 1-{max_rows} rows, got {n_rows}"}]
+        )
+
+    for field, (types, lower, upper) in NUMERIC_FIELDS.items():
+        errors.extend(_numeric_errors(field, columns[field], types, lower, upper))
+    for field, allowed in CATEGORY_FIELDS.items():
+        errors.extend(_category_errors(field, columns[field], allowed))
+
+    if errors:
+        errors.sort(key=lambda e: (e["row"], e["field"]))
+        raise ColumnValidationError(errors[:MAX_REPORTED_ERRORS])
+
+    for field, (types, _, _) in NUMERIC_FIELDS.items():
+        if types == (int,) and float in set(map(type, columns[field])):
+            columns[field] = [int(v) for v in columns[field]]
+    return n_rows
+
+
+def _score_columns(columns: dict[str, list], explain: bool, record: bool, start: float) -> dict:
+    """Preprocesses, scores and captures validated columns; returns the column-major response."""
+    vectors = _preprocess_columns(columns)
+    results = predict_features(vectors, explain, record)
+    probabilities = [r["churn_probability"] for r in results]
+
+    capture = get_capture(FEATURE_NAMES) if record else None
+    if capture is not None:
+        capture.record_batch(columns, vectors, probabilities, (time.perf_counter() - start) * 1000)
+
+    response = {
+        "churn_probability": probabilities,
+        "will_churn": [r["will_churn"] for r in results],
+    }
+    if explain:
+        response["contributions"] = {
+            field: [r["contributions"][field] for r in results] for field in results[0]["contributions"]
+        }
+        response["base_value"] = results[0]["base_value"]
+    return response
+
+
+def predict_columns(columns: dict[str, list], explain: bool = False, record: bool = True) -> dict:
+    """Validates, preprocesses and scores a column-major payload.
+
+    Args:
+        columns: Mapping of every ``PredictionRequest`` field to a list of values.
+        explain: Also return column-major ``contributions`` and ``base_value``.
+        record: Feed the rows to drift monitoring, segment aggregates and
+            capture; off for synthetic rows such as what-if grids.
+
+    Returns:
+        Column-major dict with ``churn_probability`` and ``will_churn`` lists
+        in row order.
+
+    Raises:
+        ColumnValidationError: If the payload fails validation.
+    """
+    start = time.perf_counter()
+    n_rows = validate_columns(columns)
+    logger.info("Processing batch prediction request: {} rows", n_rows)
+    return _score_columns(columns, explain, record, start)
+
+
+def stream_columns(columns: dict[str, list], explain: bool = False, record: bool = True) -> Iterator[dict]:
+    """Validates a column-major payload, then scores it one SageMaker batch at a time.
+
+    Validation runs before this function returns, so invalid payloads fail
+    before anything is streamed. Each chunk of ``SAGEMAKER_MAX_BATCH_ROWS``
+    rows is preprocessed, scored and captured only when the consumer asks
+    for it, so feature vectors and results are held for one chunk at a time.
+
+    Args:
+        columns: Mapping of every ``PredictionRequest`` field to a list of
+            values, up to ``STREAM_MAX_ROWS`` rows.
+        explain: Also return column-major ``contributions`` and ``base_value``.
+        record: As in ``predict_columns``.
+
+    Returns:
+        Iterator of ``predict_columns``-style dicts, one per chunk in row
+        order, each with ``offset``, the index of its first row.
+
+    Raises:
+        ColumnValidationError: If the payload fails validation.
+    """
+    n_rows = validate_columns(columns, STREAM_MAX_ROWS)
+    logger.info("Processing streamed batch prediction request: {} rows", n_rows)
+
+    def chunks() -> Iterator[dict]:
+        for offset in range(0, n_rows, SAGEMAKER_MAX_BATCH_ROWS):
+            start = time.perf_counter()
+            chunk = {field: values[offset:offset + SAGEMAKER_MAX_BATCH_ROWS] for field, values in columns.items()}
+            yield {"offset": offset, **_score_columns(chunk, explain, record, start)}
+
+    return chunks()
@@ -26,3 +26,21 @@ class PredictionRequest(BaseModel):
 class PredictionResponse(BaseModel):
     churn_probability: float
     will_churn: bool
+    # Only with ?explain=true: log-odds contribution per request field;
+    # base_value + sum(contributions) is the model's log-odds
+    contributions: dict[str, float] | None = None
+    base_value: float | None = None
+
+
+class ColumnarPredictionRequest(BaseModel):
+    """Column-major bulk payload: each ``PredictionRequest`` field maps to a list of values."""
+
+    columns: dict[str, list]
+
+
+class ColumnarPredictionResponse(BaseModel):
+    churn_probability: list[float]
+    will_churn: list[bool]
+    # Only with ?explain=true: request field -> per-row log-odds contributions
+    contributions: dict[str, list[float]] | None = None
+    base_value: float | None = None
@@ -1,17 +1,28 @@
 import json
 import os
+import time
 
 import boto3
 from loguru import logger
 
-from config import AWS_REGION, CHURN_THRESHOLD, SAGEMAKER_ENDPOINT_NAME
+from api_components.capture.capture import get_capture
+from api_components.explain.explain import ExplanationUnavailableError, get_explainer
+from api_components.monitoring.drift import get_drift_monitor
+from api_components.predict.models import PredictionRequest
+from api_components.segments.segments import get_segments
+from config import (
+    ARTIFACTS_DIR,
+    AWS_REGION,
+    CHURN_THRESHOLD,
+    SAGEMAKER_ENDPOINT_NAME,
+    SAGEMAKER_ENDPOINT_URL,
+    SAGEMAKER_MAX_BATCH_ROWS,
+)
 
 _client = None
 
 # Load model parameters from JSON (no sklearn/numpy needed)
-_artifacts_dir = os.environ.get("ARTIFACTS_DIR", "/var/task/artifacts")
-
-with open(os.path.join(_artifacts_dir, "model_params.json")) as f:
+with open(os.path.join(ARTIFACTS_DIR, "model_params.json")) as f:
     _params = json.load(f)
 
 FEATURE_NAMES: list[str] = _params["feature_names"]
@@ -19,15 +30,104 @@ SCALED_FEATURES: list[str] = _params["scaler"]["features"]
 SCALER_MEANS: list[float] = _params["scaler"]["means"]
 SCALER_STDS: list[float] = _params["scaler"]["stds"]
 
+# Model feature -> (payload field, value encoded as 1)
+BINARY_FEATURES: dict[str, tuple[str, str]] = {
+    "gender": ("gender", "Male"),
+    "SeniorCitizen": ("seniorCitizen", "Yes"),
+    "Partner": ("partner", "Yes"),
+    "Dependents": ("dependents", "Yes"),
+    "PhoneService": ("phoneService", "Yes"),
+    "PaperlessBilling": ("paperlessBilling", "Yes"),
+}
+
+# (payload field, one-hot column prefix, cleaned category values)
+ONE_HOT_FEATURES: list[tuple[str, str, list[str]]] = [
+    ("multipleLines", "MultipleLines", ["No", "No_phone_service", "Yes"]),
+    ("internetService", "InternetService", ["DSL", "Fiber_optic", "No"]),
+    ("onlineSecurity", "OnlineSecurity", ["No", "No_internet_service", "Yes"]),
+    ("onlineBackup", "OnlineBackup", ["No", "No_internet_service", "Yes"]),
+    ("deviceProtection", "DeviceProtection", ["No", "No_internet_service", "Yes"]),
+    ("techSupport", "TechSupport", ["No", "No_internet_service", "Yes"]),
+    ("streamingTV", "StreamingTV", ["No", "No_internet_service", "Yes"]),
+    ("streamingMovies", "StreamingMovies", ["No", "No_internet_service", "Yes"]),
+    ("contract", "Contract", ["Month_to_month", "One_year", "Two_year"]),
+    ("paymentMethod", "PaymentMethod",
+     ["Bank_transfer_automatic", "Credit_card_automatic", "Electronic_check", "Mailed_check"]),
+]
+
+TENURE_GROUPS: list[str] = ["0_1yr", "1_2yr", "2_4yr", "4_6yr"]
+
+# Add-on services counted by the TotalServices feature
+SERVICE_FIELDS: list[str] = [
+    "onlineSecurity", "onlineBackup", "deviceProtection",
+    "techSupport", "streamingTV", "streamingMovies",
+]
+
+# Payload fields, in the order explanations report them
+PAYLOAD_FIELDS: list[str] = list(PredictionRequest.model_fields)
+
+
+def _feature_fields() -> list[dict[str, float]]:
+    """Maps each model feature to the payload fields it is computed from.
+
+    One-hot columns roll up into their source field and ``TenureGroup`` into
+    ``tenure``. Derived features split their contribution evenly between their
+    inputs: ``AvgMonthlySpend`` between ``totalCharges`` and ``tenure``,
+    ``TotalServices`` between the six add-on services.
+
+    Returns:
+        Per feature in ``FEATURE_NAMES`` order, ``{field: share}`` with shares
+        summing to 1.
+    """
+    sources = {feature: {field: 1.0} for feature, (field, _) in BINARY_FEATURES.items()}
+    sources["tenure"] = {"tenure": 1.0}
+    sources["MonthlyCharges"] = {"monthlyCharges": 1.0}
+    sources["TotalCharges"] = {"totalCharges": 1.0}
+    sources["AvgMonthlySpend"] = {"totalCharges": 0.5, "tenure": 0.5}
+    sources["TotalServices"] = {field: 1 / len(SERVICE_FIELDS) for field in SERVICE_FIELDS}
+    for field, prefix, categories in ONE_HOT_FEATURES:
+        for cat in categories:
+            sources[f"{prefix}_{cat}"] = {field: 1.0}
+    for group in TENURE_GROUPS:
+        sources[f"TenureGroup_{group}"] = {"tenure": 1.0}
+    return [sources[f] for f in FEATURE_NAMES]
+
+
+FEATURE_FIELDS: list[dict[str, float]] = _feature_fields()
+
 
 def _get_sagemaker_client():
     """Returns a cached SageMaker runtime client, reused across Lambda invocations."""
     global _client
     if _client is None:
-        _client = boto3.client("sagemaker-runtime", region_name=AWS_REGION)
+        _client = boto3.client(
+            "sagemaker-runtime",
+            region_name=AWS_REGION,
+            endpoint_url=SAGEMAKER_ENDPOINT_URL,
+        )
     return _client
 
 
+def preload() -> None:
+    """Warms process-wide state before a pre-fork server starts its workers.
+
+    Creating one client parses botocore's service model into the default
+    session's loader cache, which forked workers inherit. The client itself is
+    discarded because its connection pool must not be shared across processes;
+    each worker builds its own on first use. The explainer, when deployed, is
+    loaded here too so workers share its tables.
+    """
+    global _client
+    _get_sagemaker_client()
+    _client = None
+    get_drift_monitor(FEATURE_NAMES)
+    get_segments(FEATURE_NAMES)
+    try:
+        get_explainer(FEATURE_FIELDS, PAYLOAD_FIELDS)
+    except ExplanationUnavailableError:
+        pass
+
+
 def _one_hot(value: str, categories: list[str], prefix: str) -> dict:
     """Returns a one-hot encoded dict for a categorical value.
 
@@ -90,21 +190,12 @@ def _preprocess(payload: dict) -> list[float]:
     # The +1 avoids division by zero for new customers (tenure == 0)
     avg_monthly_spend = total / (tenure + 1)
 
-    services = [
-        payload["onlineSecurity"], payload["onlineBackup"],
-        payload["deviceProtection"], payload["techSupport"],
-        payload["streamingTV"], payload["streamingMovies"],
-    ]
-    total_services = sum(1 for s in services if s == "Yes")
+    total_services = sum(1 for field in SERVICE_FIELDS if payload[field] == "Yes")
 
     features = {}
 
-    features["gender"] = 1 if payload["gender"] == "Male" else 0
-    features["SeniorCitizen"] = 1 if payload["seniorCitizen"] == "Yes" else 0
-    features["Partner"] = 1 if payload["partner"] == "Yes" else 0
-    features["Dependents"] = 1 if payload["dependents"] == "Yes" else 0
-    features["PhoneService"] = 1 if payload["phoneService"] == "Yes" else 0
-    features["PaperlessBilling"] = 1 if payload["paperlessBilling"] == "Yes" else 0
+    for feature, (field, positive) in BINARY_FEATURES.items():
+        features[feature] = 1 if payload[field] == positive else 0
 
     # Numerical features (will be scaled below)
     features["tenure"] = tenure
@@ -113,40 +204,9 @@ def _preprocess(payload: dict) -> list[float]:
     features["AvgMonthlySpend"] = avg_monthly_spend
     features["TotalServices"] = total_services
 
-    features.update(_one_hot(
-        _clean(payload["multipleLines"]),
-        ["No", "No_phone_service", "Yes"], "MultipleLines"))
-    features.update(_one_hot(
-        _clean(payload["internetService"]),
-        ["DSL", "Fiber_optic", "No"], "InternetService"))
-    features.update(_one_hot(
-        _clean(payload["onlineSecurity"]),
-        ["No", "No_internet_service", "Yes"], "OnlineSecurity"))
-    features.update(_one_hot(
-        _clean(payload["onlineBackup"]),
-        ["No", "No_internet_service", "Yes"], "OnlineBackup"))
-    features.update(_one_hot(
-        _clean(payload["deviceProtection"]),
-        ["No", "No_internet_service", "Yes"], "DeviceProtection"))
-    features.update(_one_hot(
-        _clean(payload["techSupport"]),
-        ["No", "No_internet_service", "Yes"], "TechSupport"))
-    features.update(_one_hot(
-        _clean(payload["streamingTV"]),
-        ["No", "No_internet_service", "Yes"], "StreamingTV"))
-    features.update(_one_hot(
-        _clean(payload["streamingMovies"]),
-        ["No", "No_internet_service", "Yes"], "StreamingMovies"))
-    features.update(_one_hot(
-        _clean(payload["contract"]),
-        ["Month_to_month", "One_year", "Two_year"], "Contract"))
-    features.update(_one_hot(
-        _clean(payload["paymentMethod"]),
-        ["Bank_transfer_automatic", "Credit_card_automatic",
-         "Electronic_check", "Mailed_check"], "PaymentMethod"))
-    features.update(_one_hot(
-        _tenure_group(tenure),
-        ["0_1yr", "1_2yr", "2_4yr", "4_6yr"], "TenureGroup"))
+    for field, prefix, categories in ONE_HOT_FEATURES:
+        features.update(_one_hot(_clean(payload[field]), categories, prefix))
+    features.update(_one_hot(_tenure_group(tenure), TENURE_GROUPS, "TenureGroup"))
 
     # Apply standard scaling: (value - mean) / std
     for feat, mean, std in zip(SCALED_FEATURES, SCALER_MEANS, SCALER_STDS):
@@ -159,22 +219,77 @@ def _preprocess(payload: dict) -> list[float]:
     return [features[f] for f in FEATURE_NAMES]
 
 
-def make_prediction(payload: dict) -> dict:
-    """Preprocesses raw input, sends to SageMaker endpoint, and returns the result.
+def _preprocess_columns(columns: dict[str, list]) -> list[list[float]]:
+    """Column-at-a-time equivalent of ``_preprocess`` for bulk inputs.
+
+    Each feature is computed over a whole column with one comprehension, and
+    category cleaning runs once per distinct value instead of once per row.
 
     Args:
-        payload: Customer feature dictionary produced by the input form.
+        columns: Column-major payload mapping each ``PredictionRequest`` field
+            to a list of values, all of the same length.
 
     Returns:
-        Dict with ``churn_probability`` (float) and ``will_churn`` (bool).
+        Ordered feature vectors, one per row, identical to ``_preprocess``.
+    """
+    tenure = columns["tenure"]
+    total = columns["totalCharges"]
+
+    features: dict[str, list] = {}
+
+    for feature, (field, positive) in BINARY_FEATURES.items():
+        features[feature] = [1 if v == positive else 0 for v in columns[field]]
+
+    features["tenure"] = tenure
+    features["MonthlyCharges"] = columns["monthlyCharges"]
+    features["TotalCharges"] = total
+    features["AvgMonthlySpend"] = [t / (n + 1) for t, n in zip(total, tenure)]
+    features["TotalServices"] = [
+        sum(1 for v in row if v == "Yes")
+        for row in zip(*(columns[field] for field in SERVICE_FIELDS))
+    ]
+
+    for field, prefix, categories in ONE_HOT_FEATURES:
+        cleaned_values = {v: _clean(v) for v in set(columns[field])}
+        cleaned = [cleaned_values[v] for v in columns[field]]
+        for cat in categories:
+            features[f"{prefix}_{cat}"] = [1 if v == cat else 0 for v in cleaned]
+    groups = [_tenure_group(t) for t in tenure]
+    for group in TENURE_GROUPS:
+        features[f"TenureGroup_{group}"] = [1 if g == group else 0 for g in groups]
+
+    for feat, mean, std in zip(SCALED_FEATURES, SCALER_MEANS, SCALER_STDS):
+        if std == 0:
+            features[feat] = [0.0] * len(tenure)
+        else:
+            features[feat] = [(v - mean) / std for v in features[feat]]
+
+    return [list(row) for row in zip(*(features[f] for f in FEATURE_NAMES))]
+
+
+def _encode_csv(feature_vectors: list[list[float]]) -> str:
+    """Encodes feature vectors as the CSV body SageMaker built-in XGBoost expects, one row per line."""
+    return "\n".join(",".join(str(v) for v in vec) for vec in feature_vectors)
+
+
+def _parse_probabilities(raw_body: str) -> list[float]:
+    """Parses an endpoint response: one probability per row, separated by commas or newlines."""
+    return [float(p) for p in raw_body.replace("\n", ",").split(",") if p.strip()]
+
+
+def _invoke_endpoint(feature_vectors: list[list[float]]) -> list[float]:
+    """Scores feature vectors with a single SageMaker invocation.
+
+    Args:
+        feature_vectors: Preprocessed 46-feature rows, one per customer.
+
+    Returns:
+        Churn probabilities in the same order as ``feature_vectors``.
     """
-    logger.info("Processing prediction request")
     client = _get_sagemaker_client()
-    feature_vector = _preprocess(payload)
 
-    # SageMaker built-in XGBoost expects CSV format
-    csv_body = ",".join(str(v) for v in feature_vector)
-    logger.debug("Feature vector length: {}", len(feature_vector))
+    csv_body = _encode_csv(feature_vectors)
+    logger.debug("Invoking endpoint with {} row(s)", len(feature_vectors))
 
     response = client.invoke_endpoint(
         EndpointName=SAGEMAKER_ENDPOINT_NAME,
@@ -185,12 +300,95 @@ def make_prediction(payload: dict) -> dict:
     raw_body = response["Body"].read().decode("utf-8")
     logger.debug("SageMaker raw response: {}", raw_body)
 
-    result = json.loads(raw_body)
-    churn_probability = float(result)
+    probabilities = _parse_probabilities(raw_body)
+    if len(probabilities) != len(feature_vectors):
+        raise ValueError(
+            f"Expected {len(feature_vectors)} predictions from SageMaker, got {len(probabilities)}"
+        )
+    return probabilities
 
-    logger.info("Prediction complete: probability={:.4f}, churn={}", churn_probability, churn_probability >= CHURN_THRESHOLD)
 
+def _to_result(churn_probability: float) -> dict:
+    """Builds the prediction result dict for a churn probability."""
     return {
         "churn_probability": churn_probability,
         "will_churn": churn_probability >= CHURN_THRESHOLD,
     }
+
+
+def score_vectors(feature_vectors: list[list[float]]) -> list[float]:
+    """Returns churn probabilities in SageMaker-sized batches, without drift monitoring or segment aggregates.
+
+    Used directly for synthetic vectors (e.g. counterfactual candidates) that
+    must not count as observed traffic.
+    """
+    probabilities = []
+    for start in range(0, len(feature_vectors), SAGEMAKER_MAX_BATCH_ROWS):
+        probabilities.extend(_invoke_endpoint(feature_vectors[start:start + SAGEMAKER_MAX_BATCH_ROWS]))
+    return probabilities
+
+
+def predict_features(feature_vectors: list[list[float]], explain: bool = False, record: bool = True) -> list[dict]:
+    """Scores already-preprocessed feature vectors in SageMaker-sized batches.
+
+    Args:
+        feature_vectors: Ordered 46-feature rows as produced by ``_preprocess``.
+        explain: Also attach ``contributions`` (payload field -> log-odds
+            contribution) and ``base_value`` (expected log-odds) to each result.
+        record: Count the rows as observed traffic in drift monitoring and
+            segment aggregates; off for synthetic rows.
+
+    Returns:
+        List of dicts with ``churn_probability`` (float) and ``will_churn`` (bool),
+        in the same order as ``feature_vectors``.
+
+    Raises:
+        ExplanationUnavailableError: If ``explain`` is set but explanations are
+            not available; raised before the endpoint is called.
+    """
+    explainer = get_explainer(FEATURE_FIELDS, PAYLOAD_FIELDS) if explain else None
+
+    probabilities = score_vectors(feature_vectors)
+    results = [_to_result(p) for p in probabilities]
+
+    monitor = get_drift_monitor(FEATURE_NAMES) if record else None
+    if monitor is not None:
+        monitor.update_many(feature_vectors)
+
+    segments = get_segments(FEATURE_NAMES) if record else None
+    if segments is not None:
+        segments.update_many(feature_vectors, probabilities)
+
+    if explainer is not None and feature_vectors:
+        for result, row in zip(results, explainer.explain(feature_vectors).tolist()):
+            result["contributions"] = dict(zip(PAYLOAD_FIELDS, row))
+            result["base_value"] = explainer.base_value
+
+    return results
+
+
+def make_prediction(payload: dict, explain: bool = False) -> dict:
+    """Preprocesses raw input, sends to SageMaker endpoint, and returns the result.
+
+    Args:
+        payload: Customer feature dictionary produced by the input form.
+        explain: Also return per-field ``contributions`` and ``base_value``.
+
+    Returns:
+        Dict with ``churn_probability`` (float) and ``will_churn`` (bool).
+    """
+    logger.info("Processing prediction request")
+    start = time.perf_counter()
+    feature_vector = _preprocess(payload)
+    logger.debug("Feature vector length: {}", len(feature_vector))
+
+    result = predict_features([feature_vector], explain)[0]
+
+    capture = get_capture(FEATURE_NAMES)
+    if capture is not None:
+        latency_ms = (time.perf_counter() - start) * 1000
+        capture.record(payload, feature_vector, result["churn_probability"], latency_ms)
+
+    logger.info("Prediction complete: probability={:.4f}, churn={}", result["churn_probability"], result["will_churn"])
+
+    return result
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class ProfileRequest(BaseModel):
+    duration_seconds: float = Field(10.0, gt=0)
+
+
+class ProfileResponse(BaseModel):
+    path: str
+    pid: int
+    samples: int
+    stacks: int
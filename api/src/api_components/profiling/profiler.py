@@ -0,0 +1,322 @@
+"""On-demand sampling profiler for live workers.
+
+While at least one profiling session is active, a daemon thread reads the
+Python stack of every other thread with ``sys._current_frames()`` once per
+interval and counts identical stacks. A session is either timed
+(``POST /admin/profile``) or runs while requests picked by
+``PROFILER_SAMPLE_RATE`` are in flight. Either way every thread of the worker
+is sampled, so requests served concurrently with a picked one, picked or not,
+show up in its profile too. Request sessions are cut into windows of
+``PROFILER_REQUEST_WINDOW_SECONDS``, one file each, rewritten at most every
+``PROFILER_WRITE_INTERVAL_SECONDS``; only the newest ``PROFILER_MAX_FILES``
+request files of a worker are kept. Results are written in the collapsed-stack format
+(``thread;module.function;... count``) read by ``flamegraph.pl``, inferno
+and speedscope. Samples of threads parked in a lock or selector wait are
+dropped, so idle pool threads do not bury the busy ones.
+
+Nothing is sampled while no session is active: the thread is not started
+until the first session, and without ``PROFILER_SAMPLE_RATE`` the request
+middleware is not installed.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import (
+    PROFILER_ADMIN_TOKEN,
+    PROFILER_INTERVAL_MS,
+    PROFILER_MAX_FILES,
+    PROFILER_OUTPUT_DIR,
+    PROFILER_REQUEST_WINDOW_SECONDS,
+    PROFILER_SAMPLE_RATE,
+    PROFILER_WRITE_INTERVAL_SECONDS,
+)
+
+# Leaf frames of threads that are blocked rather than running Python code
+IDLE_LEAVES = frozenset({
+    "threading.Condition.wait",
+    "threading.Thread._wait_for_tstate_lock",
+    "selectors.EpollSelector.select",
+    "selectors.PollSelector.select",
+    "selectors.KqueueSelector.select",
+    "selectors.SelectSelector.select",
+    "asyncio.runners.Runner.run",
+})
+
+_profiler = None
+
+
+class _Session:
+    """Stack counts collected for one output file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.monotonic()
+        self.written = self.started
+        self.written_samples = 0
+
+
+def write_collapsed(path: str, stacks: dict[str, int]) -> None:
+    """Atomically writes stack counts as collapsed-stack lines."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp, path)
+
+
+class SamplingProfiler:
+    """Stack sampler shared by all profiling sessions of a worker.
+
+    Args:
+        output_dir: Directory for ``.collapsed`` files.
+        interval: Seconds between samples.
+        request_window: Seconds covered by one request profile file.
+        write_interval: Minimum seconds between rewrites of the open request
+            profile; ``0`` rewrites it after every picked request.
+        max_files: Request profile files kept per worker.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        interval: float = 0.01,
+        request_window: float = 300.0,
+        write_interval: float = 30.0,
+        max_files: int = 50,
+    ):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.request_window = request_window
+        self.write_interval = write_interval
+        self.max_files = max_files
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._sessions: list[_Session] = []
+        self._labels: dict = {}
+        self._thread = None
+        self._pid = None
+
+        self._requests: _Session | None = None
+        self._active_requests = 0
+        self.profiled_requests = 0
+
+    def _path(self, kind: str) -> str:
+        now = time.time()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"{now % 1:.3f}"[1:]
+        return os.path.join(self.output_dir, f"{kind}-{os.getpid()}-{stamp}.collapsed")
+
+    def _activate(self, session: _Session) -> None:
+        """Adds a session and wakes the sampler; caller holds ``_cond``."""
+        self._sessions.append(session)
+        self._cond.notify()
+
+    def _ensure_sampler(self) -> None:
+        """Starts this process's sampler thread; caller holds ``_cond``."""
+        # Threads do not survive fork, so each worker starts its own sampler
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._sessions = []
+            self._requests = None
+            self._active_requests = 0
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = self._labels[code] = f"{module}.{code.co_qualname}".replace(";", ":")
+        return label
+
+    def sample(self, skip: int | None = None) -> list[str]:
+        """Returns the collapsed stack of every non-idle thread except ``skip``."""
+        names = {t.ident: t.name.replace(";", ":") for t in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            # Check the leaf first so idle threads cost one lookup
+            labels = [self._label(frame)]
+            if labels[0] in IDLE_LEAVES:
+                continue
+            frame = frame.f_back
+            while frame is not None:
+                labels.append(self._label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            labels.reverse()
+            stacks.append(";".join(labels))
+        return stacks
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._cond:
+                while not self._sessions:
+                    # While idle, write the request profile once its rewrite is due
+                    pending = self._requests
+                    if pending is None or pending.samples == pending.written_samples:
+                        self._cond.wait()
+                        continue
+                    wait = pending.written + self.write_interval - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                else:
+                    pending = None
+            if pending is not None:
+                self._write_requests(pending)
+                continue
+            started = time.perf_counter()
+            stacks = self.sample(skip=me)
+            with self._cond:
+                for session in self._sessions:
+                    session.stacks.update(stacks)
+                    session.samples += 1
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def profile(self, seconds: float) -> dict:
+        """Samples all threads for ``seconds`` and writes one profile. Blocks.
+
+        Returns:
+            Output ``path``, ``pid``, ``samples`` taken and distinct ``stacks``.
+        """
+        session = _Session(self._path("profile"))
+        with self._cond:
+            self._ensure_sampler()
+            self._activate(session)
+        # An idle wait, so the caller's own thread drops out of its samples
+        threading.Event().wait(seconds)
+        with self._cond:
+            self._sessions.remove(session)
+        write_collapsed(session.path, session.stacks)
+        logger.info("Wrote {}-second profile ({} samples) to {}", seconds, session.samples, session.path)
+        return {"path": session.path, "pid": os.getpid(), "samples": session.samples, "stacks": len(session.stacks)}
+
+    def begin_request(self) -> None:
+        """Starts sampling for a profiled request."""
+        with self._cond:
+            self._ensure_sampler()
+            if self._requests is None:
+                self._requests = _Session(self._path("requests"))
+            self._active_requests += 1
+            self.profiled_requests += 1
+            if self._active_requests == 1:
+                self._activate(self._requests)
+
+    def end_request(self) -> None:
+        """Stops sampling once no profiled request is in flight.
+
+        The request profile is rewritten with the running totals when its
+        window is over, after which the next picked request starts a new file,
+        or when ``write_interval`` has passed since the last rewrite. Otherwise
+        the sampler thread writes it once the rewrite is due.
+        """
+        with self._cond:
+            self._active_requests -= 1
+            if self._active_requests:
+                return
+            session = self._requests
+            self._sessions.remove(session)
+            now = time.monotonic()
+            if now - session.started >= self.request_window:
+                self._requests = None
+            elif now - session.written < self.write_interval:
+                self._cond.notify()
+                return
+        self._write_requests(session)
+
+    def _write_requests(self, session: _Session) -> None:
+        """Rewrites a request profile and prunes this worker's oldest ones."""
+        try:
+            # Copy under the write lock so an older copy never overwrites a newer one
+            with self._write_lock:
+                with self._cond:
+                    if session.samples == session.written_samples:
+                        return
+                    first = session.written_samples == 0
+                    stacks = dict(session.stacks)
+                    session.written = time.monotonic()
+                    session.written_samples = session.samples
+                write_collapsed(session.path, stacks)
+                if first:
+                    self._prune()
+        except OSError:
+            logger.exception("Failed to write request profile to {}", session.path)
+
+    def _prune(self) -> None:
+        """Removes this worker's request profiles beyond ``max_files``."""
+        # Names sort by time within one worker
+        prefix = f"requests-{os.getpid()}-"
+        files = sorted(
+            f for f in os.listdir(self.output_dir) if f.startswith(prefix) and f.endswith(".collapsed")
+        )
+        for old in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.output_dir, old))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles a random ``sample_rate`` of requests.
+
+    Args:
+        app: The wrapped ASGI application.
+        profiler: Sampler collecting the request profile.
+        sample_rate: Fraction of HTTP requests to profile, in ``(0, 1]``.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler, sample_rate: float):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        self.profiler.begin_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Writing the profile is file I/O; keep it off the event loop
+            await run_in_threadpool(self.profiler.end_request)
+
+
+def get_profiler() -> SamplingProfiler | None:
+    """Returns the process-wide profiler, or ``None`` when profiling is off.
+
+    Profiling is on when ``PROFILER_ADMIN_TOKEN`` or ``PROFILER_SAMPLE_RATE``
+    is set. Creating the profiler starts no thread.
+    """
+    global _profiler
+    if _profiler is None and (PROFILER_ADMIN_TOKEN or PROFILER_SAMPLE_RATE > 0):
+        _profiler = SamplingProfiler(
+            PROFILER_OUTPUT_DIR,
+            PROFILER_INTERVAL_MS / 1000,
+            request_window=PROFILER_REQUEST_WINDOW_SECONDS,
+            write_interval=PROFILER_WRITE_INTERVAL_SECONDS,
+            max_files=PROFILER_MAX_FILES,
+        )
+        logger.info(
+            "Sampling profiler available: admin route {}, sample_rate={}, output {}",
+            "on" if PROFILER_ADMIN_TOKEN else "off",
+            PROFILER_SAMPLE_RATE,
+            PROFILER_OUTPUT_DIR,
+        )
+    return _profiler
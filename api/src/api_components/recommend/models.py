@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+
+class FieldChange(BaseModel):
+    field: str
+    current: str
+    proposed: str
+
+
+class RecommendationOption(BaseModel):
+    changes: list[FieldChange]
+    churn_probability: float
+    will_churn: bool
+
+
+class RecommendationResponse(BaseModel):
+    churn_probability: float
+    will_churn: bool
+    options: list[RecommendationOption]
+    candidates_scored: int
+    budget_exhausted: bool
@@ -0,0 +1,166 @@
+"""Retention-offer search: the fewest actionable changes that bring a customer
+below ``CHURN_THRESHOLD``.
+
+Beam search over single-field changes. Level ``k`` holds change sets of size
+``k``; all candidates of a level go through the column-wise transform and are
+scored together in SageMaker-sized batches. Candidates already below the
+threshold become options and are not expanded, since any superset needs more
+changes, and candidates containing an option are pruned. Of the rest, only the ``beam_width`` lowest-probability candidates
+are expanded into the next level.
+
+The search stops at ``max_changes``, once ``max_options`` options are found,
+or when the next SageMaker batch is not expected to finish within the latency
+budget; options among the batches of that level already scored are kept.
+Candidates are synthetic, so they bypass drift monitoring and capture.
+"""
+
+import time
+
+from loguru import logger
+
+from api_components.predict.predict import (
+    SERVICE_FIELDS,
+    _preprocess,
+    _preprocess_columns,
+    score_vectors,
+)
+from config import (
+    CHURN_THRESHOLD,
+    RECOMMEND_BEAM_WIDTH,
+    RECOMMEND_LATENCY_BUDGET_MS,
+    RECOMMEND_MAX_CHANGES,
+    RECOMMEND_MAX_OPTIONS,
+    SAGEMAKER_MAX_BATCH_ROWS,
+)
+
+# Fields the business can change, with the values it can offer
+ACTIONABLE_FIELDS: dict[str, list[str]] = {
+    "contract": ["Month-to-month", "One year", "Two year"],
+    "paymentMethod": [
+        "Electronic check", "Mailed check",
+        "Bank transfer (automatic)", "Credit card (automatic)",
+    ],
+    "paperlessBilling": ["Yes", "No"],
+}
+
+
+def _actions(payload: dict) -> list[tuple[str, str]]:
+    """Returns every single-field change available for this customer.
+
+    Add-on services are only actionable for customers with internet service.
+    """
+    fields = dict(ACTIONABLE_FIELDS)
+    if payload["internetService"] != "No":
+        fields.update({field: ["Yes", "No"] for field in SERVICE_FIELDS})
+    return [
+        (field, value)
+        for field, options in fields.items()
+        for value in options
+        if value != payload[field]
+    ]
+
+
+def _score_candidates(payload: dict, candidates: list[tuple]) -> list[float]:
+    """Scores change sets applied to ``payload`` as one column-major batch."""
+    columns = {field: [value] * len(candidates) for field, value in payload.items()}
+    for i, changes in enumerate(candidates):
+        for field, value in changes:
+            columns[field][i] = value
+    return score_vectors(_preprocess_columns(columns))
+
+
+def recommend(
+    payload: dict,
+    beam_width: int = RECOMMEND_BEAM_WIDTH,
+    max_changes: int = RECOMMEND_MAX_CHANGES,
+    max_options: int = RECOMMEND_MAX_OPTIONS,
+    budget_ms: float = RECOMMEND_LATENCY_BUDGET_MS,
+) -> dict:
+    """Searches for the smallest sets of actionable changes that avoid churn.
+
+    Args:
+        payload: Customer features as in ``/predict``.
+        beam_width: Non-solution candidates expanded per level.
+        max_changes: Largest change set considered.
+        max_options: Options to return.
+        budget_ms: Latency budget for the whole search.
+
+    Returns:
+        Dict with the customer's ``churn_probability`` and ``will_churn``,
+        ranked ``options`` (fewest changes first, then lowest probability),
+        ``candidates_scored`` and ``budget_exhausted``.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000
+
+    base = score_vectors([_preprocess(payload)])[0]
+    last_duration = time.perf_counter() - start
+    result = {
+        "churn_probability": base,
+        "will_churn": base >= CHURN_THRESHOLD,
+        "options": [],
+        "candidates_scored": 0,
+        "budget_exhausted": False,
+    }
+    if not result["will_churn"]:
+        return result
+
+    actions = _actions(payload)
+    beam: list[tuple] = [()]
+    seen: set[frozenset] = set()
+    found: list[tuple[tuple, float]] = []
+    option_sets: list[frozenset] = []
+
+    for _ in range(max_changes):
+        candidates = []
+        for changes in beam:
+            changed = {field for field, _ in changes}
+            for action in actions:
+                key = frozenset(changes + (action,))
+                if action[0] in changed or key in seen:
+                    continue
+                # A superset of an option is never a smaller change set
+                if any(option <= key for option in option_sets):
+                    continue
+                seen.add(key)
+                candidates.append(changes + (action,))
+        if not candidates:
+            break
+
+        probabilities: list[float] = []
+        for i in range(0, len(candidates), SAGEMAKER_MAX_BATCH_ROWS):
+            # The previous call predicts this one: both are dominated by the endpoint round trip
+            batch_start = time.perf_counter()
+            if batch_start + last_duration > deadline:
+                result["budget_exhausted"] = True
+                break
+            probabilities.extend(_score_candidates(payload, candidates[i:i + SAGEMAKER_MAX_BATCH_ROWS]))
+            last_duration = time.perf_counter() - batch_start
+        candidates = candidates[:len(probabilities)]
+        result["candidates_scored"] += len(candidates)
+
+        ranked = sorted(zip(probabilities, candidates), key=lambda pc: pc[0])
+        for p, changes in ranked:
+            if p < CHURN_THRESHOLD:
+                found.append((changes, p))
+                option_sets.append(frozenset(changes))
+        if result["budget_exhausted"] or len(found) >= max_options:
+            break
+        beam = [changes for p, changes in ranked if p >= CHURN_THRESHOLD][:beam_width]
+
+    result["options"] = [
+        {
+            "changes": [
+                {"field": field, "current": payload[field], "proposed": value}
+                for field, value in changes
+            ],
+            "churn_probability": p,
+            "will_churn": False,
+        }
+        for changes, p in found[:max_options]
+    ]
+    logger.info(
+        "Recommendation search: {} candidates, {} options, {:.0f} ms",
+        result["candidates_scored"], len(result["options"]), (time.perf_counter() - start) * 1000,
+    )
+    return result
@@ -0,0 +1,33 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+SegmentDimension = Literal["contract", "internetService", "paymentMethod", "tenureGroup"]
+
+
+class SegmentSnapshotsRequest(BaseModel):
+    snapshots: list[dict] = Field(..., min_length=1)
+    group_by: list[SegmentDimension] | None = None
+
+
+class SegmentSummary(BaseModel):
+    # Dimensions not in group_by are rolled up and omitted
+    contract: str | None = None
+    internetService: str | None = None
+    paymentMethod: str | None = None
+    tenureGroup: str | None = None
+    count: int
+    mean_probability: float
+    expected_churners: float
+    high_risk: int
+    high_risk_rate: float
+    histogram: list[int]
+
+
+class SegmentsResponse(BaseModel):
+    since: float | None
+    updated: float | None
+    count: int
+    high_risk_threshold: float
+    histogram_edges: list[float]
+    segments: list[SegmentSummary]
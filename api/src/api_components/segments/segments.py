@@ -0,0 +1,379 @@
+"""Incrementally aggregated churn risk per customer segment.
+
+A segment is one combination of contract, internet service, payment method
+and tenure group, read from the one-hot columns of each scored feature
+vector. Every segment keeps a prediction count, the sum of churn
+probabilities, a high-risk count and a fixed-bin probability histogram, so
+memory and query cost depend on the number of segments (144 combinations of
+known categories), not on the number of customers scored.
+
+Updates go to a per-worker pending table. A daemon thread periodically adds
+it into a JSON file shared by all workers on the host, under an exclusive
+file lock, and the file is replaced atomically. The totals therefore survive
+restarts, and readers see every worker's flushed predictions without taking
+the lock. All statistics are sums, so snapshots from different hosts merge
+exactly with ``merge_snapshots``.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+from config import (
+    SEGMENTS_ENABLED,
+    SEGMENTS_FLUSH_INTERVAL_SECONDS,
+    SEGMENTS_HIGH_RISK_THRESHOLD,
+    SEGMENTS_HISTOGRAM_BINS,
+    SEGMENTS_PATH,
+)
+
+# Segment dimension -> one-hot column prefix in the feature vector
+DIMENSIONS: dict[str, str] = {
+    "contract": "Contract",
+    "internetService": "InternetService",
+    "paymentMethod": "PaymentMethod",
+    "tenureGroup": "TenureGroup",
+}
+
+# Label for a dimension whose one-hot group has no column set (unknown category)
+UNKNOWN = "unknown"
+
+# Separator of the dimension labels in snapshot segment keys
+_KEY_SEPARATOR = "|"
+
+_segments = None
+_segments_loaded = False
+
+
+class SegmentStats:
+    """Aggregates for one segment; every field is a sum, so merging is addition."""
+
+    __slots__ = ("n", "probability_sum", "high_risk", "histogram")
+
+    def __init__(self, n_bins: int):
+        self.n = 0
+        self.probability_sum = 0.0
+        self.high_risk = 0
+        self.histogram = [0] * n_bins
+
+    def merge(self, other: "SegmentStats") -> None:
+        """Adds another segment's aggregates into this one."""
+        self.n += other.n
+        self.probability_sum += other.probability_sum
+        self.high_risk += other.high_risk
+        for i, c in enumerate(other.histogram):
+            self.histogram[i] += c
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "probability_sum": self.probability_sum,
+            "high_risk": self.high_risk,
+            "histogram": list(self.histogram),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SegmentStats":
+        stats = cls(0)
+        stats.n = data["n"]
+        stats.probability_sum = data["probability_sum"]
+        stats.high_risk = data["high_risk"]
+        stats.histogram = list(data["histogram"])
+        return stats
+
+
+def _empty_snapshot(n_bins: int, high_risk_threshold: float) -> dict:
+    return {
+        "histogram_bins": n_bins,
+        "high_risk_threshold": high_risk_threshold,
+        "since": None,
+        "updated": None,
+        "segments": {},
+    }
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    """Adds snapshots from several workers or hosts segment by segment.
+
+    Raises:
+        ValueError: If the snapshots use different histogram bins or
+            high-risk thresholds.
+    """
+    if len({(s["histogram_bins"], s["high_risk_threshold"]) for s in snapshots}) > 1:
+        raise ValueError("Cannot merge segment snapshots with different histogram_bins or high_risk_threshold")
+
+    merged = _empty_snapshot(snapshots[0]["histogram_bins"], snapshots[0]["high_risk_threshold"])
+    stats: dict[str, SegmentStats] = {}
+    for snapshot in snapshots:
+        for key, data in snapshot["segments"].items():
+            if key in stats:
+                stats[key].merge(SegmentStats.from_dict(data))
+            else:
+                stats[key] = SegmentStats.from_dict(data)
+    since = [s["since"] for s in snapshots if s["since"] is not None]
+    updated = [s["updated"] for s in snapshots if s["updated"] is not None]
+    merged["since"] = min(since) if since else None
+    merged["updated"] = max(updated) if updated else None
+    merged["segments"] = {key: s.to_dict() for key, s in stats.items()}
+    return merged
+
+
+def rollup(snapshot: dict, group_by: list[str] | None = None) -> dict:
+    """Summarizes a snapshot per segment, optionally rolled up to fewer dimensions.
+
+    Args:
+        snapshot: Snapshot from ``SegmentAggregator.snapshot`` or ``merge_snapshots``.
+        group_by: Dimensions to keep, in ``DIMENSIONS`` order; the others are
+            summed over. Defaults to all four.
+
+    Returns:
+        Dict with the snapshot's time span, totals, histogram bin edges and
+        one entry per segment (its dimension labels, ``count``,
+        ``mean_probability``, ``expected_churners``, ``high_risk``,
+        ``high_risk_rate`` and ``histogram``), sorted by segment labels.
+
+    Raises:
+        ValueError: If ``group_by`` names an unknown dimension.
+    """
+    names = list(DIMENSIONS)
+    group_by = names if group_by is None else group_by
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown segment dimension(s): {', '.join(unknown)}")
+    keep = [i for i, name in enumerate(names) if name in group_by]
+
+    n_bins = snapshot["histogram_bins"]
+    groups: dict[tuple[str, ...], SegmentStats] = {}
+    for key, data in snapshot["segments"].items():
+        labels = key.split(_KEY_SEPARATOR)
+        group = tuple(labels[i] for i in keep)
+        if group not in groups:
+            groups[group] = SegmentStats(n_bins)
+        groups[group].merge(SegmentStats.from_dict(data))
+
+    segments = []
+    for group, stats in sorted(groups.items()):
+        segments.append({
+            **{names[i]: label for i, label in zip(keep, group)},
+            "count": stats.n,
+            "mean_probability": stats.probability_sum / stats.n if stats.n else 0.0,
+            "expected_churners": stats.probability_sum,
+            "high_risk": stats.high_risk,
+            "high_risk_rate": stats.high_risk / stats.n if stats.n else 0.0,
+            "histogram": stats.histogram,
+        })
+    return {
+        "since": snapshot["since"],
+        "updated": snapshot["updated"],
+        "count": sum(s["count"] for s in segments),
+        "high_risk_threshold": snapshot["high_risk_threshold"],
+        "histogram_edges": [i / n_bins for i in range(n_bins + 1)],
+        "segments": segments,
+    }
+
+
+class SegmentAggregator:
+    """Per-segment churn risk aggregates, persisted to a file shared by all workers.
+
+    Args:
+        feature_names: Model feature order of the vectors passed to ``update_many``.
+        path: JSON file holding the flushed totals.
+        n_bins: Equal-width probability histogram bins over ``[0, 1]``.
+        high_risk_threshold: Probability at or above which a prediction counts
+            as high risk.
+        flush_interval: Seconds between flushes of the pending table.
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        path: str,
+        n_bins: int = 10,
+        high_risk_threshold: float = 0.5,
+        flush_interval: float = 10.0,
+    ):
+        self.path = path
+        self.n_bins = n_bins
+        self.high_risk_threshold = high_risk_threshold
+        self._flush_interval = flush_interval
+
+        # Per dimension: (first column, end column, labels), in DIMENSIONS order
+        self._dimensions = []
+        for prefix in DIMENSIONS.values():
+            columns = [i for i, name in enumerate(feature_names) if name.startswith(f"{prefix}_")]
+            start, end = columns[0], columns[-1] + 1
+            if columns != list(range(start, end)):
+                raise ValueError(f"One-hot group {prefix} is not contiguous in the feature vector")
+            labels = [feature_names[i][len(prefix) + 1:] for i in columns]
+            self._dimensions.append((start, end, labels + [UNKNOWN]))
+
+        self._pending: dict[str, SegmentStats] = {}
+        self._since = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+
+        self.flush_errors = 0
+
+    def update_many(self, vectors: list[list[float]], probabilities: list[float]) -> None:
+        """Adds scored feature vectors and their churn probabilities to their segments."""
+        n_bins = self.n_bins
+        threshold = self.high_risk_threshold
+        dimensions = self._dimensions
+        with self._lock:
+            if self._since is None:
+                self._since = time.time()
+            pending = self._pending
+            for vector, p in zip(vectors, probabilities):
+                labels = []
+                for start, end, names in dimensions:
+                    try:
+                        labels.append(names[vector.index(1, start, end) - start])
+                    except ValueError:
+                        labels.append(names[-1])
+                key = _KEY_SEPARATOR.join(labels)
+                stats = pending.get(key)
+                if stats is None:
+                    stats = pending[key] = SegmentStats(n_bins)
+                stats.n += 1
+                stats.probability_sum += p
+                if p >= threshold:
+                    stats.high_risk += 1
+                stats.histogram[min(int(p * n_bins), n_bins - 1)] += 1
+
+            # Threads do not survive fork, so each worker starts its own
+            # flusher; checked under the lock so concurrent requests start one
+            if self._pid != os.getpid():
+                self._start()
+
+    def _pending_snapshot(self) -> dict:
+        """Returns the unflushed aggregates as a snapshot. Caller holds ``_lock``."""
+        snapshot = _empty_snapshot(self.n_bins, self.high_risk_threshold)
+        if self._pending:
+            snapshot["since"], snapshot["updated"] = self._since, time.time()
+        snapshot["segments"] = {key: stats.to_dict() for key, stats in self._pending.items()}
+        return snapshot
+
+    def _read(self) -> dict:
+        """Reads the flushed totals, or an empty snapshot if there are none yet.
+
+        A file written with other histogram bins or threshold is ignored
+        (and replaced on the next flush), since it cannot be merged.
+        """
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return _empty_snapshot(self.n_bins, self.high_risk_threshold)
+        if (snapshot["histogram_bins"], snapshot["high_risk_threshold"]) != (self.n_bins, self.high_risk_threshold):
+            logger.warning("Ignoring segment aggregates in {} written with other settings", self.path)
+            return _empty_snapshot(self.n_bins, self.high_risk_threshold)
+        return snapshot
+
+    def snapshot(self) -> dict:
+        """Returns the host's flushed totals plus this worker's pending updates.
+
+        Other workers' updates appear once they flush, at most
+        ``flush_interval`` seconds later.
+        """
+        with self._lock:
+            pending = self._pending_snapshot()
+        return merge_snapshots([self._read(), pending])
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="segment-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Adds the pending aggregates into the shared file.
+
+        Returns:
+            Number of predictions written.
+        """
+        with self._lock:
+            pending = self._pending_snapshot()
+            self._pending = {}
+            self._since = None
+        if not pending["segments"]:
+            return 0
+
+        try:
+            with open(f"{self.path}.lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                totals = merge_snapshots([self._read(), pending])
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(totals, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+        except Exception:
+            self.flush_errors += 1
+            logger.exception("Failed to flush segment aggregates to {}", self.path)
+            # Keep the updates for the next flush
+            with self._lock:
+                restored = merge_snapshots([pending, self._pending_snapshot()])
+                self._pending = {k: SegmentStats.from_dict(d) for k, d in restored["segments"].items()}
+                self._since = restored["since"]
+            return 0
+        return sum(s["n"] for s in pending["segments"].values())
+
+    def close(self) -> None:
+        """Stops the flush thread and writes out pending updates."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=self._flush_interval)
+        self.flush()
+
+
+def flush_segments() -> None:
+    """Adds pending updates to ``SEGMENTS_PATH`` now. The Lambda handler calls
+    this after each invocation, because Lambda freezes the flush thread between
+    invocations and may reclaim the environment without warning; the flush is
+    one small local file rewrite."""
+    if _segments is not None:
+        _segments.flush()
+
+
+def get_segments(feature_names: list[str]) -> SegmentAggregator | None:
+    """Returns the process-wide segment aggregator, or ``None`` when disabled.
+
+    Aggregates are disabled with a warning if the directory of
+    ``SEGMENTS_PATH`` cannot be created, so they never break scoring.
+
+    Args:
+        feature_names: Model feature order, used when the aggregator is created.
+    """
+    global _segments, _segments_loaded
+    if not _segments_loaded and SEGMENTS_ENABLED:
+        _segments_loaded = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(SEGMENTS_PATH)), exist_ok=True)
+        except OSError as e:
+            logger.warning("Cannot create segment aggregates directory ({}); segment aggregates disabled", e)
+            return None
+        _segments = SegmentAggregator(
+            feature_names,
+            SEGMENTS_PATH,
+            n_bins=SEGMENTS_HISTOGRAM_BINS,
+            high_risk_threshold=SEGMENTS_HIGH_RISK_THRESHOLD,
+            flush_interval=SEGMENTS_FLUSH_INTERVAL_SECONDS,
+        )
+        atexit.register(_segments.close)
+        logger.info("Segment aggregates enabled: {}", SEGMENTS_PATH)
+    return _segments
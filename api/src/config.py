@@ -6,3 +6,94 @@ SAGEMAKER_ENDPOINT_NAME: str = os.environ.get(
 )
 AWS_REGION: str = os.environ.get("AWS_REGION", "eu-central-1")
 CHURN_THRESHOLD: float = float(os.environ.get("CHURN_THRESHOLD", "0.5"))
+
+# Maximum rows per SageMaker invocation (keeps CSV bodies under the 6 MB payload limit)
+SAGEMAKER_MAX_BATCH_ROWS: int = int(os.environ.get("SAGEMAKER_MAX_BATCH_ROWS", "1000"))
+# Maximum rows accepted by a single /predict/batch request
+BATCH_MAX_ROWS: int = int(os.environ.get("BATCH_MAX_ROWS", "10000"))
+
+ARTIFACTS_DIR: str = os.environ.get("ARTIFACTS_DIR", "/var/task/artifacts")
+FEATURE_INDEX_DIR: str = os.environ.get(
+    "FEATURE_INDEX_DIR",
+    os.path.join(ARTIFACTS_DIR, "feature_index"),
+)
+
+# Version label stored with captured predictions
+MODEL_VERSION: str = os.environ.get("MODEL_VERSION", SAGEMAKER_ENDPOINT_NAME)
+
+# Prediction capture (off by default; see api_components/capture)
+CAPTURE_ENABLED: bool = os.environ.get("CAPTURE_ENABLED", "false").lower() == "true"
+CAPTURE_SINK: str = os.environ.get("CAPTURE_SINK", "local")
+CAPTURE_SAMPLE_RATE: float = float(os.environ.get("CAPTURE_SAMPLE_RATE", "1.0"))
+CAPTURE_MAX_RECORDS: int = int(os.environ.get("CAPTURE_MAX_RECORDS", "10000"))
+CAPTURE_FLUSH_BATCH_SIZE: int = int(os.environ.get("CAPTURE_FLUSH_BATCH_SIZE", "1000"))
+CAPTURE_FLUSH_INTERVAL_SECONDS: float = float(os.environ.get("CAPTURE_FLUSH_INTERVAL_SECONDS", "30"))
+CAPTURE_DIR: str = os.environ.get("CAPTURE_DIR", "/tmp/captures")
+CAPTURE_MAX_FILE_BYTES: int = int(os.environ.get("CAPTURE_MAX_FILE_BYTES", str(64 * 1024 * 1024)))
+CAPTURE_MAX_FILES: int = int(os.environ.get("CAPTURE_MAX_FILES", "50"))
+CAPTURE_S3_BUCKET: str = os.environ.get("CAPTURE_S3_BUCKET", "")
+CAPTURE_S3_PREFIX: str = os.environ.get("CAPTURE_S3_PREFIX", "captures")
+
+# Feature-drift monitoring against the training reference
+DRIFT_ENABLED: bool = os.environ.get("DRIFT_ENABLED", "true").lower() == "true"
+DRIFT_REFERENCE_PATH: str = os.environ.get(
+    "DRIFT_REFERENCE_PATH",
+    os.path.join(ARTIFACTS_DIR, "drift_reference.json"),
+)
+DRIFT_WINDOW_SECONDS: int = int(os.environ.get("DRIFT_WINDOW_SECONDS", "300"))
+DRIFT_NUM_WINDOWS: int = int(os.environ.get("DRIFT_NUM_WINDOWS", "12"))
+DRIFT_PSI_ALERT: float = float(os.environ.get("DRIFT_PSI_ALERT", "0.2"))
+# Directory where each worker on a host flushes its windows for the others to read
+DRIFT_DIR: str = os.environ.get("DRIFT_DIR", "/tmp/drift")
+DRIFT_FLUSH_INTERVAL_SECONDS: float = float(os.environ.get("DRIFT_FLUSH_INTERVAL_SECONDS", "10"))
+
+# Optional SageMaker runtime URL override (e.g. a local stub for load tests)
+SAGEMAKER_ENDPOINT_URL: str | None = os.environ.get("SAGEMAKER_ENDPOINT_URL") or None
+
+# Pre-fork production server (serve.py)
+SERVER_HOST: str = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.environ.get("SERVER_PORT", "8000"))
+SERVER_WORKERS: int = int(os.environ.get("SERVER_WORKERS", str(os.cpu_count() or 1)))
+SERVER_BACKLOG: int = int(os.environ.get("SERVER_BACKLOG", "2048"))
+# Seconds /ready reports draining before workers stop accepting connections
+SERVER_DRAIN_SECONDS: float = float(os.environ.get("SERVER_DRAIN_SECONDS", "5"))
+# Seconds workers wait for in-flight requests before being killed
+SERVER_GRACEFUL_TIMEOUT: float = float(os.environ.get("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_ACCESS_LOG: bool = os.environ.get("SERVER_ACCESS_LOG", "false").lower() == "true"
+# Seconds a readiness result is reused before the endpoint is probed again
+READINESS_CACHE_SECONDS: float = float(os.environ.get("READINESS_CACHE_SECONDS", "15"))
+
+# Retention-offer search (/recommend)
+RECOMMEND_BEAM_WIDTH: int = int(os.environ.get("RECOMMEND_BEAM_WIDTH", "8"))
+RECOMMEND_MAX_CHANGES: int = int(os.environ.get("RECOMMEND_MAX_CHANGES", "3"))
+RECOMMEND_MAX_OPTIONS: int = int(os.environ.get("RECOMMEND_MAX_OPTIONS", "5"))
+RECOMMEND_LATENCY_BUDGET_MS: float = float(os.environ.get("RECOMMEND_LATENCY_BUDGET_MS", "1500"))
+
+# Per-request feature attributions (?explain=true); need numpy (explain group) and the tree model dump
+EXPLAIN_MODEL_PATH: str = os.environ.get(
+    "EXPLAIN_MODEL_PATH",
+    os.path.join(ARTIFACTS_DIR, "xgboost-model.json"),
+)
+# Rows explained per vectorized block (bounds memory per request)
+EXPLAIN_BLOCK_ROWS: int = int(os.environ.get("EXPLAIN_BLOCK_ROWS", "64"))
+
+# Per-segment churn risk aggregates (/segments), shared by the workers on a host through SEGMENTS_PATH
+SEGMENTS_ENABLED: bool = os.environ.get("SEGMENTS_ENABLED", "true").lower() == "true"
+SEGMENTS_PATH: str = os.environ.get("SEGMENTS_PATH", "/tmp/segments/segments.json")
+SEGMENTS_FLUSH_INTERVAL_SECONDS: float = float(os.environ.get("SEGMENTS_FLUSH_INTERVAL_SECONDS", "10"))
+SEGMENTS_HISTOGRAM_BINS: int = int(os.environ.get("SEGMENTS_HISTOGRAM_BINS", "10"))
+SEGMENTS_HIGH_RISK_THRESHOLD: float = float(os.environ.get("SEGMENTS_HIGH_RISK_THRESHOLD", str(CHURN_THRESHOLD)))
+
+# NDJSON streaming (Accept: application/x-ndjson) and response compression
+STREAM_MAX_ROWS: int = int(os.environ.get("STREAM_MAX_ROWS", "100000"))
+COMPRESSION_MIN_BYTES: int = int(os.environ.get("COMPRESSION_MIN_BYTES", "1000"))
+
+# On-demand sampling profiler; off unless a token or a sample rate is set
+PROFILER_ADMIN_TOKEN: str | None = os.environ.get("PROFILER_ADMIN_TOKEN") or None
+PROFILER_SAMPLE_RATE: float = float(os.environ.get("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL_MS: float = float(os.environ.get("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_SECONDS: float = float(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+PROFILER_OUTPUT_DIR: str = os.environ.get("PROFILER_OUTPUT_DIR", "/tmp/profiles")
+PROFILER_REQUEST_WINDOW_SECONDS: float = float(os.environ.get("PROFILER_REQUEST_WINDOW_SECONDS", "300"))
+PROFILER_WRITE_INTERVAL_SECONDS: float = float(os.environ.get("PROFILER_WRITE_INTERVAL_SECONDS", "30"))
+PROFILER_MAX_FILES: int = int(os.environ.get("PROFILER_MAX_FILES", "50"))
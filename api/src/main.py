@@ -1,76 +1,451 @@
 """FastAPI application for churn prediction, deployed as AWS Lambda via Mangum."""
 
+import hmac
+import itertools
+import json
+from collections.abc import Iterator
+
 from botocore.exceptions import ClientError
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from loguru import logger
 from mangum import Mangum
 
-from api_components.predict.predict import make_prediction
-from api_components.predict.models import PredictionRequest, PredictionResponse
+from api_components.capture.capture import flush_capture_if_due, get_capture, install_shutdown_handler
+from api_components.compression.compression import CompressionMiddleware
+from api_components.explain.explain import ExplanationUnavailableError
+from api_components.health.readiness import check_readiness
+from api_components.lookup.lookup import predict_customers, stream_customers
+from api_components.lookup.models import (
+    CustomerLookupRequest,
+    CustomerLookupResponse,
+    CustomerPrediction,
+)
+from api_components.monitoring.drift import get_drift_monitor, merge_snapshots
+from api_components.monitoring.models import DriftSnapshotsRequest
+from api_components.predict.columnar import ColumnValidationError, predict_columns, stream_columns
+from api_components.predict.predict import FEATURE_NAMES, make_prediction
+from api_components.predict.models import (
+    ColumnarPredictionRequest,
+    ColumnarPredictionResponse,
+    PredictionRequest,
+    PredictionResponse,
+)
+from api_components.profiling.models import ProfileRequest, ProfileResponse
+from api_components.profiling.profiler import ProfilingMiddleware, get_profiler
+from api_components.recommend.models import RecommendationResponse
+from api_components.recommend.recommend import recommend
+from api_components.segments.models import (
+    SegmentDimension,
+    SegmentSnapshotsRequest,
+    SegmentsResponse,
+)
+from api_components.segments.segments import (
+    flush_segments,
+    get_segments,
+    merge_snapshots as merge_segment_snapshots,
+    rollup,
+)
+from config import COMPRESSION_MIN_BYTES, PROFILER_ADMIN_TOKEN, PROFILER_MAX_SECONDS, PROFILER_SAMPLE_RATE
+
+# Media type clients send in Accept to get streamed results
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 app = FastAPI(
     title="Telco Customer Churn Prediction API",
     version="1.0.0",
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+# Installed only when requests are sampled, so profiling costs nothing when off
+if PROFILER_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware, profiler=get_profiler(), sample_rate=PROFILER_SAMPLE_RATE)
 
 
-@app.get("/health")
-def health_check():
-    """Returns a simple health status for readiness probes."""
-    return {"status": "healthy"}
+def _prediction_error(e: Exception) -> HTTPException:
+    """Maps an exception raised while scoring to an HTTP error.
 
-
-@app.post("/predict", response_model=PredictionResponse)
-def predict(payload: PredictionRequest):
-    """Accepts customer features and returns a churn prediction.
+    Must be called from inside the ``except`` block so unexpected errors are
+    logged with their traceback.
 
     Args:
-        payload: Customer feature data validated by Pydantic.
+        e: The exception caught by the route.
 
     Returns:
-        PredictionResponse with churn probability and boolean churn flag.
-
-    Raises:
-        HTTPException: On SageMaker errors, missing fields, or invalid data.
+        HTTPException to raise to the client.
     """
-    try:
-        result = make_prediction(payload.model_dump())
-        return PredictionResponse(**result)
-    except ClientError as e:
+    if isinstance(e, ClientError):
         error_code = e.response["Error"]["Code"]
         logger.error("SageMaker error [{}]: {}", error_code, e)
         if error_code == "ValidationError":
-            raise HTTPException(
+            return HTTPException(
                 status_code=422,
                 detail="Invalid input: SageMaker rejected the feature vector.",
             )
         if error_code == "ModelNotReadyException":
-            raise HTTPException(
+            return HTTPException(
                 status_code=503,
                 detail="Model endpoint is not ready. Please try again shortly.",
             )
-        raise HTTPException(
+        return HTTPException(
             status_code=502,
             detail="SageMaker endpoint error. Please try again later.",
         )
-    except KeyError as e:
+    if isinstance(e, ExplanationUnavailableError):
+        return HTTPException(status_code=e.status_code, detail=str(e))
+    if isinstance(e, KeyError):
         logger.error("Missing payload field: {}", e)
-        raise HTTPException(
+        return HTTPException(
             status_code=422,
             detail=f"Missing required field: {e}",
         )
-    except (ValueError, TypeError) as e:
+    if isinstance(e, (ValueError, TypeError)):
         logger.error("Preprocessing error: {}", e)
-        raise HTTPException(
+        return HTTPException(
             status_code=422,
             detail=f"Invalid input data: {e}",
         )
+    logger.exception("Unexpected error during prediction")
+    return HTTPException(
+        status_code=500,
+        detail="Internal server error. Please try again later.",
+    )
+
+
+def _wants_ndjson(accept: str | None) -> bool:
+    """Returns whether the client asked for an NDJSON stream via ``Accept``."""
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+def _ndjson_response(chunks: Iterator[dict]) -> StreamingResponse:
+    """Streams result chunks as newline-delimited JSON, one line per chunk.
+
+    The first chunk is computed before the response starts, so failures up
+    to then still map to HTTP status codes. A later failure ends the stream
+    with an ``{"error": {"status_code": ..., "detail": ...}}`` line.
+
+    Must be called from inside the route's ``try`` block.
+    """
+    first = next(chunks)
+
+    def lines() -> Iterator[bytes]:
+        try:
+            for chunk in itertools.chain([first], chunks):
+                yield json.dumps(chunk, separators=(",", ":")).encode() + b"\n"
+        except Exception as e:
+            error = _prediction_error(e)
+            yield json.dumps({"error": {"status_code": error.status_code, "detail": error.detail}}).encode() + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get("/health")
+def health_check():
+    """Returns a simple health status for liveness probes."""
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+def readiness_check():
+    """Reports whether this worker can score requests.
+
+    Returns 503 while the server is draining or the SageMaker endpoint does
+    not answer a probe row. The probe result is cached for
+    ``READINESS_CACHE_SECONDS``.
+    """
+    status = check_readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
+def predict(payload: PredictionRequest, explain: bool = False):
+    """Accepts customer features and returns a churn prediction.
+
+    Args:
+        payload: Customer feature data validated by Pydantic.
+        explain: Query flag; adds per-field ``contributions`` and ``base_value``
+            (log-odds) computed with TreeSHAP.
+
+    Returns:
+        PredictionResponse with churn probability and boolean churn flag.
+
+    Raises:
+        HTTPException: On SageMaker errors, missing fields, or invalid data;
+            501/503 if explanations are requested but not available.
+    """
+    try:
+        result = make_prediction(payload.model_dump(), explain)
+        return PredictionResponse(**result)
+    except Exception as e:
+        raise _prediction_error(e)
+
+
+@app.post("/predict/batch", response_model=ColumnarPredictionResponse, response_model_exclude_none=True)
+def predict_batch(
+    payload: ColumnarPredictionRequest,
+    explain: bool = False,
+    record: bool = True,
+    accept: str | None = Header(None),
+):
+    """Scores many customers sent as column-major JSON.
+
+    Validation runs over whole columns instead of building one Pydantic model
+    per customer, and the columns feed the batch feature transform directly.
+    With ``Accept: application/x-ndjson`` the response is streamed, one
+    column-major line per SageMaker batch with its row ``offset``, and up to
+    ``STREAM_MAX_ROWS`` rows are accepted.
+
+    Args:
+        payload: ``columns`` mapping each ``PredictionRequest`` field to a list.
+        explain: Query flag; adds column-major ``contributions`` and ``base_value``.
+        record: Query flag; ``false`` for synthetic rows (e.g. what-if grids),
+            which are then kept out of drift monitoring, segment aggregates
+            and capture, like ``/recommend`` candidates.
+        accept: ``Accept`` header, used to select NDJSON streaming.
+
+    Returns:
+        ColumnarPredictionResponse with per-row probabilities and churn flags,
+        or the NDJSON stream.
+
+    Raises:
+        HTTPException: 422 with row-indexed errors on invalid input, plus the
+            ``/predict`` errors.
+    """
+    try:
+        if _wants_ndjson(accept):
+            return _ndjson_response(stream_columns(payload.columns, explain, record))
+        return ColumnarPredictionResponse(**predict_columns(payload.columns, explain, record))
+    except ColumnValidationError as e:
+        logger.error("Batch validation failed: {}", e)
+        raise HTTPException(status_code=422, detail=e.errors)
     except Exception as e:
-        logger.exception("Unexpected error during prediction")
+        raise _prediction_error(e)
+
+
+@app.post("/recommend", response_model=RecommendationResponse)
+def recommend_offers(payload: PredictionRequest):
+    """Finds the fewest actionable changes that bring a customer below the churn threshold.
+
+    Searches contract, payment method, paperless billing and (with internet
+    service) add-on services with a batched beam search capped by
+    ``RECOMMEND_LATENCY_BUDGET_MS``.
+
+    Args:
+        payload: Customer feature data validated by Pydantic.
+
+    Returns:
+        RecommendationResponse with the current prediction and ranked options.
+
+    Raises:
+        HTTPException: On the same errors as ``/predict``.
+    """
+    try:
+        return RecommendationResponse(**recommend(payload.model_dump()))
+    except Exception as e:
+        raise _prediction_error(e)
+
+
+def _lookup(customer_ids: list[str], explain: bool = False, stream: bool = False):
+    """Runs an ID lookup, mapping a missing index to 503.
+
+    Returns ``predict_customers``' results, or an NDJSON response if ``stream`` is set.
+    """
+    try:
+        if stream:
+            return _ndjson_response(stream_customers(customer_ids, explain))
+        return predict_customers(customer_ids, explain)
+    except FileNotFoundError:
+        logger.error("Feature index not found; build it with api_components.lookup.build")
         raise HTTPException(
-            status_code=500,
-            detail="Internal server error. Please try again later.",
+            status_code=503,
+            detail="Customer lookup is not available: feature index has not been built.",
         )
+    except Exception as e:
+        raise _prediction_error(e)
+
+
+@app.get("/predict/by-id/{customer_id}", response_model=PredictionResponse, response_model_exclude_none=True)
+def predict_by_id(customer_id: str, explain: bool = False):
+    """Returns a churn prediction for a customer in the precomputed feature index.
+
+    Args:
+        customer_id: The customer's ``customerID``.
+        explain: Query flag; adds per-field ``contributions`` and ``base_value``.
+
+    Returns:
+        PredictionResponse with churn probability and boolean churn flag.
+
+    Raises:
+        HTTPException: 404 if the customer is not indexed, plus the ``/predict`` errors.
+    """
+    results, _ = _lookup([customer_id], explain)
+    if not results:
+        raise HTTPException(status_code=404, detail=f"Customer not found: {customer_id}")
+    return PredictionResponse(**results[0])
+
+
+@app.post("/predict/by-id", response_model=CustomerLookupResponse, response_model_exclude_none=True)
+def predict_by_ids(payload: CustomerLookupRequest, explain: bool = False, accept: str | None = Header(None)):
+    """Scores many indexed customers in one call.
 
+    With ``Accept: application/x-ndjson`` the response is streamed, one
+    ``CustomerLookupResponse``-shaped line per SageMaker batch; ``not_found``
+    is only filled in the first line.
 
-handler = Mangum(app, lifespan="off", api_gateway_base_path="/v1")
+    Args:
+        payload: List of ``customerIDs`` to look up.
+        explain: Query flag; adds per-field ``contributions`` and ``base_value``.
+        accept: ``Accept`` header, used to select NDJSON streaming.
+
+    Returns:
+        CustomerLookupResponse with predictions for found customers and the
+        IDs that are not in the index, or the NDJSON stream.
+    """
+    if _wants_ndjson(accept):
+        return _lookup(payload.customerIDs, explain, stream=True)
+    results, not_found = _lookup(payload.customerIDs, explain)
+    return CustomerLookupResponse(
+        predictions=[CustomerPrediction(**r) for r in results],
+        not_found=not_found,
+    )
+
+
+@app.get("/monitoring/capture")
+def capture_stats():
+    """Returns this worker's prediction capture counters.
+
+    Raises:
+        HTTPException: 404 if prediction capture is disabled.
+    """
+    capture = get_capture(FEATURE_NAMES)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Prediction capture is disabled.")
+    return capture.stats()
+
+
+def _drift_monitor():
+    """Returns the drift monitor, mapping a disabled monitor to 404."""
+    monitor = get_drift_monitor(FEATURE_NAMES)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled.")
+    return monitor
+
+
+@app.get("/monitoring/drift")
+def drift_scores():
+    """Returns PSI/KS drift scores for the sliding window of every worker on the host."""
+    return _drift_monitor().scores()
+
+
+@app.get("/monitoring/drift/snapshot")
+def drift_snapshot():
+    """Returns the host's raw window statistics for cross-host merging."""
+    return _drift_monitor().host_snapshot()
+
+
+@app.post("/monitoring/drift/scores")
+def merged_drift_scores(payload: DriftSnapshotsRequest):
+    """Merges snapshots collected from several hosts and scores the result.
+
+    Raises:
+        HTTPException: 422 if the snapshots cannot be merged.
+    """
+    monitor = _drift_monitor()
+    try:
+        return monitor.scores(merge_snapshots(payload.snapshots))
+    except (KeyError, ValueError, TypeError) as e:
+        logger.error("Invalid drift snapshots: {}", e)
+        raise HTTPException(status_code=422, detail=f"Invalid drift snapshots: {e}")
+
+
+def _segments():
+    """Returns the segment aggregator, mapping disabled aggregates to 404."""
+    segments = get_segments(FEATURE_NAMES)
+    if segments is None:
+        raise HTTPException(status_code=404, detail="Segment aggregates are disabled.")
+    return segments
+
+
+@app.get("/segments", response_model=SegmentsResponse, response_model_exclude_none=True)
+def segment_risk(group_by: list[SegmentDimension] | None = Query(None)):
+    """Returns churn risk per contract, internet service, payment method and tenure group.
+
+    Covers every prediction flushed by the workers on this host plus this
+    worker's pending ones. Cost depends on the number of segments, not on
+    the number of customers scored.
+
+    Args:
+        group_by: Dimensions to break down by (repeatable); the others are
+            rolled up. Defaults to all four.
+    """
+    return rollup(_segments().snapshot(), group_by)
+
+
+@app.get("/segments/snapshot")
+def segment_snapshot():
+    """Returns this host's raw segment aggregates for cross-host merging."""
+    return _segments().snapshot()
+
+
+@app.post("/segments/merge", response_model=SegmentsResponse, response_model_exclude_none=True)
+def merged_segment_risk(payload: SegmentSnapshotsRequest):
+    """Merges snapshots collected from several hosts and summarizes the result.
+
+    Raises:
+        HTTPException: 422 if the snapshots cannot be merged.
+    """
+    try:
+        return rollup(merge_segment_snapshots(payload.snapshots), payload.group_by)
+    except (KeyError, ValueError, TypeError, AttributeError) as e:
+        logger.error("Invalid segment snapshots: {}", e)
+        raise HTTPException(status_code=422, detail=f"Invalid segment snapshots: {e}")
+
+
+@app.post("/admin/profile", response_model=ProfileResponse)
+def profile_worker(payload: ProfileRequest, x_admin_token: str | None = Header(None)):
+    """Samples this worker's stacks for a while and writes a collapsed-stack profile.
+
+    Blocks for ``duration_seconds``. Under ``serve.py`` the request lands on
+    one worker; in Lambda it only sees its own invocation, so use
+    ``PROFILER_SAMPLE_RATE`` there instead.
+
+    Args:
+        payload: ``duration_seconds`` to sample, up to ``PROFILER_MAX_SECONDS``.
+        x_admin_token: Must equal ``PROFILER_ADMIN_TOKEN``.
+
+    Raises:
+        HTTPException: 404 without ``PROFILER_ADMIN_TOKEN``, 401 on a wrong
+            token, 422 on a too long duration, 500 if the profile cannot be written.
+    """
+    if not PROFILER_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), PROFILER_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+    if payload.duration_seconds > PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"duration_seconds must be at most {PROFILER_MAX_SECONDS:g}.",
+        )
+    try:
+        return get_profiler().profile(payload.duration_seconds)
+    except OSError as e:
+        logger.exception("Failed to write profile")
+        raise HTTPException(status_code=500, detail=f"Could not write profile: {e}")
+
+
+_mangum = Mangum(app, lifespan="off", api_gateway_base_path="/v1")
+install_shutdown_handler()
+
+
+def handler(event, context):
+    """Lambda entry point: serves one invocation through Mangum.
+
+    Lambda freezes the flush threads between invocations. The capture's
+    batch-size and age triggers are checked here after each invocation, and
+    the rest of its buffer is flushed on ``SIGTERM``. Segment updates are
+    added to their local file after every invocation.
+    """
+    try:
+        return _mangum(event, context)
+    finally:
+        flush_capture_if_due()
+        flush_segments()
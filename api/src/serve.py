@@ -0,0 +1,172 @@
+"""Pre-fork production server for the prediction API (local, ECS and EC2).
+
+The master process imports the app and preloads everything workers share:
+model parameters, the parsed botocore service model, the memory-mapped
+feature index and the drift reference. It then binds one listening socket
+and forks ``SERVER_WORKERS`` uvicorn workers (uvloop event loop, httptools
+parser) that accept from it, so the preloaded pages are shared copy-on-write
+instead of being rebuilt per worker.
+
+On SIGTERM or SIGINT the master marks the server as draining, so ``/ready``
+returns 503 in every worker while they keep serving for
+``SERVER_DRAIN_SECONDS``. Workers are then asked to stop accepting, finish
+in-flight requests and exit; any still running after
+``SERVER_GRACEFUL_TIMEOUT`` are killed. Workers that die while the server is
+running are replaced.
+
+Run from ``api/src`` (the Lambda image keeps using the Mangum ``handler``):
+
+    python serve.py
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+from loguru import logger
+
+from api_components.health.readiness import mark_draining
+from api_components.lookup.lookup import _get_feature_index
+from api_components.predict.predict import preload
+from config import (
+    SERVER_ACCESS_LOG,
+    SERVER_BACKLOG,
+    SERVER_DRAIN_SECONDS,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+)
+from main import app
+
+# Signals handled synchronously by the master via sigwaitinfo
+_MASTER_SIGNALS = {signal.SIGTERM, signal.SIGINT, signal.SIGCHLD}
+
+# A worker exiting this soon after being forked is treated as a boot failure
+_MIN_WORKER_SECONDS = 1.0
+
+
+def _preload() -> None:
+    """Loads shared state in the master before any worker is forked."""
+    preload()
+    try:
+        _get_feature_index()
+    except FileNotFoundError:
+        logger.warning("Feature index not found; lookup routes will return 503")
+    # Preloaded objects move to a permanent generation, so garbage collection
+    # in the workers does not write to (and thereby copy) their pages
+    gc.freeze()
+
+
+def _bind() -> socket.socket:
+    family = socket.AF_INET6 if ":" in SERVER_HOST else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((SERVER_HOST, SERVER_PORT))
+    sock.listen(SERVER_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket) -> None:
+    """Serves the preloaded app on the inherited socket until SIGTERM."""
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, _MASTER_SIGNALS)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="off",
+        access_log=SERVER_ACCESS_LOG,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks, supervises and drains the worker processes.
+
+    Args:
+        sock: Bound listening socket shared by all workers.
+        n_workers: Number of worker processes to keep running.
+    """
+
+    def __init__(self, sock: socket.socket, n_workers: int):
+        self._sock = sock
+        self._n_workers = n_workers
+        self._workers: dict[int, float] = {}
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self._sock)
+            sys.exit(0)
+        self._workers[pid] = time.monotonic()
+        logger.info("Started worker {}", pid)
+
+    def _reap(self) -> list[tuple[int, int, float]]:
+        """Collects exited workers as ``(pid, exit code, seconds alive)``."""
+        exited = []
+        while self._workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self._workers.pop(pid, None)
+            if started is not None:
+                exited.append((pid, os.waitstatus_to_exitcode(status), time.monotonic() - started))
+        return exited
+
+    def run(self) -> None:
+        """Runs workers until SIGTERM/SIGINT, then drains and stops them."""
+        signal.pthread_sigmask(signal.SIG_BLOCK, _MASTER_SIGNALS)
+        for _ in range(self._n_workers):
+            self._spawn()
+        logger.info("Serving on {}:{} with {} workers", SERVER_HOST, SERVER_PORT, self._n_workers)
+
+        while True:
+            signum = signal.sigwaitinfo(_MASTER_SIGNALS).si_signo
+            if signum != signal.SIGCHLD:
+                break
+            for pid, code, alive in self._reap():
+                if alive < _MIN_WORKER_SECONDS:
+                    logger.error("Worker {} failed to boot (exit code {}); shutting down", pid, code)
+                    self._stop(drain_seconds=0)
+                    sys.exit(1)
+                logger.warning("Worker {} exited with code {}; starting a replacement", pid, code)
+                self._spawn()
+
+        logger.info("Received {}; draining", signal.Signals(signum).name)
+        self._stop(drain_seconds=SERVER_DRAIN_SECONDS)
+
+    def _stop(self, drain_seconds: float) -> None:
+        mark_draining()
+        time.sleep(drain_seconds)
+
+        for pid in self._workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + SERVER_GRACEFUL_TIMEOUT + 5
+        while self._workers and (remaining := deadline - time.monotonic()) > 0:
+            signal.sigtimedwait({signal.SIGCHLD}, remaining)
+            self._reap()
+
+        for pid in self._workers:
+            logger.warning("Worker {} did not stop in time; killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+        self._sock.close()
+        logger.info("Server stopped")
+
+
+def main():
+    logger.info("Preloading artifacts")
+    _preload()
+    Master(_bind(), SERVER_WORKERS).run()
+
+
+if __name__ == "__main__":
+    main()
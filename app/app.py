@@ -7,20 +7,29 @@ the prediction interface.
 Run with:  streamlit run app/app.py
 """
 
+import copy
+
 import streamlit as st
 import streamlit_authenticator as stauth
 import yaml
 from yaml.loader import SafeLoader
 
+from bulk import BulkJob
 from components import (
     inject_styles,
+    render_bulk_header,
+    render_bulk_job,
+    render_bulk_upload,
     render_form,
     render_header,
     render_results,
+    render_sensitivity,
     render_sidebar,
 )
 from config import PAGE_TITLE, PAGE_LAYOUT, SIDEBAR_STATE, AUTH_CONFIG_PATH
-from predict import make_prediction, PredictionError
+from predict import PredictionClient, PredictionError
+from profiling import rerun, section
+from sensitivity import LABELS, build_grid, summarize
 
 
 # Must be the first Streamlit command
@@ -30,46 +39,129 @@ st.set_page_config(
     initial_sidebar_state=SIDEBAR_STATE,
 )
 
-# Load authentication configuration
-with open(AUTH_CONFIG_PATH) as f:
-    auth_config = yaml.load(f, Loader=SafeLoader)
 
-authenticator = stauth.Authenticate(
-    auth_config["credentials"],
-    auth_config["cookie"]["name"],
-    auth_config["cookie"]["key"],
-    auth_config["cookie"]["expiry_days"],
-)
+@st.cache_resource
+def load_auth_config() -> dict:
+    """Parses ``auth_config.yaml`` once per process instead of on every rerun."""
+    with open(AUTH_CONFIG_PATH) as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+@st.cache_resource
+def get_client() -> PredictionClient:
+    """Returns the API client shared by all sessions (one connection pool)."""
+    return PredictionClient()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def score_sensitivity(payload: dict) -> dict:
+    """Scores the what-if grid around ``payload`` in one batched request.
 
-# Render login widget
-try:
-    authenticator.login()
-except Exception as e:
-    st.error(e)
+    The variants are synthetic customers, so they are sent with
+    ``record=False`` to stay out of drift monitoring, segments and capture.
+    Cached per payload, so widget interactions reuse the scored grid.
+    """
+    grid = build_grid(payload)
+    results = get_client().predict_batch([variant for _, _, variant in grid], record=False)
+    return summarize(grid, [r["churn_probability"] for r in results])
 
-if st.session_state.get("authentication_status"):
-    # Authenticated — show the application
-    authenticator.logout(button_name="Logout", location="sidebar", use_container_width=True)
 
-    inject_styles()
+def single_page() -> None:
+    """Scores one hand-entered customer."""
     render_header()
+    prediction_section()
 
-    payload = render_form()
+
+@st.fragment
+def prediction_section() -> None:
+    """Form and results; submitting the form reruns only this fragment."""
+    with section("form"):
+        payload = render_form()
 
     if payload is not None:
         with st.spinner("Analyzing customer data..."):
             try:
-                result = make_prediction(payload)
-                render_results(result)
+                st.session_state["last_result"] = get_client().predict(payload)
+                st.session_state["last_payload"] = payload
             except PredictionError as e:
                 st.error(str(e))
             except Exception as e:
                 st.error(f"An unexpected error occurred: {e}")
                 st.info("Please check your API endpoint configuration and try again.")
 
-    render_sidebar()
+    # Kept in session state so the results stay visible across reruns
+    if "last_result" in st.session_state:
+        results_section()
+
+
+@st.fragment
+def results_section() -> None:
+    """Results and what-if charts; widgets in here never rerun the form."""
+    with section("results"):
+        result = st.session_state["last_result"]
+        render_results(result)
+        with st.expander("What-if analysis", expanded=result["will_churn"]):
+            try:
+                with st.spinner("Scoring what-if scenarios..."):
+                    summary = score_sensitivity(st.session_state["last_payload"])
+                render_sensitivity(summary, LABELS)
+            except PredictionError as e:
+                st.error(str(e))
+
+
+def bulk_page() -> None:
+    """Scores an uploaded CSV in a background job polled by a fragment."""
+    render_bulk_header()
+
+    job = st.session_state.get("bulk_job")
+    upload = render_bulk_upload(running=job is not None and job.running)
+    if upload is not None:
+        if job is not None:
+            job.close()
+        job = BulkJob(upload, upload.name, get_client())
+        job.start()
+        st.session_state["bulk_job"] = job
+
+    if job is not None:
+        polling = job.running
+        st.fragment(render_bulk_job, run_every=1.0 if polling else None)(job, polling)
+
+
+with rerun():
+    with section("auth"):
+        auth_config = load_auth_config()
+        # The authenticator renders the cookie component and seeds session state,
+        # so it is built per run; copied because it updates the credentials in place
+        authenticator = stauth.Authenticate(
+            copy.deepcopy(auth_config["credentials"]),
+            auth_config["cookie"]["name"],
+            auth_config["cookie"]["key"],
+            auth_config["cookie"]["expiry_days"],
+            auto_hash=False,
+        )
+
+        # Render login widget
+        try:
+            authenticator.login()
+        except Exception as e:
+            st.error(e)
+
+    if st.session_state.get("authentication_status"):
+        # Authenticated — show the application
+        authenticator.logout(button_name="Logout", location="sidebar", use_container_width=True)
+
+        inject_styles()
+        page = st.navigation([
+            st.Page(single_page, title="Single Customer", default=True),
+            st.Page(bulk_page, title="Bulk CSV", url_path="bulk"),
+        ])
+        with section("page"):
+            page.run()
+
+        with section("sidebar"):
+            render_sidebar()
 
-elif st.session_state.get("authentication_status") is False:
-    st.error("Username or password is incorrect.")
-elif st.session_state.get("authentication_status") is None:
-    st.warning("Please enter your username and password to access the application.")
+    elif st.session_state.get("authentication_status") is False:
+        st.error("Username or password is incorrect.")
+    elif st.session_state.get("authentication_status") is None:
+        st.warning("Please enter your username and password to access the application.")
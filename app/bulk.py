@@ -0,0 +1,316 @@
+"""
+Telco Customer Churn Prediction — Bulk Scoring
+
+Scores an uploaded CSV in the raw dataset layout (``teleco-customer-churn.csv``)
+in a background thread, so progress can be polled across Streamlit reruns.
+
+Rows are parsed and validated as they are read, sent to ``/predict/batch`` in
+concurrent chunks, and written in input order to a CSV on disk with
+``churn_probability``, ``will_churn`` and ``error`` columns appended. At most
+``API_MAX_CONCURRENCY * 2`` chunks are held in memory at any time, whatever
+the size of the upload.
+"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import API_BATCH_ROWS, API_MAX_CONCURRENCY, BULK_MAX_ERRORS, BULK_PAGE_ROWS
+from predict import CancelToken, PredictionClient, PredictionError
+
+# Raw dataset column -> API payload field
+RAW_COLUMNS: dict[str, str] = {
+    "gender": "gender",
+    "SeniorCitizen": "seniorCitizen",
+    "Partner": "partner",
+    "Dependents": "dependents",
+    "tenure": "tenure",
+    "PhoneService": "phoneService",
+    "MultipleLines": "multipleLines",
+    "InternetService": "internetService",
+    "OnlineSecurity": "onlineSecurity",
+    "OnlineBackup": "onlineBackup",
+    "DeviceProtection": "deviceProtection",
+    "TechSupport": "techSupport",
+    "StreamingTV": "streamingTV",
+    "StreamingMovies": "streamingMovies",
+    "Contract": "contract",
+    "PaperlessBilling": "paperlessBilling",
+    "PaymentMethod": "paymentMethod",
+    "MonthlyCharges": "monthlyCharges",
+    "TotalCharges": "totalCharges",
+}
+
+YES_NO = {"Yes", "No"}
+INTERNET_ADDON = {"Yes", "No", "No internet service"}
+
+# Allowed values per categorical column, matching the form options
+CATEGORIES: dict[str, set[str]] = {
+    "gender": {"Male", "Female"},
+    "SeniorCitizen": {"0", "1", "Yes", "No"},
+    "Partner": YES_NO,
+    "Dependents": YES_NO,
+    "PhoneService": YES_NO,
+    "MultipleLines": {"Yes", "No", "No phone service"},
+    "InternetService": {"DSL", "Fiber optic", "No"},
+    "OnlineSecurity": INTERNET_ADDON,
+    "OnlineBackup": INTERNET_ADDON,
+    "DeviceProtection": INTERNET_ADDON,
+    "TechSupport": INTERNET_ADDON,
+    "StreamingTV": INTERNET_ADDON,
+    "StreamingMovies": INTERNET_ADDON,
+    "Contract": {"Month-to-month", "One year", "Two year"},
+    "PaperlessBilling": YES_NO,
+    "PaymentMethod": {
+        "Electronic check", "Mailed check",
+        "Bank transfer (automatic)", "Credit card (automatic)",
+    },
+}
+
+# Numeric column -> (type, min, max), matching the PredictionRequest constraints
+NUMERIC: dict[str, tuple[type, float, float]] = {
+    "tenure": (int, 0, 100),
+    "MonthlyCharges": (float, 0, 200),
+    "TotalCharges": (float, 0, 10000),
+}
+
+RESULT_COLUMNS: list[str] = ["churn_probability", "will_churn", "error"]
+
+
+class BulkInputError(ValueError):
+    """Raised when an uploaded file cannot be scored at all (e.g. missing columns)."""
+
+
+def parse_row(row: dict) -> dict:
+    """Validates one raw dataset row and converts it into an API payload.
+
+    ``SeniorCitizen`` may be ``0``/``1`` as in the dataset, and a blank
+    ``TotalCharges`` (new customers) is imputed with ``MonthlyCharges``.
+
+    Raises:
+        ValueError: With a message naming the first invalid column.
+    """
+    payload = {}
+    for column, options in CATEGORIES.items():
+        value = (row.get(column) or "").strip()
+        if value not in options:
+            raise ValueError(f"{column}: unexpected value {value!r}")
+        payload[RAW_COLUMNS[column]] = value
+    payload["seniorCitizen"] = {"1": "Yes", "0": "No"}.get(payload["seniorCitizen"], payload["seniorCitizen"])
+
+    raw = {column: (row.get(column) or "").strip() for column in NUMERIC}
+    if not raw["TotalCharges"]:
+        raw["TotalCharges"] = raw["MonthlyCharges"]
+    for column, (kind, low, high) in NUMERIC.items():
+        try:
+            value = kind(raw[column])
+        except ValueError:
+            raise ValueError(f"{column}: not a valid {kind.__name__}: {raw[column]!r}")
+        if not low <= value <= high:
+            raise ValueError(f"{column}: {value} outside [{low}, {high}]")
+        payload[RAW_COLUMNS[column]] = value
+    return payload
+
+
+class BulkJob:
+    """One bulk scoring run over an uploaded CSV.
+
+    Progress attributes (``rows_read``, ``rows_scored``, ``rows_invalid``,
+    ``rows_failed``, ``status``) may be read from any thread while the job
+    runs. Files live in a private temporary directory removed by ``close`` or
+    when the job is garbage collected. ``id`` is unique per job and keys the
+    job's widgets, so their state does not carry over to the next upload.
+
+    Args:
+        upload: Binary file-like object with the CSV contents.
+        file_name: Original file name, used for the download.
+        client: Shared API client.
+    """
+
+    def __init__(self, upload, file_name: str, client: PredictionClient):
+        self.id = uuid.uuid4().hex
+        self.file_name = file_name
+        self._client = client
+        self._dir = tempfile.mkdtemp(prefix="bulk-")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._dir, True)
+
+        self._input_path = os.path.join(self._dir, "input.csv")
+        self.output_path = os.path.join(self._dir, "scored.csv")
+        with open(self._input_path, "wb") as f:
+            shutil.copyfileobj(upload, f)
+        self._input_bytes = os.path.getsize(self._input_path)
+        self._bytes_read = 0
+
+        self.status = "pending"
+        self.message = ""
+        self.rows_read = 0
+        self.rows_scored = 0
+        self.rows_invalid = 0
+        self.rows_failed = 0
+        self.errors: list[tuple[int, str]] = []
+
+        # Byte offset of every BULK_PAGE_ROWS-th output row, for paging without loading the file
+        self._page_offsets = [0]
+        self._rows_written = 0
+        self._header: list[str] = []
+        self._write_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._cancel = CancelToken()
+        self._executor = ThreadPoolExecutor(max_workers=API_MAX_CONCURRENCY, thread_name_prefix="bulk-score")
+        self._thread = threading.Thread(target=self._run, name="bulk-job", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("pending", "running")
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the upload read and written, in ``[0, 1]``."""
+        if self.status == "done":
+            return 1.0
+        return min(self._bytes_read / max(self._input_bytes, 1), 1.0)
+
+    def start(self) -> None:
+        self.status = "running"
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stops reading, drops queued batches and aborts in-flight requests.
+
+        Streams of in-flight requests are closed, so the API stops scoring
+        their remaining SageMaker batches; a batch already being scored
+        still completes.
+        """
+        self._cancelled.set()
+        self._cancel.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """Cancels the job if running and deletes its files."""
+        self.cancel()
+        self._finalizer()
+
+    def _score(self, payloads: list[dict]) -> list[dict] | str:
+        """Scores one chunk, returning an error message instead of raising."""
+        try:
+            return self._client.predict_batch(payloads, self._cancel)
+        except PredictionError as e:
+            return str(e)
+
+    def _write(self, writer, out, rows: list[tuple[dict, dict | None, str]]) -> None:
+        """Appends scored rows to the output file and records page offsets."""
+        with self._write_lock:
+            for row, result, error in rows:
+                if self._rows_written and self._rows_written % BULK_PAGE_ROWS == 0:
+                    out.flush()
+                    self._page_offsets.append(out.buffer.tell())
+                values = [row.get(c, "") for c in self._header]
+                if result is not None:
+                    values += [f"{result['churn_probability']:.6f}", result["will_churn"], ""]
+                else:
+                    values += ["", "", error]
+                writer.writerow(values)
+                self._rows_written += 1
+            out.flush()
+
+    def _collect(self, writer, out, chunk) -> None:
+        """Waits for one submitted chunk and writes it, invalid rows included."""
+        rows, future, bytes_read = chunk
+        outcome = future.result() if future is not None else []
+        valid = [i for i, (_, payload, _) in enumerate(rows) if payload is not None]
+        results: list[dict | None] = [None] * len(rows)
+        errors = [error for _, _, error in rows]
+        if isinstance(outcome, str):
+            for i in valid:
+                errors[i] = outcome
+            self.rows_failed += len(valid)
+        else:
+            for i, result in zip(valid, outcome):
+                results[i] = result
+            self.rows_scored += len(valid)
+        self._write(writer, out, [(row, results[i], errors[i]) for i, (row, _, _) in enumerate(rows)])
+        self._bytes_read = bytes_read
+
+    def _read_chunks(self, reader):
+        """Yields lists of ``(row, payload or None, error)`` of up to ``API_BATCH_ROWS`` rows."""
+        chunk = []
+        for row in reader:
+            if self._cancelled.is_set():
+                return
+            self.rows_read += 1
+            try:
+                chunk.append((row, parse_row(row), ""))
+            except ValueError as e:
+                self.rows_invalid += 1
+                if len(self.errors) < BULK_MAX_ERRORS:
+                    self.errors.append((self.rows_read, str(e)))
+                chunk.append((row, None, str(e)))
+            if len(chunk) == API_BATCH_ROWS:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _run(self) -> None:
+        try:
+            with open(self._input_path, newline="", encoding="utf-8-sig") as src, \
+                    open(self.output_path, "w", newline="", encoding="utf-8") as out:
+                reader = csv.DictReader(src)
+                missing = [c for c in RAW_COLUMNS if c not in (reader.fieldnames or [])]
+                if missing:
+                    raise BulkInputError(f"Missing columns: {', '.join(missing)}")
+                self._header = list(reader.fieldnames)
+                writer = csv.writer(out)
+                writer.writerow(self._header + RESULT_COLUMNS)
+                out.flush()
+                self._page_offsets = [out.buffer.tell()]
+
+                pending = deque()
+                for rows in self._read_chunks(reader):
+                    if self._cancelled.is_set():
+                        break
+                    payloads = [payload for _, payload, _ in rows if payload is not None]
+                    future = self._executor.submit(self._score, payloads) if payloads else None
+                    # Position of the underlying binary file (ahead by at most one read buffer)
+                    pending.append((rows, future, src.buffer.tell()))
+                    # Bounded window: wait for the oldest chunk before reading further
+                    if len(pending) >= API_MAX_CONCURRENCY * 2:
+                        self._collect(writer, out, pending.popleft())
+                while pending and not self._cancelled.is_set():
+                    self._collect(writer, out, pending.popleft())
+
+            self.status = "cancelled" if self._cancelled.is_set() else "done"
+        except Exception as e:
+            self.status = "cancelled" if self._cancelled.is_set() else "failed"
+            self.message = str(e)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def n_pages(self) -> int:
+        return max(1, -(-self._rows_written // BULK_PAGE_ROWS))
+
+    def page(self, number: int) -> tuple[list[str], list[list[str]]]:
+        """Returns the header and rows of a 1-based output page written so far."""
+        with self._write_lock:
+            if not self._header or number > len(self._page_offsets):
+                return self._header + RESULT_COLUMNS, []
+            offset = self._page_offsets[number - 1]
+            n_rows = min(BULK_PAGE_ROWS, self._rows_written - (number - 1) * BULK_PAGE_ROWS)
+        with open(self.output_path, "rb") as f:
+            f.seek(offset)
+            text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+            rows = [row for _, row in zip(range(n_rows), csv.reader(text))]
+        return self._header + RESULT_COLUMNS, rows
+
+    def read_output(self) -> bytes:
+        """Returns the scored CSV written so far (used for deferred downloads)."""
+        with self._write_lock, open(self.output_path, "rb") as f:
+            return f.read()
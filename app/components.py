@@ -258,6 +258,74 @@ def render_results(result: dict) -> None:
             """
         )
 
+def render_sensitivity(summary: dict, labels: dict[str, str]) -> None:
+    """Displays what-if curves and a tornado chart for a scored variant grid.
+
+    All values come from the already-scored grid, so the sliders never call
+    the API.
+
+    Args:
+        summary: Output of ``sensitivity.summarize``.
+        labels: Display label per varied field.
+    """
+    st.subheader("What-if Sensitivity")
+    base = summary["base"] * 100
+    st.caption(f"Current churn probability: {base:.1f}%. Each factor is varied on its own.")
+
+    tornado = summary["tornado"]
+    st.markdown("**Impact range by factor** (percentage points vs. current)")
+    st.bar_chart(
+        {
+            "Factor": [labels[field] for field, _, _ in tornado],
+            "Lower": [low * 100 for _, low, _ in tornado],
+            "Higher": [high * 100 for _, _, high in tornado],
+        },
+        x="Factor",
+        y=["Lower", "Higher"],
+        color=["#16a34a", "#dc2626"],
+        horizontal=True,
+        stack=True,
+        sort=False,
+    )
+
+    for field, (values, probabilities) in summary["curves"].items():
+        st.markdown(f"**{labels[field]}**")
+        percents = [p * 100 for p in probabilities]
+        if isinstance(values[0], str):
+            st.bar_chart(
+                {labels[field]: values, "Churn probability (%)": percents},
+                x=labels[field],
+                y="Churn probability (%)",
+                horizontal=True,
+                sort=False,
+            )
+            continue
+
+        st.line_chart(
+            {labels[field]: values, "Churn probability (%)": percents},
+            x=labels[field],
+            y="Churn probability (%)",
+        )
+        _render_inspector(field, labels[field], values, percents, base)
+
+
+@st.fragment
+def _render_inspector(field: str, label: str, values: list, percents: list[float], base: float) -> None:
+    """Slider and metric for one sweep; moving the slider reruns only this fragment, not the charts."""
+    value = st.select_slider(
+        f"Inspect {label.lower()}",
+        options=values,
+        key=f"sensitivity_{field}",
+    )
+    probability = percents[values.index(value)]
+    st.metric(
+        label=f"Churn probability at {value:g}",
+        value=f"{probability:.1f}%",
+        delta=f"{probability - base:+.1f} pp",
+        delta_color="inverse",
+    )
+
+
 def render_sidebar() -> None:
     """Renders the sidebar with model info and usage instructions."""
     with st.sidebar:
@@ -284,3 +352,101 @@ def render_sidebar() -> None:
             3. View prediction results and recommendations
             """
         )
+
+def render_bulk_header() -> None:
+    """Renders the bulk scoring page title and the expected file layout."""
+    st.markdown(
+        '<p class="main-header">Bulk Churn Scoring</p>',
+        unsafe_allow_html=True,
+    )
+    st.markdown(
+        '<p class="sub-header">Upload a CSV in the raw dataset layout to score every customer</p>',
+        unsafe_allow_html=True,
+    )
+    st.caption(
+        "Required columns: gender, SeniorCitizen, Partner, Dependents, tenure, PhoneService, "
+        "MultipleLines, InternetService, OnlineSecurity, OnlineBackup, DeviceProtection, "
+        "TechSupport, StreamingTV, StreamingMovies, Contract, PaperlessBilling, PaymentMethod, "
+        "MonthlyCharges, TotalCharges. Other columns (e.g. customerID) are kept in the output."
+    )
+    st.divider()
+
+
+def render_bulk_upload(running: bool):
+    """Renders the CSV uploader and start button.
+
+    Args:
+        running: Whether a bulk job is in progress (disables starting another).
+
+    Returns:
+        The uploaded file if "Score File" was clicked, else ``None``.
+    """
+    upload = st.file_uploader("Customer CSV", type=["csv"], disabled=running)
+    start = st.button(
+        "Score File",
+        type="primary",
+        use_container_width=True,
+        disabled=running or upload is None,
+    )
+    return upload if start else None
+
+
+def render_bulk_job(job, polling: bool) -> None:
+    """Renders progress, validation errors and a paginated view of a bulk job.
+
+    Meant to run as a fragment that reruns every second while the job is in
+    progress; once it finishes, the whole app is rerun to stop polling.
+
+    Args:
+        job: The ``bulk.BulkJob`` being displayed.
+        polling: Whether this fragment was started with ``run_every``.
+    """
+    if polling and not job.running:
+        st.rerun()
+
+    processed = job.rows_scored + job.rows_invalid + job.rows_failed
+    st.progress(
+        job.progress,
+        text=f"{job.status.capitalize()}: {processed:,} rows processed",
+    )
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Scored", f"{job.rows_scored:,}")
+    col2.metric("Invalid rows", f"{job.rows_invalid:,}")
+    col3.metric("Failed (API errors)", f"{job.rows_failed:,}")
+
+    if job.status == "failed":
+        st.error(f"Bulk scoring failed: {job.message}")
+    elif job.status == "cancelled":
+        st.warning("Bulk scoring was cancelled. Rows scored so far are included in the download.")
+
+    if job.errors:
+        with st.expander(f"Validation errors (first {len(job.errors)})"):
+            st.dataframe(
+                [{"row": row, "error": error} for row, error in job.errors],
+                use_container_width=True,
+                hide_index=True,
+            )
+
+    page = st.number_input("Page", min_value=1, max_value=job.n_pages, value=1, key=f"bulk_page_{job.id}")
+    header, rows = job.page(page)
+    st.dataframe(
+        [dict(zip(header, row)) for row in rows],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if job.running:
+        if st.button("Cancel", use_container_width=True):
+            job.cancel()
+            st.rerun()
+    elif job.status in ("done", "cancelled"):
+        st.download_button(
+            "Download Scored CSV",
+            data=job.read_output,
+            file_name=f"{job.file_name.rsplit('.', 1)[0]}_scored.csv",
+            mime="text/csv",
+            on_click="ignore",
+            type="primary",
+            use_container_width=True,
+        )
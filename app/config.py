@@ -12,6 +12,18 @@ API_ENDPOINT: str = os.environ.get(
     "http://prediction-api:8000",
 )
 
+# Prediction API client (see predict.PredictionClient)
+API_TIMEOUT: float = float(os.environ.get("API_TIMEOUT", "60"))
+API_MAX_RETRIES: int = int(os.environ.get("API_MAX_RETRIES", "3"))
+API_RETRY_BACKOFF: float = float(os.environ.get("API_RETRY_BACKOFF", "0.5"))
+API_POOL_MAXSIZE: int = int(os.environ.get("API_POOL_MAXSIZE", "10"))
+API_MAX_CONCURRENCY: int = int(os.environ.get("API_MAX_CONCURRENCY", "4"))
+API_BATCH_ROWS: int = int(os.environ.get("API_BATCH_ROWS", "1000"))
+
+# Bulk CSV scoring page
+BULK_PAGE_ROWS: int = int(os.environ.get("BULK_PAGE_ROWS", "50"))
+BULK_MAX_ERRORS: int = int(os.environ.get("BULK_MAX_ERRORS", "100"))
+
 MODEL_ALGORITHM: str = "XGBoost"
 MODEL_ACCURACY: str = "77%"
 MODEL_AUC: str = "0.84"
@@ -20,4 +32,6 @@ PAGE_TITLE: str = "Telco Customer Churn Predictor"
 PAGE_LAYOUT: str = "centered"
 SIDEBAR_STATE: str = "expanded"
 
-AUTH_CONFIG_PATH: str = str(Path(__file__).parent / "auth_config.yaml")
\ No newline at end of file
+AUTH_CONFIG_PATH: str = str(Path(__file__).parent / "auth_config.yaml")
+# Debug: log the time spent in each section of every rerun (see profiling.py)
+APP_PROFILE_RERUNS: bool = os.environ.get("APP_PROFILE_RERUNS", "false").lower() == "true"
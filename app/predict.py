@@ -4,13 +4,32 @@ Telco Customer Churn Prediction — API Client
 Calls the FastAPI prediction API via HTTP and returns parsed predictions.
 """
 
+import asyncio
 import json
+import socket
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    API_BATCH_ROWS,
+    API_ENDPOINT,
+    API_MAX_CONCURRENCY,
+    API_MAX_RETRIES,
+    API_POOL_MAXSIZE,
+    API_RETRY_BACKOFF,
+    API_TIMEOUT,
+)
 
-from config import API_ENDPOINT
+# Streamed /predict/batch responses: one JSON object per line
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 class PredictionError(Exception):
@@ -19,88 +38,354 @@ class PredictionError(Exception):
         super().__init__(message)
 
 
-def make_signed_request(url: str, payload: dict) -> dict:
-    """Sends a SigV4-signed POST request to an AWS API Gateway endpoint.
+class CancelToken:
+    """Cancels streamed ``/predict/batch`` requests from another thread.
 
-    Args:
-        url: The full URL to send the request to.
-        payload: JSON-serializable request body.
-
-    Returns:
-        The ``requests.Response`` object.
+    Once ``cancel`` is called, requests using the token are not sent, and
+    streams that have started are aborted: their sockets are shut down, so a
+    thread blocked reading the next line wakes up, and the API stops scoring
+    the remaining SageMaker batches when it sees the disconnect. A SageMaker
+    batch already being scored still completes.
     """
-    session = boto3.Session()
-    credentials = session.get_credentials().get_frozen_credentials()
-
-    aws_request = AWSRequest(
-        method="POST",
-        url=url,
-        data=json.dumps(payload),
-        headers={"Content-Type": "application/json"},
-    )
 
-    SigV4Auth(credentials, "execute-api", session.region_name).add_auth(aws_request)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses: set[requests.Response] = set()
+        self.cancelled = False
 
-    response = requests.post(
-        url,
-        data=aws_request.data,
-        headers=dict(aws_request.headers),
-        timeout=60,
-    )
-    return response
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            responses = list(self._responses)
+        for response in responses:
+            _abort(response)
 
+    def _track(self, response: requests.Response) -> None:
+        with self._lock:
+            self._responses.add(response)
+            cancelled = self.cancelled
+        if cancelled:
+            _abort(response)
 
-def make_prediction(payload: dict) -> dict:
-    """Sends customer features to the prediction API and returns the result.
+    def _untrack(self, response: requests.Response) -> None:
+        with self._lock:
+            self._responses.discard(response)
 
-    Args:
-        payload: Customer feature dictionary produced by the input form.
 
-    Returns:
-        Dict with ``churn_probability`` (float) and ``will_churn`` (bool).
+def _abort(response: requests.Response) -> None:
+    """Shuts down the socket of a streamed response, waking any reader blocked on it."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
-    Raises:
-        PredictionError: With a user-friendly message describing what went wrong.
-    """
-    try:
-        response = make_signed_request(f"{API_ENDPOINT}/predict", payload)
-
-    except requests.ConnectionError:
-        raise PredictionError(
-            "Could not connect to the prediction service. Please check that the API is running."
-        )
-    except requests.Timeout:
-        raise PredictionError(
-            "The prediction service took too long to respond. Please try again."
-        )
-
-    if response.ok:
-        return response.json()
-
-    status = response.status_code
-    detail = ""
-    try:
-        detail = response.json().get("detail", "")
-    except (ValueError, AttributeError):
-        pass
 
+def _status_error(status: int, detail) -> PredictionError:
+    """Builds a ``PredictionError`` with a user-friendly message for an API error status."""
     if status == 422:
-        raise PredictionError(
+        return PredictionError(
             f"Invalid input data: {detail}" if detail else "The submitted data is invalid.",
             status_code=status,
         )
     if status == 502:
-        raise PredictionError(
+        return PredictionError(
             "The ML model endpoint is currently unavailable. Please try again later.",
             status_code=status,
         )
     if status == 503:
-        raise PredictionError(
+        return PredictionError(
             "The ML model is starting up. Please wait a moment and try again.",
             status_code=status,
         )
 
-    raise PredictionError(
+    return PredictionError(
         f"Prediction failed (HTTP {status}): {detail}" if detail else f"Prediction failed with status {status}.",
         status_code=status,
     )
+
+
+def _raise_for_status(response: requests.Response) -> None:
+    """Raises a ``PredictionError`` with a user-friendly message for error responses."""
+    if response.ok:
+        return
+
+    detail = ""
+    try:
+        detail = response.json().get("detail", "")
+    except (ValueError, AttributeError):
+        pass
+    raise _status_error(response.status_code, detail)
+
+
+def _batch_results(result: dict) -> list[dict]:
+    """Converts a column-major ``/predict/batch`` result into per-row result dicts."""
+    return [
+        {"churn_probability": p, "will_churn": c}
+        for p, c in zip(result["churn_probability"], result["will_churn"])
+    ]
+
+
+class PredictionClient:
+    """Reusable, thread-safe client for the prediction API.
+
+    Holds one boto3 session whose credentials are resolved once and refreshed
+    by botocore only when they near expiry, one SigV4 signer per credential
+    set, and a keep-alive connection pool, so repeated calls skip credential
+    resolution and TCP/TLS setup. 503 responses (model starting up, server
+    draining) are retried with exponential backoff.
+
+    Args:
+        base_url: Prediction API root URL.
+        timeout: Per-request timeout in seconds.
+        max_retries: Retries on connection errors and 503 responses.
+        backoff_factor: Backoff base in seconds; retry ``n`` waits
+            ``backoff_factor * 2 ** (n - 1)``.
+        pool_maxsize: Keep-alive connections kept per host.
+        max_concurrency: Requests ``predict_many`` sends in parallel.
+        batch_rows: Rows per ``/predict/batch`` request in ``predict_many``.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_ENDPOINT,
+        timeout: float = API_TIMEOUT,
+        max_retries: int = API_MAX_RETRIES,
+        backoff_factor: float = API_RETRY_BACKOFF,
+        pool_maxsize: int = API_POOL_MAXSIZE,
+        max_concurrency: int = API_MAX_CONCURRENCY,
+        batch_rows: int = API_BATCH_ROWS,
+    ):
+        self._base_url = base_url.rstrip("/")
+        self._timeout = timeout
+        self._batch_rows = batch_rows
+
+        session = boto3.Session()
+        self._region = session.region_name
+        # RefreshableCredentials for roles; refreshed lazily by get_frozen_credentials
+        self._credentials = session.get_credentials()
+        self._signer = None
+        self._signer_credentials = None
+        self._signer_lock = threading.Lock()
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=[503],
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(pool_maxsize, max_concurrency),
+            max_retries=retry,
+            pool_block=True,
+        )
+        self._http = requests.Session()
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="prediction-client")
+
+    def _get_signer(self) -> SigV4Auth | None:
+        """Returns a signer for the current credentials, or ``None`` if there are none."""
+        if self._credentials is None:
+            return None
+        frozen = self._credentials.get_frozen_credentials()
+        with self._signer_lock:
+            if frozen != self._signer_credentials:
+                self._signer = SigV4Auth(frozen, "execute-api", self._region)
+                self._signer_credentials = frozen
+            return self._signer
+
+    def _send(
+        self,
+        path: str,
+        payload: dict,
+        accept: str = "application/json",
+        stream: bool = False,
+    ) -> requests.Response:
+        """Sends a SigV4-signed JSON POST and returns the successful response.
+
+        Args:
+            path: API route.
+            payload: JSON request body.
+            accept: ``Accept`` header value.
+            stream: Leave the body unread, to be consumed incrementally.
+
+        Raises:
+            PredictionError: On connection errors, timeouts and error responses.
+        """
+        url = f"{self._base_url}{path}"
+        body = json.dumps(payload)
+        headers = {"Content-Type": "application/json", "Accept": accept}
+
+        signer = self._get_signer()
+        if signer is not None:
+            aws_request = AWSRequest(method="POST", url=url, data=body, headers=headers)
+            signer.add_auth(aws_request)
+            headers = dict(aws_request.headers)
+
+        try:
+            response = self._http.post(url, data=body, headers=headers, timeout=self._timeout, stream=stream)
+        except requests.ConnectionError:
+            raise PredictionError(
+                "Could not connect to the prediction service. Please check that the API is running."
+            )
+        except requests.Timeout:
+            raise PredictionError(
+                "The prediction service took too long to respond. Please try again."
+            )
+
+        _raise_for_status(response)
+        return response
+
+    def _post(self, path: str, payload: dict) -> dict:
+        """Sends a SigV4-signed JSON POST and returns the decoded response body.
+
+        Raises:
+            PredictionError: On connection errors, timeouts and error responses.
+        """
+        return self._send(path, payload).json()
+
+    def predict(self, payload: dict) -> dict:
+        """Sends customer features to the prediction API and returns the result.
+
+        Args:
+            payload: Customer feature dictionary produced by the input form.
+
+        Returns:
+            Dict with ``churn_probability`` (float) and ``will_churn`` (bool).
+
+        Raises:
+            PredictionError: With a user-friendly message describing what went wrong.
+        """
+        return self._post("/predict", payload)
+
+    def stream_batch(
+        self,
+        payloads: list[dict],
+        cancel: CancelToken | None = None,
+        record: bool = True,
+    ) -> Iterator[list[dict]]:
+        """Scores customers with one streamed ``/predict/batch`` request.
+
+        Asks for NDJSON, so the API sends one line per SageMaker batch; each
+        line is decoded and yielded as soon as it arrives, without buffering
+        the whole response. Up to the API's ``STREAM_MAX_ROWS`` rows are
+        accepted. An API that does not stream answers with one JSON body,
+        which is yielded as a single chunk.
+
+        Args:
+            payloads: Customer feature dictionaries with the same fields as ``predict``.
+            cancel: Token that aborts the request from another thread.
+            record: ``False`` for synthetic customers, which the API then
+                keeps out of drift monitoring, segment aggregates and capture.
+
+        Yields:
+            Result dicts for consecutive rows, in the order of ``payloads``.
+
+        Raises:
+            PredictionError: On errors before or during the stream, or when
+                ``cancel`` is cancelled.
+        """
+        cancelled = PredictionError("Scoring was cancelled.")
+        if cancel is not None and cancel.cancelled:
+            raise cancelled
+        columns = {field: [p[field] for p in payloads] for field in payloads[0]}
+        response = self._send(
+            "/predict/batch" if record else "/predict/batch?record=false",
+            {"columns": columns},
+            accept=f"{NDJSON_MEDIA_TYPE}, application/json;q=0.9",
+            stream=True,
+        )
+        if cancel is not None:
+            cancel._track(response)
+        try:
+            with response:
+                if not response.headers.get("Content-Type", "").startswith(NDJSON_MEDIA_TYPE):
+                    yield _batch_results(response.json())
+                    return
+                for line in response.iter_lines():
+                    if cancel is not None and cancel.cancelled:
+                        raise cancelled
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise _status_error(chunk["error"]["status_code"], chunk["error"]["detail"])
+                    yield _batch_results(chunk)
+        except (requests.RequestException, ValueError) as e:
+            if cancel is not None and cancel.cancelled:
+                raise cancelled
+            if isinstance(e, requests.RequestException):
+                raise PredictionError(
+                    "The connection to the prediction service was interrupted. Please try again."
+                )
+            raise
+        finally:
+            if cancel is not None:
+                cancel._untrack(response)
+
+    def predict_batch(
+        self,
+        payloads: list[dict],
+        cancel: CancelToken | None = None,
+        record: bool = True,
+    ) -> list[dict]:
+        """Scores customers with one ``/predict/batch`` request, read as a stream.
+
+        Args:
+            payloads: Customer feature dictionaries with the same fields as ``predict``.
+            cancel: Token that aborts the request from another thread.
+            record: As in ``stream_batch``.
+
+        Returns:
+            Result dicts in the same order as ``payloads``.
+
+        Raises:
+            PredictionError: With a user-friendly message describing what went wrong.
+        """
+        return [result for chunk in self.stream_batch(payloads, cancel, record) for result in chunk]
+
+    def _chunks(self, payloads: list[dict]) -> list[list[dict]]:
+        return [payloads[i:i + self._batch_rows] for i in range(0, len(payloads), self._batch_rows)]
+
+    def predict_many(self, payloads: list[dict]) -> list[dict]:
+        """Scores many customers through ``/predict/batch``, sending chunks concurrently.
+
+        Args:
+            payloads: Customer feature dictionaries with the same fields as ``predict``.
+
+        Returns:
+            Result dicts in the same order as ``payloads``.
+
+        Raises:
+            PredictionError: If any chunk fails.
+        """
+        results = []
+        for chunk in self._executor.map(self.predict_batch, self._chunks(payloads)):
+            results.extend(chunk)
+        return results
+
+    async def apredict(self, payload: dict) -> dict:
+        """Async variant of ``predict``; the request runs in a worker thread."""
+        return await asyncio.to_thread(self.predict, payload)
+
+    async def apredict_many(self, payloads: list[dict]) -> list[dict]:
+        """Async variant of ``predict_many``; chunks are sent concurrently."""
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self.predict_batch, chunk)
+            for chunk in self._chunks(payloads)
+        ))
+        return [result for chunk in chunks for result in chunk]
+
+    def close(self) -> None:
+        """Closes pooled connections and the worker threads."""
+        self._executor.shutdown(wait=False)
+        self._http.close()
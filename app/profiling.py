@@ -0,0 +1,62 @@
+"""
+Telco Customer Churn Prediction — Rerun Profiler
+
+Debug timing of Streamlit reruns. With ``APP_PROFILE_RERUNS=true`` every
+``section`` logs its wall-clock time, and each full rerun logs one summary
+line with the per-section breakdown. Fragment reruns (which skip the top of
+``app.py``) log their sections on their own line tagged ``fragment``. When
+disabled, ``section`` is a no-op.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config import APP_PROFILE_RERUNS
+
+logger = logging.getLogger("app.profiling")
+if APP_PROFILE_RERUNS and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Each script run (full or fragment) executes on its own thread
+_local = threading.local()
+
+
+@contextmanager
+def section(name: str):
+    """Times a block of the current rerun."""
+    if not APP_PROFILE_RERUNS:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings = getattr(_local, "timings", None)
+        if timings is not None:
+            timings.append((name, elapsed_ms))
+        else:
+            logger.info("fragment %s: %.1f ms", name, elapsed_ms)
+
+
+@contextmanager
+def rerun():
+    """Wraps a full script run and logs its total and per-section times."""
+    if not APP_PROFILE_RERUNS:
+        yield
+        return
+    _local.timings = []
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total_ms = (time.perf_counter() - start) * 1000
+        breakdown = ", ".join(f"{name}={ms:.1f}" for name, ms in _local.timings)
+        logger.info("full rerun: %.1f ms (%s)", total_ms, breakdown)
+        _local.timings = None
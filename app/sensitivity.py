@@ -0,0 +1,94 @@
+"""
+Telco Customer Churn Prediction — What-if Sensitivity
+
+Builds a grid of variants of one customer payload (categorical swaps and
+numeric sweeps) so the whole grid can be scored with a single
+``/predict/batch`` request, and summarizes the scored grid for the
+sensitivity charts.
+"""
+
+# Categorical fields swapped through every option
+SWAP_OPTIONS: dict[str, list[str]] = {
+    "contract": ["Month-to-month", "One year", "Two year"],
+    "paymentMethod": [
+        "Electronic check", "Mailed check",
+        "Bank transfer (automatic)", "Credit card (automatic)",
+    ],
+}
+
+# Numeric fields swept over a fixed range (the base value is always added)
+SWEEP_VALUES: dict[str, list[float]] = {
+    "tenure": list(range(0, 73, 6)),
+    "monthlyCharges": [float(v) for v in range(20, 121, 10)],
+}
+
+# Display labels for the charts
+LABELS: dict[str, str] = {
+    "contract": "Contract",
+    "paymentMethod": "Payment Method",
+    "tenure": "Tenure (months)",
+    "monthlyCharges": "Monthly Charges ($)",
+}
+
+TOTAL_CHARGES_MAX = 10000.0
+
+
+def _with_value(payload: dict, field: str, value) -> dict:
+    """Returns a copy of ``payload`` with one field changed.
+
+    ``totalCharges`` follows numeric sweeps so the variant stays a plausible
+    customer: a tenure change keeps the average monthly spend
+    (``totalCharges / (tenure + 1)``) constant, and a monthly charge change
+    scales the total by the same ratio. The base value yields the base payload.
+    """
+    variant = {**payload, field: value}
+    total = payload["totalCharges"]
+    if field == "tenure":
+        total = total / (payload["tenure"] + 1) * (value + 1)
+    elif field == "monthlyCharges" and payload["monthlyCharges"] > 0:
+        total = total * value / payload["monthlyCharges"]
+    variant["totalCharges"] = round(min(total, TOTAL_CHARGES_MAX), 2)
+    return variant
+
+
+def build_grid(payload: dict) -> list[tuple[str, object, dict]]:
+    """Returns ``(field, value, variant payload)`` for every point of the grid.
+
+    The first entry is the unchanged base payload, with field ``"base"``.
+    """
+    grid = [("base", None, payload)]
+    for field, options in SWAP_OPTIONS.items():
+        grid.extend((field, value, _with_value(payload, field, value)) for value in options)
+    for field, values in SWEEP_VALUES.items():
+        kind = type(payload[field])
+        points = sorted({kind(v) for v in values} | {payload[field]})
+        grid.extend((field, value, _with_value(payload, field, value)) for value in points)
+    return grid
+
+
+def summarize(grid: list[tuple[str, object, dict]], probabilities: list[float]) -> dict:
+    """Groups scored grid points by field.
+
+    Args:
+        grid: Output of ``build_grid``.
+        probabilities: Churn probability of each grid point, in grid order.
+
+    Returns:
+        Dict with ``base`` (base probability), ``curves`` mapping each field
+        to ``(values, probabilities)``, and ``tornado`` — one
+        ``(field, lowest delta, highest delta)`` per field relative to the
+        base, sorted by swing, largest first.
+    """
+    base = probabilities[0]
+    curves: dict[str, tuple[list, list[float]]] = {}
+    for (field, value, _), probability in zip(grid[1:], probabilities[1:]):
+        values, probs = curves.setdefault(field, ([], []))
+        values.append(value)
+        probs.append(probability)
+
+    tornado = sorted(
+        ((field, min(probs) - base, max(probs) - base) for field, (_, probs) in curves.items()),
+        key=lambda t: t[2] - t[1],
+        reverse=True,
+    )
+    return {"base": base, "curves": curves, "tornado": tornado}
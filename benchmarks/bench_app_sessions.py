@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Measures Streamlit server CPU per user task, to compare how many sessions one
+core can serve before and after a change to the app.
+
+Starts ``streamlit run`` for the app in the working tree and, with ``--ref``,
+for the app exported from a git revision, each pinned to the same CPU. A
+stub prediction API answers every request instantly. Headless sessions speak
+the browser's websocket protocol: each one logs in, submits the form once and
+then steps through the what-if sliders, sending the fragment id of the widget
+exactly as the browser does, so fragment reruns are exercised for real.
+
+Server CPU time (from ``/proc``) is read once all sessions have logged in and
+again at the end, so the bcrypt login cost is excluded. Reported per task:
+server CPU ms, tasks per CPU-second (sessions one core can serve at one task
+per second each) and the median wall time of one interaction.
+
+Usage:  python benchmarks/bench_app_sessions.py [--ref HEAD~1] [--sessions 8] [--interactions 10]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+from bench_client import PredictionHandler
+from common import REPO_ROOT
+
+USERNAME = 'admin'
+PASSWORD = 'uEtY4N1#pn47Gqyf'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+class Session:
+    """One headless browser tab: keeps widget state and replays it on every rerun."""
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+        self.widgets = {}   # label -> (element type, element, fragment id)
+        self.states = {}    # widget id -> WidgetState
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url)
+        await self.rerun()
+
+    async def rerun(self, fragment_id=''):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.ws.read_message()
+            if data is None:
+                raise ConnectionError('Streamlit closed the websocket')
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'script_finished':
+                return
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                name = element.WhichOneof('type')
+                widget = getattr(element, name)
+                if getattr(widget, 'id', '') and getattr(widget, 'label', ''):
+                    self.widgets[widget.label] = (name, widget, forward.delta.fragment_id)
+
+    def _set(self, label, **value):
+        _, widget, fragment_id = self.widgets[label]
+        state = WidgetState(id=widget.id, **value)
+        self.states[widget.id] = state
+        return fragment_id
+
+    async def click(self, label):
+        fragment_id = self._set(label, trigger_value=True)
+        await self.rerun(fragment_id)
+        # Triggers reset after the run, as in the browser
+        self.states.pop(self.widgets[label][1].id, None)
+
+    async def login(self):
+        self._set('Username', string_value=USERNAME)
+        self._set('Password', string_value=PASSWORD)
+        await self.click('Login')
+        if 'Predict Churn' not in self.widgets:
+            raise RuntimeError('Login failed')
+
+    def sliders(self):
+        return [label for label in self.widgets if label.startswith('Inspect')]
+
+    async def slide(self, label, step):
+        _, widget, _ = self.widgets[label]
+        option = widget.options[step % len(widget.options)]
+        fragment_id = self._set(label, string_array_value={'data': [option]})
+        await self.rerun(fragment_id)
+
+    async def close(self):
+        self.ws.close()
+
+
+async def _run_sessions(url, pid, n_sessions, interactions):
+    sessions = [Session(url) for _ in range(n_sessions)]
+    for session in sessions:
+        await session.connect()
+        await session.login()
+
+    latencies = []
+
+    async def task(session):
+        start = time.perf_counter()
+        await session.click('Predict Churn')
+        latencies.append(time.perf_counter() - start)
+        sliders = session.sliders()
+        for step in range(interactions):
+            start = time.perf_counter()
+            await session.slide(sliders[step % len(sliders)], step + 1)
+            latencies.append(time.perf_counter() - start)
+
+    cpu_start = _cpu_seconds(pid)
+    await asyncio.gather(*(task(s) for s in sessions))
+    cpu = _cpu_seconds(pid) - cpu_start
+    for session in sessions:
+        await session.close()
+    return cpu, latencies
+
+
+def measure(script, api_url, args):
+    port = _free_port()
+    cmd = [sys.executable, '-m', 'streamlit', 'run', str(script),
+           '--server.headless', 'true', '--server.port', str(port),
+           '--browser.gatherUsageStats', 'false']
+    if args.server_cpus:
+        cmd = ['taskset', '-c', args.server_cpus] + cmd
+    env = {**os.environ, 'API_ENDPOINT': api_url}
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{script} did not start')
+                time.sleep(0.2)
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+        return asyncio.run(_run_sessions(url, proc.pid, args.sessions, args.interactions))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ref', help='Git revision whose app/ is measured as the baseline')
+    parser.add_argument('--sessions', type=int, default=8, help='Concurrent sessions')
+    parser.add_argument('--interactions', type=int, default=10,
+                        help='What-if slider changes per task, after one form submission')
+    parser.add_argument('--server-cpus', default='0', help='taskset CPU list for the Streamlit server')
+    args = parser.parse_args()
+
+    api = ThreadingHTTPServer(('127.0.0.1', 0), PredictionHandler)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    api_url = f'http://127.0.0.1:{api.server_port}'
+
+    apps = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.ref:
+            archive = subprocess.run(['git', 'archive', args.ref, 'app'], cwd=REPO_ROOT,
+                                     capture_output=True, check=True).stdout
+            subprocess.run(['tar', '-x', '-C', tmp], input=archive, check=True)
+            apps.append((args.ref, os.path.join(tmp, 'app', 'app.py')))
+        apps.append(('working tree', REPO_ROOT / 'app' / 'app.py'))
+
+        tasks = args.sessions
+        print(f'{args.sessions} sessions x (1 submit + {args.interactions} what-if changes), '
+              f'server on CPU {args.server_cpus}')
+        print(f'{"app":<14} {"CPU ms/task":>12} {"tasks/CPU-s":>12} {"p50 ms":>8}')
+        for name, script in apps:
+            cpu, latencies = measure(script, api_url, args)
+            print(f'{name:<14} {cpu / tasks * 1000:>12.0f} {tasks / cpu:>12.2f} '
+                  f'{statistics.median(latencies) * 1000:>8.1f}')
+    api.shutdown()
+
+
+if __name__ == '__main__':
+    main()
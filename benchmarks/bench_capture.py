@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Measures request-path overhead of prediction capture (target: < 50 µs per call).
+
+Usage:  python benchmarks/bench_capture.py [--calls 100000]
+"""
+import argparse
+import time
+
+from common import sample_payloads, to_columns
+
+from api_components.capture.capture import PredictionCapture
+from api_components.capture.sinks import CaptureSink
+from api_components.predict.predict import FEATURE_NAMES, _preprocess
+
+
+class NullSink(CaptureSink):
+    """Discards batches so only the buffering cost is measured."""
+
+    def write(self, columns):
+        pass
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=100000)
+    args = parser.parse_args()
+
+    payload = sample_payloads(1)[0]
+    vector = _preprocess(payload)
+    columns = to_columns(sample_payloads(100))
+    vectors = [vector] * 100
+    probabilities = [0.5] * 100
+
+    def capture(sample_rate, max_records=args.calls * 2):
+        return PredictionCapture(NullSink(), 'bench', FEATURE_NAMES, sample_rate=sample_rate,
+                                 max_records=max_records, flush_batch_size=1000, flush_interval=0.05)
+
+    full, sampled, capped = capture(1.0), capture(0.1), capture(1.0, max_records=0)
+    batch = capture(1.0)
+
+    cases = {
+        'record (sample_rate=1.0)': lambda: full.record(payload, vector, 0.5, 12.0),
+        'record (sample_rate=0.1)': lambda: sampled.record(payload, vector, 0.5, 12.0),
+        'record (buffer full, dropped)': lambda: capped.record(payload, vector, 0.5, 12.0),
+    }
+    print(f'{args.calls:,} calls per case')
+    for name, fn in cases.items():
+        print(f'{name:<36} {per_call_us(fn, args.calls):8.2f} µs/call')
+
+    per_batch = per_call_us(lambda: batch.record_batch(columns, vectors, probabilities, 12.0), args.calls // 100)
+    print(f'{"record_batch (per row, 100 rows)":<36} {per_batch / 100:8.2f} µs/row')
+
+    for c in (full, sampled, capped, batch):
+        c.close()
+    print(f'flushed={full.flushed:,} dropped(full buffer)={capped.dropped:,}')
+
+
+if __name__ == '__main__':
+    main()
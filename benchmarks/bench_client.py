@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measures per-call overhead of the Streamlit app's API client: the previous
+per-call path (new boto3 session, credential resolution, signer and TCP
+connection for every request) against the pooled PredictionClient, plus
+predict_many against sequential calls.
+
+Requests go to an in-process HTTP server that returns a fixed prediction, so
+the numbers are client-side cost only; against API Gateway the per-call TLS
+handshake makes the unpooled path slower still. Dummy AWS credentials are
+used for signing.
+
+Usage:  python benchmarks/bench_client.py [--calls 500]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import REPO_ROOT, sample_payloads
+
+sys.path.insert(0, str(REPO_ROOT / 'app'))
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-central-1')
+
+import boto3  # noqa: E402
+import requests  # noqa: E402
+from botocore.auth import SigV4Auth  # noqa: E402
+from botocore.awsrequest import AWSRequest  # noqa: E402
+
+from predict import PredictionClient  # noqa: E402
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if 'columns' in payload:
+            rows = len(next(iter(payload['columns'].values())))
+            body = {'churn_probability': [0.42] * rows, 'will_churn': [False] * rows}
+        else:
+            body = {'churn_probability': 0.42, 'will_churn': False}
+        response = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def unpooled_predict(url, payload):
+    """The client's previous per-call path, kept here as the baseline."""
+    session = boto3.Session()
+    credentials = session.get_credentials().get_frozen_credentials()
+    aws_request = AWSRequest(method='POST', url=url, data=json.dumps(payload),
+                             headers={'Content-Type': 'application/json'})
+    SigV4Auth(credentials, 'execute-api', session.region_name).add_auth(aws_request)
+    return requests.post(url, data=aws_request.data, headers=dict(aws_request.headers), timeout=60).json()
+
+
+def per_call_ms(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PredictionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    payload = sample_payloads(1)[0]
+    client = PredictionClient(base_url, batch_rows=1000, max_concurrency=4)
+    client.predict(payload)
+
+    unpooled = per_call_ms(lambda: unpooled_predict(f'{base_url}/predict', payload), args.calls)
+    pooled = per_call_ms(lambda: client.predict(payload), args.calls)
+    print(f'{args.calls:,} calls per case')
+    print(f'{"unpooled (session + signer + connection per call)":<52} {unpooled:7.3f} ms/call')
+    print(f'{"PredictionClient.predict (pooled)":<52} {pooled:7.3f} ms/call   ({unpooled / pooled:.1f}x)')
+
+    payloads = sample_payloads(args.rows)
+    start = time.perf_counter()
+    client.predict_many(payloads)
+    many = time.perf_counter() - start
+    print(f'{f"predict_many ({args.rows:,} rows, 1000-row chunks)":<52} {many * 1000:7.1f} ms total')
+    print(f'{"  vs. sequential predict (extrapolated)":<52} {pooled * args.rows:7.1f} ms total')
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Measures per-request drift monitor update cost and snapshot merge cost.
+
+Usage:  python benchmarks/bench_drift.py [--calls 50000]
+"""
+import argparse
+import json
+import time
+
+from common import sample_payloads
+
+from api_components.monitoring.drift import DriftMonitor, merge_snapshots
+from api_components.predict.predict import FEATURE_NAMES, _preprocess
+from config import DRIFT_REFERENCE_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50000)
+    args = parser.parse_args()
+
+    with open(DRIFT_REFERENCE_PATH) as f:
+        reference = json.load(f)
+    monitor = DriftMonitor(reference, FEATURE_NAMES, 300, 12)
+    vectors = [_preprocess(p) for p in sample_payloads(1000)]
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        monitor.update_many([vectors[i % len(vectors)]])
+    single = (time.perf_counter() - start) / args.calls * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.calls // len(vectors)):
+        monitor.update_many(vectors)
+    batched = (time.perf_counter() - start) / (args.calls // len(vectors) * len(vectors)) * 1e6
+
+    snapshots = [monitor.snapshot() for _ in range(8)]
+    start = time.perf_counter()
+    merged = merge_snapshots(snapshots)
+    scores = monitor.scores(merged)
+    merge_ms = (time.perf_counter() - start) * 1000
+
+    print(f'update (1 row per request)     {single:8.2f} µs/row')
+    print(f'update (1000-row batch)        {batched:8.2f} µs/row')
+    print(f'merge 8 snapshots + score      {merge_ms:8.2f} ms')
+    print(f'snapshot size                  {len(json.dumps(merged)):8,} bytes ({scores["window"]["rows"]:,} rows)')
+
+
+if __name__ == '__main__':
+    main()
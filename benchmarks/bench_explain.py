@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Measures TreeSHAP explanation latency for the prediction routes' ``?explain=true``.
+
+Trains XGBoost with ``scripts/xgb_train.py``'s defaults on ``train_smote.csv``
+once per ``--max-depths`` value (or uses ``--model``, a JSON dump from
+``api_components.explain.build``), then times ``TreeExplainer.explain`` on
+preprocessed payloads for each batch size, best of ``--repeat``.
+Contributions are checked against XGBoost's own ``pred_contribs`` rolled up to
+the request fields, and base value plus contributions against the model's
+log-odds; the script exits non-zero when either differs by more than
+``--tolerance``. The default depths include one above 8, where path patterns
+no longer fit in a byte.
+
+Usage:  python benchmarks/bench_explain.py [--batches 1 1000] [--max-depths 6 10] [--model xgboost-model.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from common import REPO_ROOT, best_of, sample_payloads
+
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+import xgb_train  # noqa: E402
+
+
+def train_dump(path, max_depth):
+    train = pd.read_csv(REPO_ROOT / 'data' / 'processed' / 'train_smote.csv')
+    X, y = train.drop('Churn', axis=1), train['Churn'].astype(int)
+    xgb_train.train_model(xgb_train.parse_args(['--max-depth', str(max_depth)]), X, y).save_model(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--block-rows', type=int, nargs='+', default=[64],
+                        help='EXPLAIN_BLOCK_ROWS values to compare')
+    parser.add_argument('--max-depths', type=int, nargs='+', default=[6, 10],
+                        help='max_depth of each trained model (ignored with --model)')
+    parser.add_argument('--tolerance', type=float, default=1e-3)
+    parser.add_argument('--model', help='JSON model dump (default: train one per --max-depths)')
+    args = parser.parse_args()
+
+    from api_components.explain.treeshap import TreeExplainer
+    from api_components.predict.predict import FEATURE_FIELDS, PAYLOAD_FIELDS, _preprocess
+
+    tmp = tempfile.TemporaryDirectory()
+    if args.model is not None:
+        models = [('--model', args.model)]
+    else:
+        models = []
+        for depth in args.max_depths:
+            path = os.path.join(tmp.name, f'xgboost-model-{depth}.json')
+            train_dump(path, depth)
+            models.append((f'max_depth={depth}', path))
+
+    vectors = [_preprocess(p) for p in sample_payloads(max(args.batches))]
+    weights = np.array([[shares.get(f, 0.0) for f in PAYLOAD_FIELDS] for shares in FEATURE_FIELDS])
+    dmatrix = xgb.DMatrix(np.asarray(vectors, dtype=np.float32))
+    failed = False
+
+    for name, path in models:
+        with open(path) as f:
+            model = json.load(f)
+        start = time.perf_counter()
+        explainer = TreeExplainer(model, FEATURE_FIELDS, PAYLOAD_FIELDS)
+        print(f'{name}: explainer load {(time.perf_counter() - start) * 1000:.0f} ms, '
+              f'{explainer.n_paths} paths x width {explainer.width}')
+
+        # Correctness against XGBoost's TreeSHAP
+        booster = xgb.Booster()
+        booster.load_model(path)
+        expected = booster.predict(dmatrix, pred_contribs=True)[:, :-1] @ weights
+        contributions = explainer.explain(vectors)
+        margin = booster.predict(dmatrix, output_margin=True)
+        contrib_diff = np.abs(contributions - expected).max()
+        margin_diff = np.abs(contributions.sum(axis=1) + explainer.base_value - margin).max()
+        print(f'  max |diff| vs xgboost pred_contribs: {contrib_diff:.2e}, vs margin: {margin_diff:.2e}')
+        if max(contrib_diff, margin_diff) > args.tolerance:
+            print(f'  FAILED: contributions differ by more than {args.tolerance}')
+            failed = True
+
+        print(f'  {"block rows":>10} {"batch":>6} {"ms/call":>9} {"µs/row":>9}')
+        for block_rows in args.block_rows:
+            explainer.block_rows = block_rows
+            for batch in args.batches:
+                rows = vectors[:batch]
+                seconds = best_of(lambda: explainer.explain(rows), args.repeat)
+                print(f'  {block_rows:>10} {batch:>6} {seconds * 1000:>9.2f} {seconds / batch * 1e6:>9.1f}')
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Measures incremental (warm-start) retraining against a full retrain for the
+Random Forest and XGBoost training scripts.
+
+For each delta size, the newest ``delta%`` of ``train_smote.csv`` plays the
+newly labelled customers: a previous model is trained on the rest (not timed),
+then grown on the delta plus the old-data sample, and compared with a model of
+the same size trained from scratch on everything. Both are scored on
+``test.csv``. Uses the scripts' default hyperparameters. This is the
+evaluation path for incremental mode, whose in-job full-retrain comparison
+(``--compare-full-retrain``) is off by default.
+
+Usage:  python benchmarks/bench_incremental.py [--deltas 1 5 10 20] [--old-sample-frac 0.1]
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from common import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+import rf_train  # noqa: E402
+import xgb_train  # noqa: E402
+
+DATA_DIR = REPO_ROOT / 'data' / 'processed'
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(script, args, X, y, X_test, y_test, delta_pct):
+    n_delta = max(1, round(len(X) * delta_pct / 100))
+    X_old, y_old = X.iloc[:-n_delta], y.iloc[:-n_delta]
+    X_delta, y_delta = X.iloc[-n_delta:], y.iloc[-n_delta:]
+
+    previous = script.train_model(args, X_old, y_old)
+    X_mix, y_mix = script.mix_old_data(X_old, y_old, X_delta, y_delta, args.old_sample_frac)
+    incremental, incremental_s = timed(script.train_incremental, args, previous, X_mix, y_mix)
+
+    size = len(incremental.estimators_) if script is rf_train else incremental.num_boosted_rounds()
+    full, full_s = timed(script.train_full, args, size, X, y)
+
+    return {
+        'rows': len(X_mix),
+        'incremental_s': incremental_s,
+        'full_s': full_s,
+        'incremental_auc': script.evaluate_model(incremental, X_test, y_test)['Test-AUC'],
+        'full_auc': script.evaluate_model(full, X_test, y_test)['Test-AUC'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deltas', type=float, nargs='+', default=[1, 5, 10, 20],
+                        help='Delta sizes in percent of the training set')
+    parser.add_argument('--old-sample-frac', type=float, default=0.1)
+    args = parser.parse_args()
+
+    train = pd.read_csv(DATA_DIR / 'train_smote.csv').sample(frac=1.0, random_state=42)
+    test = pd.read_csv(DATA_DIR / 'test.csv')
+    X, y = train.drop('Churn', axis=1).reset_index(drop=True), train['Churn'].astype(int).reset_index(drop=True)
+    X_test, y_test = test.drop('Churn', axis=1), test['Churn'].astype(int)
+
+    print(f'{"model":<8} {"delta":>6} {"rows fit":>9} {"incr s":>8} {"full s":>8} {"speedup":>8} '
+          f'{"incr AUC":>9} {"full AUC":>9}')
+    for name, script in (('RF', rf_train), ('XGBoost', xgb_train)):
+        script_args = script.parse_args(['--old-sample-frac', str(args.old_sample_frac)])
+        for delta_pct in args.deltas:
+            r = run(script, script_args, X, y, X_test, y_test, delta_pct)
+            print(f'{name:<8} {delta_pct:>5g}% {r["rows"]:>9} {r["incremental_s"]:>8.2f} {r["full_s"]:>8.2f} '
+                  f'{r["full_s"] / r["incremental_s"]:>7.1f}x {r["incremental_auc"]:>9.4f} {r["full_auc"]:>9.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compares ``scripts/oversample.py`` with the notebook's SMOTE-NC step
+(label-encoded ``SMOTENC.fit_resample`` + per-column one-hot expansion) at
+multiples of the current training set size.
+
+``train_original.csv`` is replicated ``scale`` times, with seeded noise
+(std 0.01) on the continuous columns so copies are not exact duplicates. Each
+method and scale runs in its own process; reported are wall-clock time and
+peak RSS above the loaded input, from the input to the balanced one-hot
+matrix in memory (CSV writing excluded). At scale 1 both outputs are also
+scored: a Random Forest with ``rf_train.py``'s defaults is trained on each
+and evaluated on ``test.csv``.
+
+Usage:  python benchmarks/bench_oversample.py [--scales 1 10 100] [--n-jobs -1] [--algorithm kd_tree]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+import oversample  # noqa: E402
+
+DATA_DIR = REPO_ROOT / 'data' / 'processed'
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_scaled(scale):
+    X, y, columns = oversample.load_data(str(DATA_DIR / 'train_original.csv'))
+    continuous, _ = oversample.feature_layout(columns)
+    X, y = np.tile(X, (scale, 1)), np.tile(y, scale)
+    if scale > 1:
+        rng = np.random.default_rng(0)
+        X[len(X) // scale:, continuous] += rng.normal(0, 0.01, (len(X) - len(X) // scale, len(continuous)))
+    return X, y, columns
+
+
+def run_script(X, y, columns, args):
+    chunks = [c for c, _ in oversample.oversample(X, y, columns, algorithm=args.algorithm, n_jobs=args.n_jobs)]
+    minority = np.bincount(y).argmin()
+    X_out = np.concatenate([X] + chunks)
+    y_out = np.concatenate([y, np.full(len(X_out) - len(X), minority)])
+    return pd.DataFrame(X_out, columns=columns), y_out
+
+
+def run_smotenc(X, y, columns, args):
+    """The notebook's path: label-encode, SMOTENC, expand back to one-hot."""
+    from imblearn.over_sampling import SMOTENC
+
+    df = pd.DataFrame(X, columns=columns)
+    groups = {}
+    for prefix in oversample.CATEGORICAL_GROUPS:
+        group = [c for c in columns if c.startswith(f'{prefix}_')]
+        groups[prefix] = group
+        df[prefix] = df[group].to_numpy().argmax(axis=1)
+        df = df.drop(columns=group)
+    categorical = [list(df.columns).index(c) for c in groups]
+
+    X_res, y_res = SMOTENC(categorical_features=categorical, random_state=42).fit_resample(df, y)
+
+    # expand_one_hot from 02_data_preprocessing
+    for prefix, group in groups.items():
+        int_vals = X_res[prefix].round().astype(int).clip(0, len(group) - 1)
+        for cat_idx, name in enumerate(group):
+            X_res[name] = (int_vals == cat_idx).astype(int)
+        X_res = X_res.drop(columns=[prefix])
+    return X_res[columns], np.asarray(y_res)
+
+
+def test_auc(X, y):
+    import rf_train
+
+    test = pd.read_csv(DATA_DIR / 'test.csv')
+    model = rf_train.train_model(rf_train.parse_args([]), X, y)
+    return rf_train.evaluate_model(model, test.drop('Churn', axis=1), test['Churn'].astype(int))['Test-AUC']
+
+
+def worker(method, scale, args):
+    X, y, columns = load_scaled(scale)
+    loaded_mb = _peak_mb()
+    start = time.perf_counter()
+    X_out, y_out = (run_script if method == 'script' else run_smotenc)(X, y, columns, args)
+    seconds = time.perf_counter() - start
+    result = {'seconds': seconds, 'peak_mb': _peak_mb() - loaded_mb, 'rows': len(X_out)}
+    if scale == 1:
+        result['auc'] = test_auc(X_out, y_out)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--algorithm', choices=['kd_tree', 'brute'], default='kd_tree', help='oversample.py k-NN')
+    parser.add_argument('--skip-smotenc-above', type=int, default=100,
+                        help='Largest scale the SMOTENC baseline is run at')
+    parser.add_argument('--worker', nargs=2, metavar=('METHOD', 'SCALE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = worker(args.worker[0], int(args.worker[1]), args)
+        print(json.dumps(result))
+        return
+
+    print(f'{"method":<9} {"scale":>6} {"rows out":>10} {"seconds":>9} {"peak MB":>9} {"Test-AUC":>9}')
+    for scale in args.scales:
+        for method in ('smotenc', 'script'):
+            if method == 'smotenc' and scale > args.skip_smotenc_above:
+                continue
+            proc = subprocess.run([sys.executable, __file__, '--worker', method, str(scale),
+                                   '--n-jobs', str(args.n_jobs), '--algorithm', args.algorithm],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                # Killed by the OOM killer (-9) or MemoryError at large scales
+                reason = 'killed' if proc.returncode < 0 else proc.stderr.strip().splitlines()[-1]
+                print(f'{method:<9} {scale:>5}x failed: {reason}', flush=True)
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            auc = f'{r["auc"]:.4f}' if 'auc' in r else '-'
+            print(f'{method:<9} {scale:>5}x {r["rows"]:>10} {r["seconds"]:>9.2f} {r["peak_mb"]:>9.0f} {auc:>9}',
+                  flush=True)
+
+
+if __name__ == '__main__':
+    main()
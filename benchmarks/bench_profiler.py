@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Measures what the sampling profiler costs a worker: the time of one stack
+sample with a growing number of threads, and the slowdown of a CPU-bound
+request workload (``_preprocess`` + ``validate_columns``) while a profile is
+being taken at each ``--intervals-ms``, against the same workload with the
+profiler off.
+
+Usage:  python benchmarks/bench_profiler.py [--rows 1000] [--intervals-ms 10 1]
+"""
+import argparse
+import tempfile
+import threading
+
+from common import best_of, sample_payloads, to_columns
+
+from api_components.predict.columnar import validate_columns
+from api_components.predict.predict import _preprocess
+from api_components.profiling.profiler import SamplingProfiler
+
+
+def _parked_threads(n, depth):
+    """Starts ``n`` threads blocked ``depth`` frames deep, like idle pool workers."""
+    release = threading.Event()
+
+    def nest(k):
+        return nest(k - 1) if k else release.wait()
+
+    threads = [threading.Thread(target=nest, args=(depth,), daemon=True) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return release
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--intervals-ms', type=float, nargs='+', default=[10.0, 1.0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 40, 200],
+                        help='Parked threads in the process (the default anyio pool has 40)')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    profiler = SamplingProfiler(tmp.name)
+
+    print(f'{"threads":>8} {"µs/sample":>10}')
+    started = 0
+    for n in args.threads:
+        release = _parked_threads(n - started, depth=30)
+        started = n
+        seconds = best_of(profiler.sample, 200)
+        print(f'{n:>8} {seconds * 1e6:>10.1f}')
+    release.set()
+
+    payloads = sample_payloads(args.rows)
+    columns = to_columns(payloads)
+
+    def workload():
+        for p in payloads:
+            _preprocess(p)
+        validate_columns(columns)
+
+    baseline = best_of(workload, args.repeat)
+    print(f'\nworkload ({args.rows} rows), profiler off: {baseline * 1000:.1f} ms')
+    for interval in args.intervals_ms:
+        profiler.interval = interval / 1000
+        profiler.begin_request()
+        seconds = best_of(workload, args.repeat)
+        profiler.end_request()
+        print(f'sampling every {interval:g} ms: {seconds * 1000:.1f} ms ({(seconds / baseline - 1) * 100:+.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
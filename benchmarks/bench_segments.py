@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measures per-request segment aggregate update cost, flush cost, and
+``/segments`` query cost as the number of scored rows grows.
+
+Usage:  python benchmarks/bench_segments.py [--calls 50000] [--rows 100000 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import sample_payloads
+
+from api_components.predict.predict import FEATURE_NAMES, _preprocess
+from api_components.segments.segments import SegmentAggregator, rollup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50000)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000],
+                        help='Scored rows in the store when querying')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    segments = SegmentAggregator(FEATURE_NAMES, os.path.join(tmp.name, 'segments.json'), flush_interval=3600)
+    vectors = [_preprocess(p) for p in sample_payloads(1000)]
+    rng = random.Random(0)
+    probabilities = [rng.random() for _ in vectors]
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        k = i % len(vectors)
+        segments.update_many([vectors[k]], [probabilities[k]])
+    single = (time.perf_counter() - start) / args.calls * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.calls // len(vectors)):
+        segments.update_many(vectors, probabilities)
+    batched = (time.perf_counter() - start) / (args.calls // len(vectors) * len(vectors)) * 1e6
+
+    start = time.perf_counter()
+    segments.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+
+    print(f'update (1 row per request)     {single:8.2f} µs/row')
+    print(f'update (1000-row batch)        {batched:8.2f} µs/row')
+    print(f'flush to shared file           {flush_ms:8.2f} ms')
+
+    scored = 2 * (args.calls // len(vectors) * len(vectors))
+    for rows in args.rows:
+        while scored < rows:
+            segments.update_many(vectors, probabilities)
+            scored += len(vectors)
+        segments.flush()
+        start = time.perf_counter()
+        summary = rollup(segments.snapshot())
+        by_contract = rollup(segments.snapshot(), ['contract'])
+        query_ms = (time.perf_counter() - start) / 2 * 1000
+        print(f'query at {summary["count"]:>9,} rows     {query_ms:8.2f} ms '
+              f'({len(summary["segments"])} segments, {len(by_contract["segments"])} by contract, '
+              f'{os.path.getsize(segments.path):,} bytes on disk)')
+
+    segments.close()
+
+
+if __name__ == '__main__':
+    main()
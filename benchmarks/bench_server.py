@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Measures /predict requests/sec of the pre-fork server (api/src/serve.py) for
+increasing worker counts, against the stub endpoint in stub_endpoint.py.
+
+Each worker count gets a fresh server; load comes from ``--clients`` keep-alive
+connections spread over ``--load-processes`` processes. On a single host the
+load generator competes with the server for cores, so pin them apart (e.g.
+``taskset -c 0-3`` for the server via --server-cpus) or use --url to load a
+server started elsewhere.
+
+Usage:  python benchmarks/bench_server.py [--workers 1,2,4,8] [--duration 10] [--clients 64]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from common import REPO_ROOT, sample_payloads
+
+API_SRC = REPO_ROOT / 'api' / 'src'
+
+
+def wait_ready(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/ready')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server on {host}:{port} did not become ready')
+
+
+def client_loop(host, port, body, stop_at, latencies):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        conn.request('POST', '/predict', body, headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+def load_process(host, port, body, threads, duration, queue):
+    stop_at = time.monotonic() + duration
+    latencies = []
+    workers = [threading.Thread(target=client_loop, args=(host, port, body, stop_at, latencies))
+               for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    queue.put(latencies)
+
+
+def run_load(host, port, clients, processes, duration):
+    body = json.dumps(sample_payloads(1)[0])
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=load_process,
+                                     args=(host, port, body, max(1, clients // processes), duration, queue))
+             for _ in range(processes)]
+    for p in procs:
+        p.start()
+    latencies = sorted(x for _ in procs for x in queue.get())
+    for p in procs:
+        p.join()
+    return latencies
+
+
+def start_server(workers, port, stub_url, server_cpus):
+    env = {
+        **os.environ,
+        'ARTIFACTS_DIR': str(REPO_ROOT / 'data' / 'processed'),
+        'SAGEMAKER_ENDPOINT_URL': stub_url,
+        'AWS_ACCESS_KEY_ID': os.environ.get('AWS_ACCESS_KEY_ID', 'stub'),
+        'AWS_SECRET_ACCESS_KEY': os.environ.get('AWS_SECRET_ACCESS_KEY', 'stub'),
+        'SERVER_WORKERS': str(workers),
+        'SERVER_PORT': str(port),
+        'SERVER_DRAIN_SECONDS': '0',
+        'CAPTURE_ENABLED': 'false',
+    }
+    cmd = [sys.executable, 'serve.py']
+    if server_cpus:
+        cmd = ['taskset', '-c', server_cpus] + cmd
+    return subprocess.Popen(cmd, cwd=API_SRC, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def report(label, latencies, duration):
+    if not latencies:
+        print(f'{label:<12} no successful requests')
+        return
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f'{label:<12} {len(latencies) / duration:10,.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default=','.join(str(2 ** i) for i in range((os.cpu_count() or 1).bit_length())))
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--load-processes', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--stub-port', type=int, default=8080)
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0)
+    parser.add_argument('--server-cpus', help='CPU list for taskset, e.g. 0-3')
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    args = parser.parse_args()
+
+    if args.url:
+        target = urlparse(args.url)
+        wait_ready(target.hostname, target.port)
+        report(args.url, run_load(target.hostname, target.port, args.clients, args.load_processes, args.duration),
+               args.duration)
+        return
+
+    stub = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / 'benchmarks' / 'stub_endpoint.py'),
+         '--port', str(args.stub_port), '--latency-ms', str(args.stub_latency_ms)],
+        start_new_session=True,
+    )
+    try:
+        print(f'{args.clients} clients, {args.duration:.0f}s per run, stub latency {args.stub_latency_ms} ms')
+        for workers in (int(w) for w in args.workers.split(',')):
+            server = start_server(workers, args.port, f'http://127.0.0.1:{args.stub_port}', args.server_cpus)
+            try:
+                wait_ready('127.0.0.1', args.port)
+                latencies = run_load('127.0.0.1', args.port, args.clients, args.load_processes, args.duration)
+                report(f'{workers} worker(s)', latencies, args.duration)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+    finally:
+        os.killpg(stub.pid, signal.SIGTERM)
+
+
+if __name__ == '__main__':
+    main()
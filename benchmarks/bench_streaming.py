@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Compares buffered and streamed (NDJSON) ``/predict/batch`` responses for a
+large request, with and without compression.
+
+Each mode gets a fresh single-worker ``serve.py`` scoring against
+``stub_endpoint.py --varied`` (distinct probabilities, so compression ratios
+are realistic), so the worker's peak RSS (``VmHWM``) above its idle RSS
+covers exactly one request. The client reads the raw response with
+``requests`` (``stream=True``), decompresses it itself and reports the time to
+the first decoded result, the total time and the bytes on the wire. The
+buffered mode needs ``BATCH_MAX_ROWS`` raised to the row count, which the
+benchmark does.
+
+Usage:  python benchmarks/bench_streaming.py [--rows 100000] [--stub-latency-ms 20]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import zlib
+
+import requests
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from bench_server import API_SRC, wait_ready
+from common import REPO_ROOT, sample_payloads, to_columns
+
+NDJSON = 'application/x-ndjson'
+
+
+def _kb(pid, field):
+    with open(f'/proc/{pid}/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+def start_server(port, stub_url, rows, tmp_dir):
+    env = {
+        **os.environ,
+        'ARTIFACTS_DIR': str(REPO_ROOT / 'data' / 'processed'),
+        'SAGEMAKER_ENDPOINT_URL': stub_url,
+        'AWS_ACCESS_KEY_ID': os.environ.get('AWS_ACCESS_KEY_ID', 'stub'),
+        'AWS_SECRET_ACCESS_KEY': os.environ.get('AWS_SECRET_ACCESS_KEY', 'stub'),
+        'SERVER_WORKERS': '1',
+        'SERVER_PORT': str(port),
+        'SERVER_DRAIN_SECONDS': '0',
+        'CAPTURE_ENABLED': 'false',
+        'SEGMENTS_PATH': os.path.join(tmp_dir, 'segments.json'),
+        'BATCH_MAX_ROWS': str(rows),
+        'STREAM_MAX_ROWS': str(rows),
+    }
+    server = subprocess.Popen([sys.executable, 'serve.py'], cwd=API_SRC, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_ready('127.0.0.1', port)
+    with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+        worker = int(f.read().split()[0])
+    return server, worker
+
+
+def _decoder(content_encoding):
+    if content_encoding == 'br':
+        return brotli.Decompressor().process
+    if content_encoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    return bytes
+
+
+def run_request(url, body, stream, encoding):
+    headers = {'Content-Type': 'application/json', 'Accept': NDJSON if stream else 'application/json',
+               'Accept-Encoding': encoding}
+    start = time.perf_counter()
+    first = None
+    rows = 0
+    wire = 0
+    pending = b''
+    with requests.post(f'{url}/predict/batch', data=body, headers=headers, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        content_encoding = response.headers.get('Content-Encoding', 'identity')
+        decode = _decoder(content_encoding)
+        for chunk in response.raw.stream(65536, decode_content=False):
+            wire += len(chunk)
+            pending += decode(chunk)
+            if stream:
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    rows += len(json.loads(line)['churn_probability'])
+                    first = first or time.perf_counter() - start
+    if not stream:
+        rows = len(json.loads(pending)['churn_probability'])
+        first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return {'rows': rows, 'first': first, 'total': total, 'wire': wire, 'encoding': content_encoding}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--stub-port', type=int, default=8081)
+    parser.add_argument('--stub-latency-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    body = json.dumps({'columns': to_columns(sample_payloads(args.rows))})
+    modes = [('buffered', False, 'identity'), ('buffered', False, 'gzip'),
+             ('ndjson', True, 'identity'), ('ndjson', True, 'gzip')]
+    if brotli is not None:
+        modes.append(('ndjson', True, 'br'))
+
+    stub = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / 'benchmarks' / 'stub_endpoint.py'),
+         '--port', str(args.stub_port), '--latency-ms', str(args.stub_latency_ms), '--varied'],
+        start_new_session=True,
+    )
+    tmp = os.path.join('/tmp', f'bench-streaming-{os.getpid()}')
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        print(f'{args.rows:,} rows ({len(body) / 1e6:.1f} MB request), stub latency {args.stub_latency_ms} ms/batch')
+        print(f'{"mode":<10} {"encoding":<9} {"first result":>13} {"total":>9} {"wire":>10} {"server peak":>12}')
+        for name, stream, encoding in modes:
+            server, worker = start_server(args.port, f'http://127.0.0.1:{args.stub_port}', args.rows, tmp)
+            try:
+                idle_kb = _kb(worker, 'VmRSS')
+                r = run_request(f'http://127.0.0.1:{args.port}', body, stream, encoding)
+                server_mb = (_kb(worker, 'VmHWM') - idle_kb) / 1024
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+            assert r['rows'] == args.rows, r
+            print(f'{name:<10} {r["encoding"]:<9} {r["first"] * 1000:>10.0f} ms {r["total"]:>7.2f} s '
+                  f'{r["wire"] / 1e6:>7.2f} MB {server_mb:>9.0f} MB', flush=True)
+    finally:
+        os.killpg(stub.pid, signal.SIGTERM)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compares per-object Pydantic validation with column-major validation.
+
+Usage:  python benchmarks/bench_validation.py [--rows 10000]
+"""
+import argparse
+
+from common import best_of, sample_payloads, to_columns
+
+from api_components.predict.columnar import validate_columns
+from api_components.predict.models import PredictionRequest
+from api_components.predict.predict import _preprocess, _preprocess_columns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = sample_payloads(args.rows)
+    columns = to_columns(payloads)
+
+    # Sanity check: both paths must produce identical feature vectors
+    assert _preprocess_columns(columns) == [_preprocess(p) for p in payloads]
+
+    cases = {
+        'per-object validation': lambda: [PredictionRequest(**p).model_dump() for p in payloads],
+        'columnar validation': lambda: validate_columns(columns),
+        'per-object validation + _preprocess': lambda: [
+            _preprocess(PredictionRequest(**p).model_dump()) for p in payloads
+        ],
+        'columnar validation + _preprocess_columns': lambda: (
+            validate_columns(columns), _preprocess_columns(columns)
+        ),
+    }
+
+    print(f'{args.rows:,} rows, best of {args.repeat}')
+    for name, fn in cases.items():
+        seconds = best_of(fn, args.repeat)
+        print(f'{name:<45} {seconds * 1000:9.2f} ms  {args.rows / seconds:12,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Shared helpers for the offline benchmarks.
+
+Importing this module puts ``api/src`` on ``sys.path`` and points
+``ARTIFACTS_DIR`` at ``data/processed`` so the API modules load exactly as
+they do in the container.
+"""
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "api" / "src"))
+os.environ.setdefault("ARTIFACTS_DIR", str(REPO_ROOT / "data" / "processed"))
+
+# Raw values accepted by the Streamlit form for each categorical field
+FIELD_OPTIONS: dict[str, list[str]] = {
+    "gender": ["Male", "Female"],
+    "seniorCitizen": ["No", "Yes"],
+    "partner": ["Yes", "No"],
+    "dependents": ["No", "Yes"],
+    "contract": ["Month-to-month", "One year", "Two year"],
+    "internetService": ["DSL", "Fiber optic", "No"],
+    "paymentMethod": [
+        "Electronic check", "Mailed check",
+        "Bank transfer (automatic)", "Credit card (automatic)",
+    ],
+    "phoneService": ["Yes", "No"],
+    "multipleLines": ["Yes", "No", "No phone service"],
+    "onlineSecurity": ["Yes", "No", "No internet service"],
+    "onlineBackup": ["Yes", "No", "No internet service"],
+    "deviceProtection": ["Yes", "No", "No internet service"],
+    "techSupport": ["Yes", "No", "No internet service"],
+    "streamingTV": ["Yes", "No", "No internet service"],
+    "streamingMovies": ["Yes", "No", "No internet service"],
+    "paperlessBilling": ["Yes", "No"],
+}
+
+
+def sample_payloads(n: int, seed: int = 42) -> list[dict]:
+    """Returns ``n`` random but valid ``PredictionRequest`` payloads."""
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(n):
+        tenure = rng.randint(0, 72)
+        monthly = round(rng.uniform(18.0, 120.0), 2)
+        payload = {field: rng.choice(options) for field, options in FIELD_OPTIONS.items()}
+        payload["tenure"] = tenure
+        payload["monthlyCharges"] = monthly
+        payload["totalCharges"] = round(min(monthly * max(tenure, 1), 9999.0), 2)
+        payloads.append(payload)
+    return payloads
+
+
+def to_columns(payloads: list[dict]) -> dict[str, list]:
+    """Converts row-major payloads into the column-major ``/predict/batch`` layout."""
+    return {field: [p[field] for p in payloads] for field in payloads[0]}
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Returns the fastest wall-clock time in seconds over ``repeat`` calls of ``fn``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
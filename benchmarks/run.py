@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Offline microbenchmark suite with a regression gate.
+
+``run`` times every benchmark (best of ``--repeat``) and writes the results as
+JSON; ``compare`` checks a result file (or a fresh run) against a stored
+baseline and exits non-zero when any benchmark is slower than the baseline by
+more than ``--tolerance``.
+
+Inputs are fixed: payloads come from ``sample_payloads`` (seed 42), training
+data is ``train_smote.csv`` shuffled with seed 42 and replicated
+``--train-scale`` times, and the models use the training scripts' default
+hyperparameters (``random_state=42`` for RF). SVM is fitted on the first
+``--svm-rows`` rows, as kernel SVM training is quadratic in the row count.
+
+Usage:
+    python benchmarks/run.py run [--output results.json] [-k preprocess]
+    python benchmarks/run.py compare baseline.json [results.json] [--tolerance 0.1]
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from common import REPO_ROOT, best_of, sample_payloads, to_columns
+
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+from api_components.predict.columnar import validate_columns  # noqa: E402
+from api_components.predict.models import PredictionRequest  # noqa: E402
+from api_components.predict.predict import (  # noqa: E402
+    _encode_csv,
+    _parse_probabilities,
+    _preprocess,
+    _preprocess_columns,
+)
+import rf_train  # noqa: E402
+import svm_train  # noqa: E402
+
+DATA_DIR = REPO_ROOT / 'data' / 'processed'
+
+# name -> setup(args) returning (callable, items per call, unit)
+BENCHMARKS = {}
+
+
+def benchmark(name, training=False):
+    """Registers a benchmark setup function under ``name``."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, training)
+        return setup
+    return register
+
+
+@benchmark('preprocess.single')
+def _preprocess_single(args):
+    payloads = sample_payloads(args.rows)
+    return lambda: [_preprocess(p) for p in payloads], len(payloads), 'row'
+
+
+@benchmark('preprocess.columns')
+def _preprocess_batch(args):
+    columns = to_columns(sample_payloads(args.rows))
+    return lambda: _preprocess_columns(columns), args.rows, 'row'
+
+
+@benchmark('serialize.encode_csv')
+def _encode(args):
+    vectors = [_preprocess(p) for p in sample_payloads(args.rows)]
+    return lambda: _encode_csv(vectors), len(vectors), 'row'
+
+
+@benchmark('serialize.parse_response')
+def _parse(args):
+    body = ','.join(f'{i / args.rows:.8f}' for i in range(args.rows))
+    return lambda: _parse_probabilities(body), args.rows, 'row'
+
+
+@benchmark('validate.request')
+def _validate_request(args):
+    payloads = sample_payloads(args.rows)
+    return lambda: [PredictionRequest(**p) for p in payloads], len(payloads), 'row'
+
+
+@benchmark('validate.columns')
+def _validate_columns(args):
+    columns = to_columns(sample_payloads(args.rows))
+    return lambda: validate_columns(columns), args.rows, 'row'
+
+
+def _training_data(args):
+    train = pd.read_csv(DATA_DIR / 'train_smote.csv').sample(frac=1.0, random_state=42)
+    train = pd.concat([train] * args.train_scale, ignore_index=True)
+    test = pd.read_csv(DATA_DIR / 'test.csv')
+    return train, test
+
+
+def _split(df):
+    return df.drop('Churn', axis=1), df['Churn'].astype(int)
+
+
+@benchmark('train.load_data', training=True)
+def _load_data(args):
+    train, test = _training_data(args)
+    tmp = tempfile.mkdtemp(prefix='bench-')
+    atexit.register(shutil.rmtree, tmp, True)
+    for name, df in (('train', train), ('test', test)):
+        os.makedirs(os.path.join(tmp, name))
+        df.to_csv(os.path.join(tmp, name, f'{name}.csv'), index=False)
+    return lambda: rf_train.load_data(os.path.join(tmp, 'train'), os.path.join(tmp, 'test')), 1, 'call'
+
+
+@benchmark('train.rf.fit', training=True)
+def _rf_fit(args):
+    X, y = _split(_training_data(args)[0])
+    rf_args = rf_train.parse_args([])
+    return lambda: rf_train.train_model(rf_args, X, y), 1, 'fit'
+
+
+@benchmark('train.rf.evaluate', training=True)
+def _rf_evaluate(args):
+    train, test = _training_data(args)
+    model = rf_train.train_model(rf_train.parse_args([]), *_split(train))
+    X_test, y_test = _split(test)
+    return lambda: rf_train.evaluate_model(model, X_test, y_test), 1, 'call'
+
+
+def _svm_args():
+    return argparse.Namespace(C=1.0, kernel='rbf', gamma='scale')
+
+
+@benchmark('train.svm.fit', training=True)
+def _svm_fit(args):
+    X, y = _split(_training_data(args)[0].iloc[:args.svm_rows])
+    return lambda: svm_train.train_model(_svm_args(), X, y), 1, 'fit'
+
+
+@benchmark('train.svm.evaluate', training=True)
+def _svm_evaluate(args):
+    train, test = _training_data(args)
+    model = svm_train.train_model(_svm_args(), *_split(train.iloc[:args.svm_rows]))
+    X_test, y_test = _split(test)
+    return lambda: svm_train.evaluate_model(model, X_test, y_test), 1, 'call'
+
+
+def _quiet(fn):
+    """Runs ``fn`` with stdout and warnings discarded (the training helpers print progress)."""
+    def wrapper():
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                return fn()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return wrapper
+
+
+def _format(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f} s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds * 1e6:.2f} µs'
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    """Runs the selected benchmarks and returns the result document."""
+    results = {}
+    for name, (setup, training) in BENCHMARKS.items():
+        if not _selected(name, args.k):
+            continue
+        fn, items, unit = _quiet(lambda: setup(args))()
+        repeat = args.train_repeat if training else args.repeat
+        seconds = best_of(_quiet(fn), repeat) / items
+        results[name] = {'seconds': seconds, 'unit': unit, 'repeat': repeat}
+        print(f'{name:<28} {_format(seconds):>12}/{unit}', flush=True)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'rows': args.rows,
+            'train_scale': args.train_scale,
+            'svm_rows': args.svm_rows,
+        },
+        'results': results,
+    }
+
+
+def _selected(name, k):
+    return not k or any(pattern in name for pattern in k)
+
+
+def compare(baseline, current, tolerance, k=None):
+    """Prints a comparison table and returns the names of regressed benchmarks
+    and of baseline benchmarks missing from ``current``.
+
+    Baseline benchmarks excluded by the ``-k`` patterns in ``k`` are not
+    reported as missing; any other absent benchmark (renamed, crashed or left
+    out of the current run) fails the gate.
+    """
+    regressions = []
+    missing = []
+    settings = ('rows', 'train_scale', 'svm_rows')
+    if any(baseline['meta'].get(k) != current['meta'].get(k) for k in settings):
+        recorded = ', '.join(f'{k}={baseline["meta"].get(k)}' for k in settings)
+        print(f'Warning: baseline was recorded with different suite settings ({recorded})')
+    print(f'{"benchmark":<28} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name, base in baseline['results'].items():
+        if not _selected(name, k):
+            continue
+        if name not in current['results']:
+            missing.append(name)
+            print(f'{name:<28} {_format(base["seconds"]):>12} {"-":>12} {"":>8}  MISSING')
+            continue
+        now = current['results'][name]['seconds']
+        change = now / base['seconds'] - 1
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:<28} {_format(base["seconds"]):>12} {_format(now):>12} {change:>+8.1%}{flag}')
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    suite = argparse.ArgumentParser(add_help=False)
+    suite.add_argument('-k', action='append', help='Only run benchmarks whose name contains this (repeatable)')
+    suite.add_argument('--rows', type=int, default=1000, help='Rows for the per-row benchmarks')
+    suite.add_argument('--repeat', type=int, default=7)
+    suite.add_argument('--train-repeat', type=int, default=3)
+    suite.add_argument('--train-scale', type=int, default=2, help='Times the training set is replicated')
+    suite.add_argument('--svm-rows', type=int, default=2000)
+
+    run = sub.add_parser('run', parents=[suite], help='Run the suite and write JSON results')
+    run.add_argument('--output', help='Result file (default: print only)')
+
+    cmp = sub.add_parser('compare', parents=[suite], help='Compare against a baseline result file')
+    cmp.add_argument('baseline')
+    cmp.add_argument('current', nargs='?', help='Result file to check (default: run the suite now)')
+    cmp.add_argument('--tolerance', type=float, default=0.10,
+                     help='Allowed slowdown as a fraction of the baseline time')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        document = run_suite(args)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(document, f, indent=2)
+            print(f'Results written to {args.output}')
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args)
+        print()
+    regressions, missing = compare(baseline, current, args.tolerance, args.k)
+    if missing:
+        print(f'{len(missing)} baseline benchmark(s) missing from the current results: {", ".join(missing)}')
+    if regressions:
+        print(f'{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {", ".join(regressions)}')
+    if missing or regressions:
+        sys.exit(1)
+    print(f'No regressions beyond {args.tolerance:.0%}')
+
+
+if __name__ == '__main__':
+    main()
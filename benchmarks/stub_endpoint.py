@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the SageMaker runtime so server throughput can be measured without AWS.
+
+Answers ``POST /endpoints/<name>/invocations`` with one probability per CSV
+line (``0.42``, or with ``--varied`` a pseudo-random value derived from the
+line, as a real model would give), after an optional fixed delay that models
+endpoint latency. Point the
+API at it with ``SAGEMAKER_ENDPOINT_URL=http://127.0.0.1:8080`` (any dummy
+AWS credentials will do; the signature is not checked).
+
+Usage:  python benchmarks/stub_endpoint.py [--port 8080] [--latency-ms 0] [--processes 2] [--varied]
+"""
+import argparse
+import os
+import socket
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    varied = False
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        if self.varied:
+            response = b'\n'.join(b'%.6f' % (zlib.crc32(line) / 2**32) for line in body.split(b'\n')) if body else b''
+        else:
+            rows = body.count(b'\n') + 1 if body else 0
+            response = b'\n'.join([b'0.42'] * rows)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--processes', type=int, default=2,
+                        help='Forked server processes sharing the socket, so the stub is not the bottleneck')
+    parser.add_argument('--varied', action='store_true',
+                        help='Return a different probability per row instead of a constant, e.g. for compression')
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency_ms / 1000
+    StubHandler.varied = args.varied
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubHandler)
+    server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    for _ in range(args.processes - 1):
+        if os.fork() == 0:
+            break
+    print(f'Stub endpoint on :{args.port} (pid {os.getpid()}, latency {args.latency_ms} ms)', flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
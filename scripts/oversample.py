@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+SMOTE-NC oversampling stage for the one-hot training set.
+
+Replaces the notebook's ``SMOTENC.fit_resample`` + one-hot expansion for large
+training sets. Reads the training CSV in its final layout (e.g.
+``train_original.csv``), balances the classes by synthesizing minority rows and
+writes original + synthetic rows as ``train_smote.csv``:
+
+- Neighbours: exact k-NN over the minority rows, from a KD-tree queried in
+  blocks of rows, or (``--algorithm brute``) from blocked distance matrices
+  bounded by ``--working-memory`` per thread. Blocks run in parallel
+  (``--n-jobs`` threads).
+- Distance space as in SMOTE-NC: continuous columns as they are, nominal
+  columns scaled so that a category mismatch costs the median standard
+  deviation of the minority class's continuous columns.
+- Synthetic rows: continuous columns interpolated towards a random neighbour;
+  every one-hot group and binary column takes the most common value among
+  the k neighbours (random tie break). Rows are produced directly as one-hot
+  float32, in fixed-size chunks, each with its own seed spawned from
+  ``--seed``, so the output is identical for any ``--n-jobs``.
+
+Usage:
+    python scripts/oversample.py --input data/processed/train_original.csv \
+        --output data/processed/train_smote.csv
+"""
+import argparse
+import glob
+import os
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.neighbors import KDTree
+from threadpoolctl import threadpool_limits
+
+LABEL = 'Churn'
+
+# One-hot groups (column prefixes) and binary columns written by 02_data_preprocessing
+CATEGORICAL_GROUPS = ['MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+                      'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+                      'Contract', 'PaymentMethod', 'TenureGroup']
+BINARY_COLUMNS = ['gender', 'SeniorCitizen', 'Partner', 'Dependents', 'PhoneService', 'PaperlessBilling']
+
+# Synthetic rows per generation chunk; fixed so the output does not depend on --n-jobs
+CHUNK_ROWS = 16384
+# Rows per KD-tree query task
+QUERY_ROWS = 4096
+
+
+def find_csv(directory):
+    """Find the first CSV file in a directory."""
+    files = glob.glob(os.path.join(directory, '*.csv'))
+    if files:
+        return files[0]
+    raise FileNotFoundError(f'No CSV found in {directory}')
+
+
+def load_data(path):
+    """Load the training CSV as float32 features and integer labels."""
+    if os.path.isdir(path):
+        path = find_csv(path)
+    print(f'Loading: {path}')
+    df = pd.read_csv(path)
+    print(f'Shape: {df.shape}')
+    y = df.pop(LABEL).astype(int).to_numpy()
+    return df.to_numpy(dtype=np.float32), y, list(df.columns)
+
+
+def feature_layout(columns):
+    """Split column indices into continuous columns and nominal groups.
+
+    Each one-hot group is a list of its column indices; a binary column is a
+    group of one.
+    """
+    groups = []
+    for prefix in CATEGORICAL_GROUPS:
+        group = [i for i, c in enumerate(columns) if c.startswith(f'{prefix}_')]
+        if not group:
+            raise ValueError(f'No one-hot columns for {prefix}')
+        groups.append(group)
+    for name in BINARY_COLUMNS:
+        groups.append([columns.index(name)])
+    nominal = {i for group in groups for i in group}
+    continuous = [i for i in range(len(columns)) if i not in nominal]
+    return continuous, groups
+
+
+def distance_space(X, continuous, groups):
+    """Scale nominal columns so that a category mismatch costs the median std.
+
+    Matches SMOTE-NC: with one-hot entries set to ``median_std / 2`` a mismatch
+    adds ``median_std ** 2 / 2`` to the squared distance; a binary column gets
+    the same weight from a single column.
+    """
+    median_std = float(np.median(X[:, continuous].std(axis=0)))
+    Z = X.copy()
+    for group in groups:
+        Z[:, group] *= median_std / 2 if len(group) > 1 else median_std / np.sqrt(2)
+    return Z
+
+
+def _brute_block(Z, sq_norms, start, stop, k):
+    """k nearest neighbours (excluding the row itself) of rows ``start:stop``."""
+    d = Z[start:stop] @ Z.T
+    d *= -2
+    d += sq_norms[start:stop, None]
+    d += sq_norms[None, :]
+    rows = np.arange(stop - start)
+    d[rows, start + rows] = np.inf
+    idx = np.argpartition(d, k, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(d, idx, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def _tree_block(Z, tree, start, stop, k):
+    """k nearest neighbours (excluding the row itself) of rows ``start:stop``."""
+    idx = tree.query(Z[start:stop], k=k + 1, return_distance=False)
+    # With duplicate rows the row itself is not necessarily first; move it last
+    is_self = idx == np.arange(start, stop)[:, None]
+    order = np.argsort(is_self, axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)[:, :k]
+
+
+def nearest_neighbors(Z, k, algorithm='kd_tree', working_memory=256, n_jobs=1):
+    """Exact k-NN of every row of ``Z`` among the rows of ``Z``.
+
+    ``kd_tree`` queries a KD-tree for blocks of ``QUERY_ROWS`` rows.
+    ``brute`` computes distances for blocks of rows against all rows, with
+    ``working_memory`` (MB) bounding one block's distance matrix plus its
+    partition indices; slower, but independent of how well the tree prunes.
+    """
+    n = len(Z)
+    if n <= k:
+        raise ValueError(f'Need more than k_neighbors={k} minority rows, got {n}')
+    if algorithm == 'kd_tree':
+        tree = KDTree(Z)
+        block = QUERY_ROWS
+        task = partial(_tree_block, Z, tree)
+    else:
+        block = max(1, min(n, working_memory * 2**20 // (n * (Z.itemsize + 8))))
+        task = partial(_brute_block, Z, np.einsum('ij,ij->i', Z, Z))
+    starts = range(0, n, block)
+    print(f'k-NN ({algorithm}): {n} rows in {len(starts)} blocks of {block}')
+    with threadpool_limits(1 if n_jobs != 1 else None):
+        parts = Parallel(n_jobs=n_jobs, prefer='threads')(
+            delayed(task)(s, min(s + block, n), k) for s in starts)
+    return np.concatenate(parts)
+
+
+def neighbor_votes(X, nn, groups):
+    """Per minority row, how many of its neighbours are in each category.
+
+    Binary columns are expanded to (0, 1) counts, so every group is a block of
+    category counts.
+    """
+    blocks = []
+    for group in groups:
+        counts = X[:, group][nn].sum(axis=1)
+        if len(group) == 1:
+            counts = np.hstack([nn.shape[1] - counts, counts])
+        blocks.append(counts)
+    return np.hstack(blocks).astype(np.float32)
+
+
+def _synthesize_chunk(X, nn, votes, continuous, groups, n, seed):
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(X), n)
+    neighbors = nn[rows, rng.integers(0, nn.shape[1], n)]
+    steps = rng.random((n, 1), dtype=np.float32)
+
+    out = np.zeros((n, X.shape[1]), dtype=np.float32)
+    base = X[rows][:, continuous]
+    out[:, continuous] = base + steps * (X[neighbors][:, continuous] - base)
+
+    # Most common category among the neighbours; jitter < 1 only breaks ties
+    chunk_votes = votes[rows] + rng.random((n, votes.shape[1]), dtype=np.float32) * 0.5
+    at = 0
+    all_rows = np.arange(n)
+    for group in groups:
+        width = max(len(group), 2)
+        winner = chunk_votes[:, at:at + width].argmax(axis=1)
+        if len(group) == 1:
+            out[:, group[0]] = winner
+        else:
+            out[all_rows, np.asarray(group)[winner]] = 1
+        at += width
+    return out
+
+
+def synthesize(X, nn, votes, continuous, groups, n_samples, seed=42, n_jobs=1):
+    """Yield ``n_samples`` synthetic rows in chunks, in the input column layout."""
+    n_chunks = -(-n_samples // CHUNK_ROWS)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [min(CHUNK_ROWS, n_samples - i * CHUNK_ROWS) for i in range(n_chunks)]
+    # Batches of n_jobs chunks keep at most that many chunks in memory
+    batch = max(1, n_jobs if n_jobs > 0 else os.cpu_count())
+    with Parallel(n_jobs=n_jobs, prefer='threads') as parallel:
+        for i in range(0, n_chunks, batch):
+            yield from parallel(
+                delayed(_synthesize_chunk)(X, nn, votes, continuous, groups, sizes[j], seeds[j])
+                for j in range(i, min(i + batch, n_chunks)))
+
+
+def oversample(X, y, columns, k_neighbors=5, seed=42, algorithm='kd_tree', working_memory=256, n_jobs=1):
+    """Balance the classes; yields (features, label) chunks of synthetic rows."""
+    classes, counts = np.unique(y, return_counts=True)
+    minority = classes[counts.argmin()]
+    n_samples = int(counts.max() - counts.min())
+    print(f'Class counts: {dict(zip(classes.tolist(), counts.tolist()))}, '
+          f'synthesizing {n_samples} rows of class {minority}')
+
+    X_min = X[y == minority]
+    continuous, groups = feature_layout(columns)
+    nn = nearest_neighbors(distance_space(X_min, continuous, groups), k_neighbors,
+                           algorithm, working_memory, n_jobs)
+    votes = neighbor_votes(X_min, nn, groups)
+    for chunk in synthesize(X_min, nn, votes, continuous, groups, n_samples, seed, n_jobs):
+        yield chunk, minority
+
+
+def write_chunk(path, X, y, columns, header):
+    df = pd.DataFrame(X, columns=columns)
+    df[LABEL] = y
+    df.to_csv(path, mode='w' if header else 'a', header=header, index=False, float_format='%.7g')
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--k-neighbors', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Threads; -1 uses all cores')
+    parser.add_argument('--algorithm', choices=['kd_tree', 'brute'], default='kd_tree')
+    parser.add_argument('--working-memory', type=int, default=256,
+                        help='MB per brute-force k-NN block, per thread')
+
+    # SageMaker Processing environment
+    parser.add_argument('--input', type=str, default='/opt/ml/processing/input',
+                        help='Training CSV, or a directory containing it')
+    parser.add_argument('--output', type=str, default='/opt/ml/processing/output/train_smote.csv')
+
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+
+    X, y, columns = load_data(args.input)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    write_chunk(args.output, X, y, columns, header=True)
+
+    n_synthetic = 0
+    for X_syn, label in oversample(X, y, columns, args.k_neighbors, args.seed, args.algorithm,
+                                   args.working_memory, args.n_jobs):
+        write_chunk(args.output, X_syn, label, columns, header=False)
+        n_synthetic += len(X_syn)
+
+    print(f'Wrote {len(X) + n_synthetic} rows ({n_synthetic} synthetic) to {args.output} '
+          f'in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
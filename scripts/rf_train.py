@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
 """
 Random Forest training script for SageMaker with Hyperparameter Tuning support.
+
+Incremental mode: pass the previous model artifact (``--warm-start-model`` or a
+``model`` channel) and newly labelled customers (``--delta`` or a ``delta``
+channel). The forest keeps its trees and grows ``--n-new-estimators`` more,
+fitted on the delta plus an ``--old-sample-frac`` sample of the previous
+training data (the ``train`` channel) to limit forgetting. With
+``--compare-full-retrain true`` (off by default, as it costs a full retrain), a
+full retrain on train + delta is run for comparison and saved instead when the
+incremental model's Test-AUC is more than ``--max-auc-drop`` behind.
 """
 import argparse
 import json
 import os
 import glob
+import time
 import pandas as pd
 import joblib
 from sklearn.ensemble import RandomForestClassifier
@@ -53,6 +63,33 @@ def load_data(train_dir, test_dir):
     return X_train, y_train, X_test, y_test
 
 
+def load_model(path):
+    """Load a previous model artifact (model directory or joblib file)."""
+    if os.path.isdir(path):
+        path = os.path.join(path, 'model.joblib')
+    print(f'Loading previous model: {path}')
+    return joblib.load(path)
+
+
+def load_delta(delta_dir, columns):
+    """Load newly labelled customers, with columns in the training order."""
+    delta_file = find_csv(delta_dir)
+    print(f'Loading delta: {delta_file}')
+    delta_df = pd.read_csv(delta_file)
+    print(f'Delta shape: {delta_df.shape}')
+    return delta_df[columns], delta_df['Churn'].astype(int)
+
+
+def mix_old_data(X_old, y_old, X_delta, y_delta, frac):
+    """Append a random sample of the previous training data to the delta."""
+    if frac <= 0:
+        return X_delta, y_delta
+    sample = X_old.sample(frac=min(frac, 1.0), random_state=42).index
+    X = pd.concat([X_delta, X_old.loc[sample]], ignore_index=True)
+    y = pd.concat([y_delta, y_old.loc[sample]], ignore_index=True)
+    return X, y
+
+
 def train_model(args, X_train, y_train):
     """Train Random Forest model."""
     print(f'Training RF: n_estimators={args.n_estimators}, max_depth={args.max_depth}, '
@@ -71,6 +108,21 @@ def train_model(args, X_train, y_train):
     return model
 
 
+def train_incremental(args, model, X, y):
+    """Grow an already trained forest by ``args.n_new_estimators`` trees fitted on ``X``."""
+    n_trees = len(model.estimators_)
+    print(f'Warm-starting RF: {n_trees} trees + {args.n_new_estimators} new on {len(X)} rows')
+    model.set_params(warm_start=True, n_estimators=n_trees + args.n_new_estimators)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def train_full(args, n_estimators, X, y):
+    """Train a forest of the same size from scratch, for comparison."""
+    return train_model(argparse.Namespace(**{**vars(args), 'n_estimators': n_estimators}), X, y)
+
+
 def evaluate_model(model, X, y, prefix='Test'):
     """Evaluate model and return metrics."""
     y_pred = model.predict(X)
@@ -92,7 +144,7 @@ def save_model(model, model_dir):
     print(f'Model saved to {model_path}')
 
 
-def parse_args():
+def parse_args(argv=None):
     """Parse command line arguments."""
     parser = argparse.ArgumentParser()
     
@@ -102,14 +154,24 @@ def parse_args():
     parser.add_argument('--min-samples-split', type=int, default=2)
     parser.add_argument('--min-samples-leaf', type=int, default=1)
     parser.add_argument('--max-features', type=str, default='sqrt')
+
+    # Incremental training
+    parser.add_argument('--n-new-estimators', type=int, default=20)
+    parser.add_argument('--old-sample-frac', type=float, default=0.1)
+    parser.add_argument('--compare-full-retrain', type=str, default='false')
+    parser.add_argument('--max-auc-drop', type=float, default=0.01)
     
     # SageMaker environment
     parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', '/opt/ml/model'))
     parser.add_argument('--train', type=str, default=os.environ.get('SM_CHANNEL_TRAIN', '/opt/ml/input/data/train'))
     parser.add_argument('--test', type=str, default=os.environ.get('SM_CHANNEL_TEST', '/opt/ml/input/data/test'))
     parser.add_argument('--output-data-dir', type=str, default=os.environ.get('SM_OUTPUT_DATA_DIR', '/opt/ml/output/data'))
+    parser.add_argument('--warm-start-model', type=str, default=os.environ.get('SM_CHANNEL_MODEL'))
+    parser.add_argument('--delta', type=str, default=os.environ.get('SM_CHANNEL_DELTA'))
     
-    args, _ = parser.parse_known_args()
+    args, _ = parser.parse_known_args(argv)
+    if args.warm_start_model and not args.delta:
+        parser.error('--warm-start-model needs --delta (or a delta channel)')
     return args
 
 
@@ -123,7 +185,33 @@ def main():
     X_train, y_train, X_test, y_test = load_data(args.train, args.test)
     
     # Train model
-    model = train_model(args, X_train, y_train)
+    incremental_metrics = {}
+    if args.warm_start_model:
+        model = load_model(args.warm_start_model)
+        X_delta, y_delta = load_delta(args.delta, list(X_train.columns))
+        X_mix, y_mix = mix_old_data(X_train, y_train, X_delta, y_delta, args.old_sample_frac)
+        start = time.perf_counter()
+        model = train_incremental(args, model, X_mix, y_mix)
+        incremental_metrics['Incremental-Seconds'] = time.perf_counter() - start
+
+        # Training data of the saved model, for the train metrics below
+        X_train = pd.concat([X_train, X_delta], ignore_index=True)
+        y_train = pd.concat([y_train, y_delta], ignore_index=True)
+
+        if args.compare_full_retrain.lower() == 'true':
+            start = time.perf_counter()
+            full_model = train_full(args, len(model.estimators_), X_train, y_train)
+            incremental_metrics['Full-Retrain-Seconds'] = time.perf_counter() - start
+            incremental_auc = evaluate_model(model, X_test, y_test)['Test-AUC']
+            full_auc = evaluate_model(full_model, X_test, y_test)['Test-AUC']
+            incremental_metrics['Incremental-Test-AUC'] = incremental_auc
+            incremental_metrics['Full-Retrain-Test-AUC'] = full_auc
+            if incremental_auc < full_auc - args.max_auc_drop:
+                print(f'Incremental Test-AUC {incremental_auc:.4f} is more than {args.max_auc_drop} '
+                      f'below full retrain {full_auc:.4f}; saving the full retrain')
+                model = full_model
+    else:
+        model = train_model(args, X_train, y_train)
     
     # Evaluate on test set
     test_metrics = evaluate_model(model, X_test, y_test, prefix='Test')
@@ -132,11 +220,11 @@ def main():
     train_metrics = evaluate_model(model, X_train, y_train, prefix='Train')
     
     # Print metrics (SageMaker HPO parses these from logs)
-    for name, value in {**test_metrics, **train_metrics}.items():
+    for name, value in {**test_metrics, **train_metrics, **incremental_metrics}.items():
         print(f'{name}: {value:.4f}')
     
     # Save metrics to JSON for CloudWatch/analysis
-    all_metrics = {**test_metrics, **train_metrics}
+    all_metrics = {**test_metrics, **train_metrics, **incremental_metrics}
     os.makedirs(args.output_data_dir, exist_ok=True)
     with open(os.path.join(args.output_data_dir, 'metrics.json'), 'w') as f:
         json.dump(all_metrics, f, indent=2)
@@ -30,6 +30,27 @@ def predict_fn(input_data, model):
     return model.predict_proba(input_data)[:, 1].tolist()
 
 
+def train_model(args, X_train, y_train):
+    """Train SVM model."""
+    print(f'Training SVM with C={args.C}, kernel={args.kernel}')
+    model = SVC(C=args.C, kernel=args.kernel, gamma=args.gamma, probability=True)
+    model.fit(X_train, y_train)
+    return model
+
+
+def evaluate_model(model, X, y, prefix='Test'):
+    """Evaluate model and return metrics."""
+    y_pred = model.predict(X)
+    y_prob = model.predict_proba(X)[:, 1]
+    
+    metrics = {
+        f'{prefix}-AUC': roc_auc_score(y, y_prob),
+        f'{prefix}-Accuracy': accuracy_score(y, y_pred),
+        f'{prefix}-F1': f1_score(y, y_pred)
+    }
+    return metrics
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     
@@ -69,29 +90,13 @@ if __name__ == '__main__':
     y_test = test_df['Churn'].astype(int)
     X_test = test_df.drop('Churn', axis=1)
     
-    print(f'Training SVM with C={args.C}, kernel={args.kernel}')
-    model = SVC(C=args.C, kernel=args.kernel, gamma=args.gamma, probability=True)
-    model.fit(X_train, y_train)
+    model = train_model(args, X_train, y_train)
     
     # Evaluate on test set
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
-    
-    test_metrics = {
-        'Test-AUC': roc_auc_score(y_test, y_prob),
-        'Test-Accuracy': accuracy_score(y_test, y_pred),
-        'Test-F1': f1_score(y_test, y_pred)
-    }
+    test_metrics = evaluate_model(model, X_test, y_test, prefix='Test')
     
     # Evaluate on train set (overfitting analysis)
-    y_train_pred = model.predict(X_train)
-    y_train_prob = model.predict_proba(X_train)[:, 1]
-    
-    train_metrics = {
-        'Train-AUC': roc_auc_score(y_train, y_train_prob),
-        'Train-Accuracy': accuracy_score(y_train, y_train_pred),
-        'Train-F1': f1_score(y_train, y_train_pred)
-    }
+    train_metrics = evaluate_model(model, X_train, y_train, prefix='Train')
     
     # Print metrics (SageMaker HPO parses these from logs)
     all_metrics = {**test_metrics, **train_metrics}
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+XGBoost training script for SageMaker (XGBoost framework, script mode) with
+Hyperparameter Tuning support.
+
+Reads the same headered CSVs as ``rf_train.py`` with its loaders (upload
+``scripts`` as ``source_dir``) and saves the booster as ``xgboost-model``, like
+the built-in algorithm, so either artifact can seed the next run.
+
+Incremental mode: pass the previous model artifact (``--warm-start-model`` or a
+``model`` channel) and newly labelled customers (``--delta`` or a ``delta``
+channel). Boosting continues from the existing booster for ``--n-new-rounds``
+rounds on the delta plus an ``--old-sample-frac`` sample of the previous
+training data (the ``train`` channel) to limit forgetting. With
+``--compare-full-retrain true`` (off by default, as it costs a full retrain), a
+full retrain on train + delta is run for comparison and saved instead when the
+incremental model's Test-AUC is more than ``--max-auc-drop`` behind.
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, roc_auc_score, f1_score
+
+from rf_train import load_data, load_delta, mix_old_data
+
+MODEL_FILE = 'xgboost-model'
+
+
+def model_fn(model_dir):
+    """Load model for inference (required by SageMaker)."""
+    return load_model(model_dir)
+
+
+def predict_fn(input_data, model):
+    """Return class-1 probabilities for churn prediction.
+
+    ``input_data`` is the DMatrix built by the container's default ``input_fn``.
+    """
+    return model.predict(input_data).tolist()
+
+
+def load_model(path):
+    """Load a booster from a model directory or file.
+
+    Accepts boosters saved with ``save_model`` and the pickled boosters written
+    by older built-in XGBoost containers.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, MODEL_FILE)
+    print(f'Loading previous model: {path}')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    booster = xgb.Booster()
+    try:
+        booster.load_model(bytearray(raw))
+    except xgb.core.XGBoostError:
+        booster = pickle.loads(raw)
+    return booster
+
+
+def to_dmatrix(X, y=None):
+    """Build a DMatrix without feature names, matching boosters from the built-in algorithm."""
+    return xgb.DMatrix(X.to_numpy(dtype='float32'), label=None if y is None else y.to_numpy())
+
+
+def booster_params(args):
+    """Training parameters from the hyperparameters."""
+    return {
+        'objective': 'binary:logistic',
+        'eval_metric': 'auc',
+        'max_depth': args.max_depth,
+        'eta': args.eta,
+        'subsample': args.subsample,
+        'colsample_bytree': args.colsample_bytree,
+        'min_child_weight': args.min_child_weight,
+        'alpha': args.alpha,
+        'seed': 42,
+    }
+
+
+def train_model(args, X_train, y_train):
+    """Train XGBoost model."""
+    print(f'Training XGBoost: num_round={args.num_round}, max_depth={args.max_depth}, eta={args.eta}')
+    return xgb.train(booster_params(args), to_dmatrix(X_train, y_train), num_boost_round=args.num_round)
+
+
+def train_incremental(args, booster, X, y):
+    """Continue boosting an already trained booster for ``args.n_new_rounds`` rounds on ``X``."""
+    n_rounds = booster.num_boosted_rounds()
+    print(f'Continuing XGBoost: {n_rounds} rounds + {args.n_new_rounds} new on {len(X)} rows')
+    return xgb.train(booster_params(args), to_dmatrix(X, y),
+                     num_boost_round=args.n_new_rounds, xgb_model=booster)
+
+
+def train_full(args, num_round, X, y):
+    """Train a booster with the same number of rounds from scratch, for comparison."""
+    return train_model(argparse.Namespace(**{**vars(args), 'num_round': num_round}), X, y)
+
+
+def evaluate_model(model, X, y, prefix='Test'):
+    """Evaluate model and return metrics."""
+    y_prob = model.predict(to_dmatrix(X))
+    y_pred = (y_prob >= 0.5).astype(int)
+
+    metrics = {
+        f'{prefix}-AUC': roc_auc_score(y, y_prob),
+        f'{prefix}-Accuracy': accuracy_score(y, y_pred),
+        f'{prefix}-F1': f1_score(y, y_pred)
+    }
+    return metrics
+
+
+def save_model(model, model_dir):
+    """Save model to model directory."""
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    # UBJSON bytes: the file name has no extension for save_model to infer a format from
+    with open(model_path, 'wb') as f:
+        f.write(model.save_raw(raw_format='ubj'))
+    print(f'Model saved to {model_path}')
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser()
+
+    # Hyperparameters (tunable; built-in algorithm spellings accepted too)
+    parser.add_argument('--num-round', '--num_round', type=int, default=100)
+    parser.add_argument('--max-depth', '--max_depth', type=int, default=6)
+    parser.add_argument('--eta', type=float, default=0.3)
+    parser.add_argument('--subsample', type=float, default=1.0)
+    parser.add_argument('--colsample-bytree', '--colsample_bytree', type=float, default=1.0)
+    parser.add_argument('--min-child-weight', '--min_child_weight', type=float, default=1.0)
+    parser.add_argument('--alpha', type=float, default=0.0)
+
+    # Incremental training
+    parser.add_argument('--n-new-rounds', type=int, default=20)
+    parser.add_argument('--old-sample-frac', type=float, default=0.1)
+    parser.add_argument('--compare-full-retrain', type=str, default='false')
+    parser.add_argument('--max-auc-drop', type=float, default=0.01)
+
+    # SageMaker environment
+    parser.add_argument('--model-dir', type=str, default=os.environ.get('SM_MODEL_DIR', '/opt/ml/model'))
+    parser.add_argument('--train', type=str, default=os.environ.get('SM_CHANNEL_TRAIN', '/opt/ml/input/data/train'))
+    parser.add_argument('--test', type=str, default=os.environ.get('SM_CHANNEL_TEST', '/opt/ml/input/data/test'))
+    parser.add_argument('--output-data-dir', type=str, default=os.environ.get('SM_OUTPUT_DATA_DIR', '/opt/ml/output/data'))
+    parser.add_argument('--warm-start-model', type=str, default=os.environ.get('SM_CHANNEL_MODEL'))
+    parser.add_argument('--delta', type=str, default=os.environ.get('SM_CHANNEL_DELTA'))
+
+    args, _ = parser.parse_known_args(argv)
+    if args.warm_start_model and not args.delta:
+        parser.error('--warm-start-model needs --delta (or a delta channel)')
+    return args
+
+
+def main():
+    args = parse_args()
+
+    print(f'Train dir: {args.train}')
+    print(f'Test dir: {args.test}')
+
+    # Load data
+    X_train, y_train, X_test, y_test = load_data(args.train, args.test)
+
+    # Train model
+    incremental_metrics = {}
+    if args.warm_start_model:
+        model = load_model(args.warm_start_model)
+        X_delta, y_delta = load_delta(args.delta, list(X_train.columns))
+        X_mix, y_mix = mix_old_data(X_train, y_train, X_delta, y_delta, args.old_sample_frac)
+        start = time.perf_counter()
+        model = train_incremental(args, model, X_mix, y_mix)
+        incremental_metrics['Incremental-Seconds'] = time.perf_counter() - start
+
+        # Training data of the saved model, for the train metrics below
+        X_train = pd.concat([X_train, X_delta], ignore_index=True)
+        y_train = pd.concat([y_train, y_delta], ignore_index=True)
+
+        if args.compare_full_retrain.lower() == 'true':
+            start = time.perf_counter()
+            full_model = train_full(args, model.num_boosted_rounds(), X_train, y_train)
+            incremental_metrics['Full-Retrain-Seconds'] = time.perf_counter() - start
+            incremental_auc = evaluate_model(model, X_test, y_test)['Test-AUC']
+            full_auc = evaluate_model(full_model, X_test, y_test)['Test-AUC']
+            incremental_metrics['Incremental-Test-AUC'] = incremental_auc
+            incremental_metrics['Full-Retrain-Test-AUC'] = full_auc
+            if incremental_auc < full_auc - args.max_auc_drop:
+                print(f'Incremental Test-AUC {incremental_auc:.4f} is more than {args.max_auc_drop} '
+                      f'below full retrain {full_auc:.4f}; saving the full retrain')
+                model = full_model
+    else:
+        model = train_model(args, X_train, y_train)
+
+    # Evaluate on test set
+    test_metrics = evaluate_model(model, X_test, y_test, prefix='Test')
+
+    # Evaluate on train set (overfitting analysis)
+    train_metrics = evaluate_model(model, X_train, y_train, prefix='Train')
+
+    # Print metrics (SageMaker HPO parses these from logs)
+    for name, value in {**test_metrics, **train_metrics, **incremental_metrics}.items():
+        print(f'{name}: {value:.4f}')
+
+    # Save metrics to JSON for CloudWatch/analysis
+    all_metrics = {**test_metrics, **train_metrics, **incremental_metrics}
+    os.makedirs(args.output_data_dir, exist_ok=True)
+    with open(os.path.join(args.output_data_dir, 'metrics.json'), 'w') as f:
+        json.dump(all_metrics, f, indent=2)
+
+    # Save model
+    save_model(model, args.model_dir)
+    print('Training complete')
+
+
+if __name__ == '__main__':
+    main()